@@ -9,20 +9,38 @@ import os
 import time
 from datetime import datetime
 from typing import List, Dict, Any
+from dotenv import load_dotenv
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from allocation_stream import extract_allocations
+from baseline_algorithms import TaskAllocationProblem
 from evaluation_metrics import AllocationEvaluator
+from llm_client import ModelClientPool, get_client_mode
+from llm_rate_limiter import RateLimiter
+
+load_dotenv()
 
 
 class AblationExperiment:
     """智能体消融实验管理类"""
     
-    def __init__(self):
+    def __init__(self, max_connections: int = None, rpm: float = None, tpm: float = None):
+        """
+        Args:
+            max_connections: 共享连接池的最大并发连接数（默认取 LLM_MAX_CONNECTIONS）
+            rpm: 每分钟请求数上限（默认取 LLM_RPM，不设置则不限）
+            tpm: 每分钟token数上限（默认取 LLM_TPM，不设置则不限）
+        """
         self.results = {}
+        self.trial_results = {}
+        self.run_stats = {}
         self.output_dir = "ablation_results"
         
+        # 所有配置的所有智能体共享同一个模型客户端、HTTP长连接池和API限速配额
+        self.rate_limiter = RateLimiter(rpm, tpm)
+        self.client_pool = ModelClientPool(max_connections, rate_limiter=self.rate_limiter)
+        
         # 创建输出目录
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
@@ -63,8 +81,9 @@ class AblationExperiment:
             }
         }
         
-        # 加载默认任务描述
+        # 加载默认任务描述；评估与任务数统计使用同一场景
         self.task_description = self._load_default_task()
+        self.problem = TaskAllocationProblem.from_default_scenario()
     
     def _load_default_task(self) -> str:
         """加载默认任务描述"""
@@ -128,28 +147,25 @@ class AblationExperiment:
 请为以上任务生成最优分配方案。
 """
     
-    def _get_llm_client(self):
-        """获取LLM客户端"""
-        import os
-        from dotenv import load_dotenv
-        
-        load_dotenv()
-        
+    def _get_llm_client(self, variant: str = ''):
+        """获取LLM客户端（来自共享客户端池；variant 区分重复实验的各次运行）"""
         api_key = os.getenv("DEEPSEEK_API_KEY")
-        if not api_key:
+        # 回放模式（LLM_CLIENT_MODE=replay）从录制文件读取回复，不需要API密钥
+        if not api_key and get_client_mode() != 'replay':
             raise ValueError(
                 "❌ 错误：未找到API密钥！\n"
                 "请确保 .env 文件中设置了 DEEPSEEK_API_KEY\n"
                 "例如：DEEPSEEK_API_KEY=sk-xxxxxxxxxxxxxxxx"
             )
         
-        return OpenAIChatCompletionClient(
+        return self.client_pool.get(
             model="deepseek-chat",
+            base_url="https://api.deepseek.com",
             api_key=api_key,
-            base_url="https://api.deepseek.com"
+            variant=variant
         )
     
-    def create_task_analyzer(self) -> AssistantAgent:
+    def create_task_analyzer(self, variant: str = '') -> AssistantAgent:
         """创建任务分析智能体"""
         system_message = """你是任务分析专家。
 职责：解析和分析任务需求。
@@ -161,11 +177,11 @@ class AblationExperiment:
         
         return AssistantAgent(
             "TaskAnalyzer",
-            model_client=self._get_llm_client(),
+            model_client=self._get_llm_client(variant),
             system_message=system_message
         )
     
-    def create_resource_evaluator(self) -> AssistantAgent:
+    def create_resource_evaluator(self, variant: str = '') -> AssistantAgent:
         """创建资源评估智能体"""
         system_message = """你是资源评估专家。
 职责：评估无人机能力和可用性。
@@ -177,11 +193,11 @@ class AblationExperiment:
         
         return AssistantAgent(
             "ResourceEvaluator",
-            model_client=self._get_llm_client(),
+            model_client=self._get_llm_client(variant),
             system_message=system_message
         )
     
-    def create_solution_generator(self) -> AssistantAgent:
+    def create_solution_generator(self, variant: str = '') -> AssistantAgent:
         """创建方案生成智能体"""
         system_message = """你是方案生成专家。
 职责：生成任务分配方案。
@@ -208,11 +224,11 @@ class AblationExperiment:
         
         return AssistantAgent(
             "SolutionGenerator",
-            model_client=self._get_llm_client(),
+            model_client=self._get_llm_client(variant),
             system_message=system_message
         )
     
-    def create_conflict_detector(self) -> AssistantAgent:
+    def create_conflict_detector(self, variant: str = '') -> AssistantAgent:
         """创建冲突检测智能体"""
         system_message = """你是冲突检测专家。
 职责：检查方案中的冲突和问题。
@@ -225,11 +241,11 @@ class AblationExperiment:
         
         return AssistantAgent(
             "ConflictDetector",
-            model_client=self._get_llm_client(),
+            model_client=self._get_llm_client(variant),
             system_message=system_message
         )
     
-    def create_path_planner(self) -> AssistantAgent:
+    def create_path_planner(self, variant: str = '') -> AssistantAgent:
         """创建路径规划智能体"""
         system_message = """你是路径规划专家。
 职责：优化无人机飞行路径。
@@ -241,11 +257,11 @@ class AblationExperiment:
         
         return AssistantAgent(
             "PathPlanner",
-            model_client=self._get_llm_client(),
+            model_client=self._get_llm_client(variant),
             system_message=system_message
         )
     
-    def create_arbitrator(self) -> AssistantAgent:
+    def create_arbitrator(self, variant: str = '') -> AssistantAgent:
         """创建仲裁智能体"""
         system_message = """你是最终仲裁者。
 职责：综合所有意见，输出最终方案。
@@ -267,19 +283,24 @@ class AblationExperiment:
         
         return AssistantAgent(
             "Arbitrator",
-            model_client=self._get_llm_client(),
+            model_client=self._get_llm_client(variant),
             system_message=system_message
         )
     
-    async def run_configuration(self, config_name: str) -> Dict[str, Any]:
-        """运行指定配置的实验"""
+    def _run_dir(self, config_name: str, trial: int) -> str:
+        """单次运行的独立输出目录"""
+        return os.path.join(self.output_dir, 'runs', config_name, f'trial_{trial}')
+    
+    async def run_configuration(self, config_name: str, trial: int = 1) -> Dict[str, Any]:
+        """运行指定配置的实验（trial 为重复实验的序号，从1开始）"""
         config = self.configurations[config_name]
+        label = f"[{config_name} #{trial}]"
+        # 第1次运行沿用默认的缓存/录制，之后的各次运行各自独立，保证重复实验互不影响
+        variant = '' if trial == 1 else f'trial{trial}'
+        run_dir = self._run_dir(config_name, trial)
+        os.makedirs(run_dir, exist_ok=True)
         
-        print(f"\n{'='*70}")
-        print(f"运行配置: {config['name']}")
-        print(f"智能体: {', '.join(config['agents'])}")
-        print(f"说明: {config['description']}")
-        print('='*70)
+        print(f"\n▶ {label} 开始: {config['name']}（{', '.join(config['agents'])}）")
         
         start_time = time.time()
         
@@ -295,12 +316,19 @@ class AblationExperiment:
         }
         
         for agent_name in config['agents']:
-            agents.append(agent_creators[agent_name]())
+            agents.append(agent_creators[agent_name](variant))
         
         # 创建团队
         termination = MaxMessageTermination(20) | TextMentionTermination("TERMINATE")
         team = RoundRobinGroupChat(agents, termination_condition=termination)
         
+        run_info = {
+            'config_name': config_name,
+            'config': config,
+            'trial': trial,
+            'output_dir': run_dir,
+        }
+        
         # 运行对话
         try:
             result = await team.run(task=self.task_description)
@@ -312,70 +340,58 @@ class AblationExperiment:
             
             if allocation_result:
                 # 保存结果
-                output_file = f'{self.output_dir}/allocation_{config_name}.json'
+                output_file = os.path.join(run_dir, 'allocation.json')
                 with open(output_file, 'w', encoding='utf-8') as f:
                     json.dump(allocation_result, f, ensure_ascii=False, indent=2)
                 
-                print(f"\n✅ {config['name']} 完成")
+                print(f"\n✅ {label} {config['name']} 完成")
                 print(f"   运行时间: {runtime:.2f}秒")
-                print(f"   分配任务: {len(allocation_result.get('final_allocation', {}).get('assignments', []))}/5")
+                assigned = len(allocation_result.get('final_allocation', {}).get('assignments', []))
+                print(f"   分配任务: {assigned}/{self.problem.compile().n_tasks}")
                 print(f"   保存到: {output_file}")
                 
-                return {
-                    'config_name': config_name,
-                    'config': config,
-                    'result': allocation_result,
-                    'runtime': runtime,
-                    'success': True
-                }
+                return {**run_info, 'result': allocation_result, 'runtime': runtime, 'success': True}
             else:
-                print(f"\n❌ {config['name']} 失败：未能提取有效分配方案")
-                return {
-                    'config_name': config_name,
-                    'config': config,
-                    'result': None,
-                    'runtime': runtime,
-                    'success': False
-                }
+                print(f"\n❌ {label} {config['name']} 失败：未能提取有效分配方案")
+                return {**run_info, 'result': None, 'runtime': runtime, 'success': False}
         
         except Exception as e:
             runtime = time.time() - start_time
-            print(f"\n❌ {config['name']} 运行失败: {e}")
-            return {
-                'config_name': config_name,
-                'config': config,
-                'result': None,
-                'runtime': runtime,
-                'success': False,
-                'error': str(e)
-            }
+            print(f"\n❌ {label} {config['name']} 运行失败: {e}")
+            return {**run_info, 'result': None, 'runtime': runtime, 'success': False, 'error': str(e)}
     
     def _extract_allocation(self, result) -> Dict:
         """从对话结果中提取分配方案"""
-        import re
-        
         # 获取最后几条消息
         messages = []
         for msg in result.messages[-5:]:
             if hasattr(msg, 'content'):
                 messages.append(msg.content)
         
-        # 尝试提取JSON
+        # 括号配平提取JSON，同一条消息中有多个方案时取最后一个
         for msg in reversed(messages):
             if isinstance(msg, str):
-                # 查找JSON块
-                json_match = re.search(r'\{[\s\S]*"final_allocation"[\s\S]*\}', msg)
-                if json_match:
-                    try:
-                        allocation = json.loads(json_match.group())
-                        return allocation
-                    except:
-                        continue
+                allocations = extract_allocations(msg)
+                if allocations:
+                    return allocations[-1]
         
         return None
     
-    async def run_all_experiments(self):
-        """运行所有消融实验"""
+    async def run_all_experiments(self, trials: int = None, concurrency: int = None):
+        """
+        运行所有消融实验
+        
+        所有配置及其重复实验并发运行，总耗时接近最慢的单次运行，而不是各配置耗时之和。
+        
+        Args:
+            trials: 每个配置重复运行的次数（默认取 ABLATION_TRIALS，缺省为1）
+            concurrency: 同时运行的实验数上限（默认取 ABLATION_CONCURRENCY，缺省为全部同时运行）
+        """
+        trials = trials or int(os.getenv('ABLATION_TRIALS', 1))
+        runs = [(config_name, trial) for config_name in self.configurations.keys()
+                for trial in range(1, trials + 1)]
+        concurrency = concurrency or int(os.getenv('ABLATION_CONCURRENCY', 0)) or len(runs)
+        
         print("╔" + "═" * 68 + "╗")
         print("║" + " " * 20 + "智能体消融实验" + " " * 28 + "║")
         print("╚" + "═" * 68 + "╝")
@@ -385,11 +401,55 @@ class AblationExperiment:
             print(f"  {i}. {config['name']}")
             print(f"     智能体数: {len(config['agents'])}")
             print(f"     预期: {config['expected']}")
+        print(f"\n共 {len(runs)} 次运行（每个配置 {trials} 次），最多同时运行 {concurrency} 个")
+        if self.rate_limiter.enabled:
+            print(f"API限速: {self.rate_limiter.rpm:g} 请求/分钟, {self.rate_limiter.tpm:g} tokens/分钟（0表示不限）")
         
-        # 运行所有配置
-        for config_name in self.configurations.keys():
-            result = await self.run_configuration(config_name)
-            self.results[config_name] = result
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_limited(config_name: str, trial: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.run_configuration(config_name, trial)
+        
+        # 并发运行所有配置和重复实验
+        wall_start = time.time()
+        try:
+            outcomes = await asyncio.gather(*(run_limited(c, t) for c, t in runs))
+        finally:
+            pool_stats = self.client_pool.stats()
+            await self.client_pool.close()
+        wall_time = time.time() - wall_start
+        
+        self.trial_results = {config_name: [] for config_name in self.configurations.keys()}
+        for outcome in outcomes:
+            self.trial_results[outcome['config_name']].append(outcome)
+        
+        # 每个配置以第一次成功的运行作为代表结果，并复制到原有的 allocation_<配置>.json
+        for config_name, trial_list in self.trial_results.items():
+            representative = next((r for r in trial_list if r['success']), trial_list[0])
+            self.results[config_name] = representative
+            if representative['success']:
+                output_file = f'{self.output_dir}/allocation_{config_name}.json'
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(representative['result'], f, ensure_ascii=False, indent=2)
+        
+        runtime_sum = sum(outcome['runtime'] for outcome in outcomes)
+        self.run_stats = {
+            'runs': len(runs),
+            'trials_per_config': trials,
+            'concurrency': concurrency,
+            'wall_time': wall_time,
+            'runtime_sum': runtime_sum,
+            'slowest_run': max(outcome['runtime'] for outcome in outcomes),
+            'rate_limit_wait': self.rate_limiter.waited_s,
+        }
+        
+        print(f"\n⏱️  总耗时 {wall_time:.2f}秒（各次运行耗时之和 {runtime_sum:.2f}秒，"
+              f"最慢单次 {self.run_stats['slowest_run']:.2f}秒）")
+        if self.rate_limiter.enabled:
+            print(f"   限速等待累计 {self.rate_limiter.waited_s:.2f}秒")
+        print(f"🔌 共享客户端池: {pool_stats['requests']} 个智能体共用 {pool_stats['clients_created']} 个客户端"
+              f"（最大连接数 {pool_stats['max_connections']}）")
         
         # 评估所有结果
         self.evaluate_all_results()
@@ -403,33 +463,57 @@ class AblationExperiment:
         return self.results
     
     def evaluate_all_results(self):
-        """评估所有实验结果"""
+        """评估所有实验结果（每次运行的评估保存在各自的输出目录中）"""
         print(f"\n{'='*70}")
         print("评估所有配置")
         print('='*70)
         
-        for config_name, data in self.results.items():
-            if data['success'] and data['result']:
-                print(f"\n评估 {data['config']['name']}...")
-                
-                try:
-                    evaluator = AllocationEvaluator(data['result'])
-                    metrics = evaluator.evaluate_all()
+        trial_results = self.trial_results or {name: [data] for name, data in self.results.items()}
+        for config_name, trial_list in trial_results.items():
+            for data in trial_list:
+                label = f"{data['config']['name']} #{data.get('trial', 1)}"
+                if data['success'] and data['result']:
+                    print(f"\n评估 {label}...")
                     
-                    # 保存评估结果
-                    eval_file = f'{self.output_dir}/evaluation_{config_name}.json'
-                    with open(eval_file, 'w', encoding='utf-8') as f:
-                        json.dump(metrics, f, ensure_ascii=False, indent=2)
+                    try:
+                        evaluator = AllocationEvaluator(data['result'], self.problem)
+                        metrics = evaluator.evaluate_all()
+                        
+                        # 保存评估结果（代表结果同时保存为原有的 evaluation_<配置>.json）
+                        eval_files = [os.path.join(data['output_dir'], 'evaluation.json')] if 'output_dir' in data else []
+                        if data is self.results.get(config_name):
+                            eval_files.append(f'{self.output_dir}/evaluation_{config_name}.json')
+                        for eval_file in eval_files:
+                            with open(eval_file, 'w', encoding='utf-8') as f:
+                                json.dump(metrics, f, ensure_ascii=False, indent=2)
+                        
+                        data['metrics'] = metrics
+                        completion = metrics['task_completion']
+                        print(f"   分配任务: {completion['completed_tasks']}/{completion['total_tasks']}")
+                        print(f"   总体评分: {metrics['overall_score']:.2f}/100")
                     
-                    data['metrics'] = metrics
-                    print(f"   总体评分: {metrics['overall_score']:.2f}/100")
-                
-                except Exception as e:
-                    print(f"   ❌ 评估失败: {e}")
+                    except Exception as e:
+                        print(f"   ❌ 评估失败: {e}")
+                        data['metrics'] = None
+                else:
+                    print(f"\n跳过 {label}（运行失败）")
                     data['metrics'] = None
-            else:
-                print(f"\n跳过 {data['config']['name']}（运行失败）")
-                data['metrics'] = None
+    
+    def _trial_summary(self, config_name: str) -> Dict[str, Any]:
+        """重复实验的统计：成功次数、各次评分及其均值和标准差"""
+        trial_list = self.trial_results.get(config_name) or [self.results[config_name]]
+        scores = [t['metrics']['overall_score'] for t in trial_list if t['success'] and t.get('metrics')]
+        summary = {
+            'count': len(trial_list),
+            'successful': len(scores),
+            'scores': scores,
+            'runtime_mean': sum(t['runtime'] for t in trial_list) / len(trial_list),
+        }
+        if scores:
+            mean = sum(scores) / len(scores)
+            summary['score_mean'] = mean
+            summary['score_std'] = (sum((x - mean) ** 2 for x in scores) / len(scores)) ** 0.5
+        return summary
     
     def generate_comparison_report(self):
         """生成对比报告"""
@@ -462,6 +546,18 @@ class AblationExperiment:
                       f"{'-':<10} "
                       f"{'-':<10}")
         
+        # 重复实验统计
+        if self.run_stats.get('trials_per_config', 1) > 1:
+            print(f"\n{'配置':<20} {'成功/总数':<10} {'平均分':<10} {'标准差':<10}")
+            print('-' * 50)
+            for config_name, config in self.configurations.items():
+                summary = self._trial_summary(config_name)
+                if summary['successful']:
+                    print(f"{config['name']:<20} {summary['successful']}/{summary['count']:<8} "
+                          f"{summary['score_mean']:<10.2f} {summary['score_std']:<10.2f}")
+                else:
+                    print(f"{config['name']:<20} 0/{summary['count']:<8} {'-':<10} {'-':<10}")
+        
         # 找出最佳配置
         best_config = None
         best_score = -1
@@ -509,6 +605,7 @@ class AblationExperiment:
             else:
                 config_data['metrics'] = None
             
+            config_data['trials'] = self._trial_summary(config_name)
             complete_results['configurations'][config_name] = config_data
         
         # 生成摘要
@@ -535,6 +632,8 @@ class AblationExperiment:
                 'score': best[1]['metrics']['overall_score']
             }
         
+        complete_results['summary']['run_stats'] = self.run_stats
+        
         # 保存JSON
         output_file = f'{self.output_dir}/ablation_complete_results.json'
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -543,10 +642,10 @@ class AblationExperiment:
         print(f"\n✅ 完整实验结果已保存到: {output_file}")
 
 
-async def run_ablation_study():
-    """运行消融实验"""
+async def run_ablation_study(trials: int = None, concurrency: int = None):
+    """运行消融实验（各配置并发运行，参数含义见 AblationExperiment.run_all_experiments）"""
     experiment = AblationExperiment()
-    results = await experiment.run_all_experiments()
+    results = await experiment.run_all_experiments(trials, concurrency)
     
     print("\n" + "="*70)
     print("✨ 消融实验完成！")
@@ -555,6 +654,7 @@ async def run_ablation_study():
     print("  • ablation_results/ablation_complete_results.json (完整数据)")
     print("  • ablation_results/allocation_*.json (各配置分配方案)")
     print("  • ablation_results/evaluation_*.json (各配置评估结果)")
+    print("  • ablation_results/runs/<配置>/trial_<n>/ (每次运行的分配方案和评估)")
     
     return results
 
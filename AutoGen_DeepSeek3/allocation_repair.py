@@ -0,0 +1,115 @@
+"""
+LLM方案的本地修复与优化（混合流水线：LLM提出方案，本地求解器修复）
+仲裁智能体给出的 final_allocation 在保存前经过三步处理（方案来源记录在结果的 source_agent 字段）：
+1. 修复：剔除不存在、重复、能力不符的分配，每架无人机上的任务按开始时间重新排程（消除时间冲突和超窗）
+2. 补全：未分配的任务按优先级插入（见 IncrementalReplanner.fill_unassigned）
+3. 优化：以修复后的方案为初始解运行局部搜索，直到时间预算用完
+这样对话轮数可以压得更少，最终保存的仍是可行且经过局部优化的方案。
+"""
+
+import copy
+import time
+from typing import Dict, Tuple
+
+from baseline_algorithms import LocalSearchAlgorithm, ScheduleState, TaskAllocationProblem
+from evaluation_metrics import AllocationEvaluator
+from replanning import IncrementalReplanner
+
+
+DEFAULT_REPAIR_BUDGET_MS = 500
+
+
+def _assignment_map(allocation: Dict) -> Dict[str, Dict]:
+    assignments = allocation.get('final_allocation', allocation).get('assignments', [])
+    return {a.get('task_id'): a for a in assignments if isinstance(a, dict) and a.get('task_id')}
+
+
+def repair_allocation(allocation: Dict, problem: TaskAllocationProblem = None,
+                      time_budget_ms: float = DEFAULT_REPAIR_BUDGET_MS, seed: int = 42,
+                      source: str = None) -> Tuple[Dict, Dict]:
+    """
+    修复并优化分配方案
+
+    Args:
+        allocation: LLM给出的分配方案（标准格式），None 时从空方案开始（相当于完全由本地求解器生成）
+        problem: 任务分配场景（默认场景）
+        time_budget_ms: 整个修复阶段的时间预算（毫秒），修复和补全之后的剩余时间用于局部搜索
+        seed: 局部搜索随机种子
+        source: 给出该方案的智能体名称，记录在结果的 source_agent 字段和报告中
+
+    Returns:
+        (修复后的方案, 修复报告)
+    """
+    started = time.perf_counter()
+    if problem is None:
+        problem = TaskAllocationProblem.from_default_scenario()
+    if not isinstance(allocation, dict):
+        allocation, source = {'final_allocation': {'assignments': []}}, None
+    original = _assignment_map(allocation)
+    issues_before = AllocationEvaluator(allocation, problem).check_feasibility()
+    score_before = AllocationEvaluator(allocation, problem).evaluate_all()['overall_score']
+
+    # 修复 + 补全
+    replanner = IncrementalReplanner(problem, allocation)
+    replanner.fill_unassigned()
+    repaired = replanner.current_allocation()
+
+    # 局部搜索优化（剩余预算）
+    remaining_ms = time_budget_ms - (time.perf_counter() - started) * 1000
+    improved = repaired
+    if remaining_ms > 0:
+        # 剩余预算按整个修复阶段计算，重建初始状态的时间也计入
+        searched = LocalSearchAlgorithm(problem, seed=seed, include_seed_time=True).allocate(
+            remaining_ms, initial=repaired)
+        # 目标值相同的移动也会被接受，没有严格改进时保留修复结果，避免无谓地改动LLM方案
+        if (ScheduleState.from_allocation(problem, searched).objective()
+                > ScheduleState.from_allocation(problem, repaired).objective() + 1e-12):
+            improved = searched
+    solver = improved['final_allocation']
+
+    # 保留LLM方案的说明字段；无人机未变的分配沿用原分配理由
+    final = copy.deepcopy(allocation.get('final_allocation', {}))
+    assignments = []
+    changes = {'reassigned': [], 'retimed': [], 'added': [], 'dropped': []}
+    for a in solver['assignments']:
+        before = original.get(a['task_id'])
+        if before is None:
+            changes['added'].append(a['task_id'])
+        elif before.get('assigned_uav') != a['assigned_uav']:
+            changes['reassigned'].append(a['task_id'])
+        else:
+            if before.get('start_time') != a['start_time']:
+                changes['retimed'].append(a['task_id'])
+            if before.get('rationale'):
+                a = {**a, 'rationale': before['rationale']}
+        assignments.append(a)
+    assigned = {a['task_id'] for a in assignments}
+    changes['dropped'] = [task_id for task_id in original if task_id not in assigned]
+
+    final.update({
+        'total_tasks': solver['total_tasks'],
+        'total_uavs': solver['total_uavs'],
+        'assignments': assignments,
+        'unassigned_tasks': solver['unassigned_tasks'],
+        'total_completion_time': solver['total_completion_time'],
+        'algorithm': 'LLM+LocalRepair',
+        'source_agent': source if source is not None else 'LocalSolver',
+    })
+    final.setdefault('decision_time', solver['decision_time'])
+    final.setdefault('risk_assessment', solver['risk_assessment'])
+    result = {'final_allocation': final}
+
+    report = {
+        'source': final['source_agent'],
+        'issues_before': issues_before,
+        'issues_after': AllocationEvaluator(result, problem).check_feasibility(),
+        **changes,
+        'score_before': score_before,
+        'score_after': AllocationEvaluator(result, problem).evaluate_all()['overall_score'],
+        'search_notes': solver['notes'] if improved is not repaired else '局部搜索未找到更优方案',
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+    }
+    summary = (f"本地修复与局部搜索优化：改派{len(changes['reassigned'])}项，调整时间{len(changes['retimed'])}项，"
+               f"补充{len(changes['added'])}项，移除{len(changes['dropped'])}项")
+    final['notes'] = f"{final['notes']}；{summary}" if final.get('notes') else summary
+    return result, report
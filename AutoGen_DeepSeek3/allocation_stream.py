@@ -0,0 +1,165 @@
+"""
+分配方案JSON的流式提取
+按字符流做括号配平（跳过字符串内的括号和转义字符），边接收 run_stream 产生的文本片段边解析，
+包含 final_allocation 的JSON对象在其右括号到达的那一刻即被提取，无需等对话结束，也不会像
+贪婪正则那样在长对话上回溯或把JSON之后的文字一并截入。
+"""
+
+import json
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from autogen_agentchat.messages import BaseChatMessage, ModelClientStreamingChunkEvent
+
+
+_SPECIAL = re.compile(r'[{}"\\]')
+
+
+class AllocationStreamExtractor:
+    """
+    单条消息的流式提取器：feed() 逐段输入文本，返回本段中闭合的 final_allocation 对象；
+    一条消息结束时调用 end_message()
+    """
+
+    def __init__(self, key: str = 'final_allocation'):
+        """
+        Args:
+            key: 目标对象必须包含的顶层键（其值须为JSON对象）
+        """
+        self.key = key
+        self.found: List[Dict] = []
+        self._reset()
+
+    def _reset(self):
+        self._depth = 0
+        self._in_string = False
+        self._escaped_at = -1   # 被反斜杠转义的字符的绝对位置
+        self._offset = 0        # 之前各段的累计长度
+        self._parts: List[str] = []
+
+    def _scan(self, text: str, pos: int, emitted: List[Dict]) -> Optional[Tuple[str, int]]:
+        """
+        从 text[pos:] 继续扫描，闭合的目标对象追加到 emitted
+
+        Returns:
+            None 表示扫描完毕；括号配平但不是合法JSON（正文里的 "{" 与后面某个 "}" 凑成了一对）时，
+            状态已清空，返回 (text, pos) 表示从该 "{" 之后重新扫描
+        """
+        start = 0 if self._depth > 0 else -1  # 当前对象在本段中的起点
+        for match in _SPECIAL.finditer(text, pos):
+            char, i = match.group(), match.start()
+            position = self._offset + i
+            if self._depth == 0:
+                if char == '{':
+                    self._depth, start = 1, i
+                continue
+            if position == self._escaped_at:
+                continue
+            if char == '\\':
+                self._escaped_at = position + 1
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif self._in_string:
+                continue
+            elif char == '{':
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    continued = bool(self._parts)  # 对象是否始于之前的片段
+                    self._parts.append(text[start:i + 1])
+                    candidate, begin = ''.join(self._parts), start
+                    self._parts, start = [], -1
+                    if self.key not in candidate:
+                        continue
+                    try:
+                        obj = json.loads(candidate)
+                    except ValueError:
+                        self._in_string, self._escaped_at = False, -1
+                        if not continued:
+                            return text, begin + 1
+                        self._offset = 0  # 新文本，位置从0重新计数
+                        return candidate[1:] + text[i + 1:], 0
+                    # 键的值须为对象：{"final_allocation": "见上文"} 或 null 这类引用/占位不算方案
+                    if isinstance(obj, dict) and isinstance(obj.get(self.key), dict):
+                        self.found.append(obj)
+                        emitted.append(obj)
+        if self._depth > 0:
+            self._parts.append(text[start:])
+        self._offset += len(text)
+        return None
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """输入一段文本，返回其中闭合的目标对象（通常为空列表）"""
+        emitted = []
+        # 重新扫描只推进起点（循环而非递归），不会因正文中的孤立括号过多而超出递归深度
+        retry = (chunk, 0)
+        while retry is not None:
+            retry = self._scan(*retry, emitted)
+        return emitted
+
+    def end_message(self) -> List[Dict]:
+        """
+        消息结束：若仍有未闭合的对象（例如正文里出现了不配对的 "{"），
+        从该 "{" 之后重新扫描，避免一个孤立的括号吞掉后面真正的JSON
+        """
+        emitted = []
+        while self._depth > 0:
+            pending = ''.join(self._parts)[1:]
+            self._reset()
+            if self.key not in pending:
+                break
+            emitted.extend(self.feed(pending))
+        self._reset()
+        return emitted
+
+
+def extract_allocations(text: str, key: str = 'final_allocation') -> List[Dict]:
+    """提取一段完整文本中所有包含 key（值为对象）的JSON对象（按出现顺序）"""
+    if key not in text:
+        return []
+    extractor = AllocationStreamExtractor(key)
+    return extractor.feed(text) + extractor.end_message()
+
+
+class AllocationStreamWatcher:
+    """
+    旁路监听 run_stream：原样转发每个事件，同时按发言者分别提取分配方案，
+    每提取到一个方案立即调用 on_allocation(allocation, source)
+
+    用法：
+        watcher = AllocationStreamWatcher(on_allocation)
+        result = await Console(watcher.watch(team.run_stream(task=...)))
+    """
+
+    def __init__(self, on_allocation: Optional[Callable[[Dict, str], None]] = None):
+        self.on_allocation = on_allocation
+        self.allocations: List[Dict] = []
+        self._extractors: Dict[str, AllocationStreamExtractor] = {}
+        self._streaming = set()
+
+    @property
+    def first(self) -> Optional[Dict]:
+        """最先出现的方案"""
+        return self.allocations[0] if self.allocations else None
+
+    def _emit(self, allocations: List[Dict], source: str):
+        for allocation in allocations:
+            self.allocations.append(allocation)
+            if self.on_allocation is not None:
+                self.on_allocation(allocation, source)
+
+    async def watch(self, stream):
+        async for item in stream:
+            if isinstance(item, ModelClientStreamingChunkEvent):
+                extractor = self._extractors.setdefault(item.source, AllocationStreamExtractor())
+                self._emit(extractor.feed(item.content), item.source)
+                self._streaming.add(item.source)
+            elif isinstance(item, BaseChatMessage):
+                extractor = self._extractors.setdefault(item.source, AllocationStreamExtractor())
+                # 已按片段流式输入过的消息不再重复输入完整内容
+                if item.source not in self._streaming:
+                    self._emit(extractor.feed(item.to_text()), item.source)
+                self._emit(extractor.end_message(), item.source)
+                self._streaming.discard(item.source)
+            yield item
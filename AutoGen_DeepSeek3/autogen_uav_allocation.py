@@ -14,32 +14,30 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # AutoGen 框架导入
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.conditions import TextMentionTermination, MaxMessageTermination
 from autogen_agentchat.ui import Console
 
+from allocation_stream import AllocationStreamWatcher, extract_allocations
+from candidate_fanout import CandidateFanOutAgent
+from llm_client import create_model_client
+from solver_tools import conflict_detector_tools, create_solver_tools, solution_generator_tools
+from team_termination import FeasibleAllocationTermination
+
+
+# 只有仲裁智能体的方案算最终方案：方案生成智能体借助本地工具也能给出可行的 final_allocation，
+# 若对其消息也触发可行方案终止，冲突检测和仲裁智能体将永远轮不到发言
+FINAL_DECISION_AGENTS = ("Arbitrator",)
+# 每次协作都必须发言的审查/决策智能体
+REVIEW_AGENTS = ("ConflictDetector", "Arbitrator")
+
 def create_openai_model_client():
-    """创建 OpenAI 模型客户端"""
-    model_name = os.getenv("LLM_MODEL_ID", "gpt-4o")
-    
-    # 为非OpenAI标准模型提供模型信息
-    model_info = None
-    if model_name not in ["gpt-4o", "gpt-4o-mini", "gpt-4-turbo", "gpt-4", "gpt-3.5-turbo"]:
-        model_info = {
-            "family": "unknown",
-            "vision": False,
-            "function_calling": True,
-            "json_output": True,
-            "context_window": 32768,
-        }
-    
-    return OpenAIChatCompletionClient(
-        model=model_name,
-        api_key=os.getenv("LLM_API_KEY"),
+    """创建 OpenAI 模型客户端（LLM_CLIENT_MODE=record/replay 时录制或回放对话，见 llm_client.py）"""
+    return create_model_client(
+        model=os.getenv("LLM_MODEL_ID", "gpt-4o"),
         base_url=os.getenv("LLM_BASE_URL", "https://api.openai.com/v1"),
-        model_info=model_info
+        api_key=os.getenv("LLM_API_KEY"),
     )
 
 def create_task_analyzer(model_client):
@@ -103,8 +101,14 @@ def create_resource_evaluator(model_client):
         system_message=system_message,
     )
 
-def create_solution_generator(model_client):
-    """创建方案生成智能体"""
+def create_solution_generator(model_client, tools=None, candidates=1, problem=None):
+    """创建方案生成智能体
+    
+    Args:
+        tools: 本地求解工具（见 solver_tools.py）
+        candidates: 每轮并行生成的候选方案数，大于1时改用 CandidateFanOutAgent（见 candidate_fanout.py）
+        problem: 候选方案评分使用的任务场景
+    """
     system_message = """你是一位无人机任务分配方案专家，负责根据任务需求和资源情况生成分配方案。
 
 你的核心职责：
@@ -140,14 +144,43 @@ def create_solution_generator(model_client):
 
 方案生成完成后说"✅ 候选方案已生成，请冲突检测Agent检查问题"。"""
 
+    if candidates > 1:
+        # 并行生成模式：每个候选只需给出一个完整方案，由本地评估选出最优者
+        system_message += """
+
+本轮只需给出你认为最好的一个方案，并以 final_allocation JSON 格式（与仲裁Agent的输出格式相同）完整输出，
+JSON之外的说明尽量简短。"""
+        return CandidateFanOutAgent(
+            name="SolutionGenerator",
+            model_client=model_client,
+            system_message=system_message,
+            candidates=candidates,
+            problem=problem,
+        )
+
+    if tools:
+        system_message += """
+
+可用的本地工具（毫秒级返回，结果准确，不要再手工推算时间和冲突）：
+- greedy_allocation：生成满足能力匹配且无时间冲突的基线方案，请以它为起点调整
+- check_allocation：传入方案JSON，返回能力、时间冲突（含往返时间）和遗漏任务等问题
+- evaluate_allocation：传入方案JSON，返回各项指标和总分
+
+调整后的方案必须先用 check_allocation 校验，并以 final_allocation JSON 格式（与仲裁Agent的输出格式相同）给出，
+说明工具结果和你的取舍理由即可。"""
+
     return AssistantAgent(
         name="SolutionGenerator",
         model_client=model_client,
         system_message=system_message,
+        model_client_stream=True,  # 逐token输出，方案JSON闭合即可被提取
+        tools=tools,
+        reflect_on_tool_use=True if tools else None,
+        max_tool_iterations=3 if tools else 1,  # 生成基线、校验、评分
     )
 
-def create_conflict_detector(model_client):
-    """创建冲突检测智能体"""
+def create_conflict_detector(model_client, tools=None):
+    """创建冲突检测智能体（tools 为本地求解工具，见 solver_tools.py）"""
     system_message = """你是一位严谨的冲突检测专家，负责审查分配方案中的问题和潜在冲突。
 
 你的核心职责：
@@ -189,10 +222,19 @@ def create_conflict_detector(model_client):
 如果发现轻微问题，说"⚠️ 发现潜在风险，建议优化，但方案基本可行"。
 如果方案完全可行，说"✅ 冲突检测通过，请仲裁Agent进行最终决策"。"""
 
+    if tools:
+        system_message += """
+
+时间冲突、能力匹配和遗漏任务请调用本地工具 check_allocation（传入方案JSON）检查，不要手工推算；
+需要比较方案优劣时调用 evaluate_allocation。你只需基于工具结果判断，并补充检查工具未覆盖的空间冲突、禁飞区等问题。"""
+
     return AssistantAgent(
         name="ConflictDetector",
         model_client=model_client,
         system_message=system_message,
+        tools=tools,
+        reflect_on_tool_use=True if tools else None,
+        max_tool_iterations=2 if tools else 1,
     )
 
 def create_arbitrator(model_client):
@@ -252,13 +294,22 @@ def create_arbitrator(model_client):
         name="Arbitrator",
         model_client=model_client,
         system_message=system_message,
+        model_client_stream=True,  # 逐token输出，方案JSON闭合即可被提取
     )
 
-async def run_uav_allocation_team(task_input: str = None):
+async def run_uav_allocation_team(task_input: str = None, problem=None, on_allocation=None, max_messages: int = 20,
+                                  candidates: int = None):
     """运行无人机任务分配团队协作
     
     Args:
         task_input: 任务描述字符串，如果为None则使用默认示例
+        problem: 与任务描述对应的结构化场景（TaskAllocationProblem），用于本地校验方案；
+                 使用默认示例时自动取默认场景，自定义任务且未提供时不做本地校验
+        on_allocation: 回调 on_allocation(allocation, source)，对话中每出现一个完整的 final_allocation
+                       JSON（右括号到达时）即调用，可在对话结束前启动下游评估
+        max_messages: 对话消息数上限（混合流水线中由本地修复兜底，可以设得更小）
+        candidates: 方案生成智能体每轮并行生成的候选数，默认取 SOLUTION_CANDIDATES（1 表示不启用）；
+                    需要结构化场景用于评分
     """
     
     print("=" * 70)
@@ -271,22 +322,38 @@ async def run_uav_allocation_team(task_input: str = None):
     
     print("👥 正在创建智能体团队...")
     
+    if problem is None and task_input is None:
+        from baseline_algorithms import TaskAllocationProblem
+        problem = TaskAllocationProblem.from_default_scenario()
+    
+    # 有结构化场景时，方案生成和冲突检测智能体可调用本地求解工具
+    tools = create_solver_tools(problem) if problem is not None else None
+    
     # 创建五个智能体
     task_analyzer = create_task_analyzer(model_client)
     resource_evaluator = create_resource_evaluator(model_client)
-    solution_generator = create_solution_generator(model_client)
-    conflict_detector = create_conflict_detector(model_client)
+    if candidates is None:
+        candidates = int(os.getenv("SOLUTION_CANDIDATES", 1))
+    if problem is None:
+        candidates = 1
+    solution_generator = create_solution_generator(model_client, solution_generator_tools(tools) if tools else None,
+                                                   candidates=candidates, problem=problem)
+    conflict_detector = create_conflict_detector(model_client, conflict_detector_tools(tools) if tools else None)
     arbitrator = create_arbitrator(model_client)
     
     print("   ✓ TaskAnalyzer（任务分析Agent）")
     print("   ✓ ResourceEvaluator（资源评估Agent）")
-    print("   ✓ SolutionGenerator（方案生成Agent）")
+    print("   ✓ SolutionGenerator（方案生成Agent）" + (f"：每轮并行生成{candidates}个候选方案" if candidates > 1 else ""))
     print("   ✓ ConflictDetector（冲突检测Agent）")
     print("   ✓ Arbitrator（仲裁Agent）")
+    if tools:
+        print(f"   ✓ 本地求解工具: {', '.join(tools)}")
     print()
     
-    # 组合终止条件：达到最大轮数或出现TERMINATE关键词
-    termination = MaxMessageTermination(20) | TextMentionTermination("TERMINATE")
+    # 组合终止条件：达到最大轮数、出现TERMINATE关键词，或仲裁智能体给出通过本地校验的可行方案
+    termination = MaxMessageTermination(max_messages) | TextMentionTermination("TERMINATE")
+    if problem is not None:
+        termination = termination | FeasibleAllocationTermination(problem, sources=FINAL_DECISION_AGENTS)
     
     # 创建团队聊天 - 轮询模式
     team_chat = RoundRobinGroupChat(
@@ -335,39 +402,78 @@ async def run_uav_allocation_team(task_input: str = None):
     print("=" * 70)
     print()
     
-    # 执行团队协作
-    result = await Console(team_chat.run_stream(task=task_input))
+    # 执行团队协作（旁路提取对话流中的分配方案）
+    watcher = AllocationStreamWatcher(on_allocation)
+    result = await Console(watcher.watch(team_chat.run_stream(task=task_input)))
     
     print()
     print("=" * 70)
     print("✅ 团队协作完成！")
     print("=" * 70)
     
+    skipped = [name for name in REVIEW_AGENTS if name not in {m.source for m in result.messages}]
+    if skipped:
+        print(f"⚠️ 对话在 {', '.join(skipped)} 发言前已结束（{result.stop_reason}），方案未经完整审查")
+    
     return result
 
-def extract_json_from_result(result):
-    """从协作结果中提取JSON分配方案"""
+def extract_allocation_with_source(result, preferred=FINAL_DECISION_AGENTS):
+    """从协作结果中提取JSON分配方案及给出该方案的智能体
+    
+    优先取 preferred 中的智能体（仲裁Agent）最后给出的方案；它们没有给出方案时
+    （例如对话在仲裁前达到消息上限），退回到任意智能体最后给出的方案。
+    
+    Returns:
+        (方案, 智能体名称)，没有方案时为 (None, None)
+    """
     try:
-        # 遍历所有消息，查找JSON内容
-        for message in result.messages:
+        fallback = (None, None)
+        # 从后往前查找：最后给出的方案是最终方案（可行方案终止条件触发时即为通过校验的方案）
+        for message in reversed(result.messages):
             content = message.content
-            if "final_allocation" in content:
-                # 尝试提取JSON
-                import re
-                json_match = re.search(r'\{[\s\S]*"final_allocation"[\s\S]*\}', content)
-                if json_match:
-                    json_str = json_match.group(0)
-                    allocation = json.loads(json_str)
-                    return allocation
-        return None
+            if isinstance(content, str) and "final_allocation" in content:
+                # 括号配平提取，同一条消息中有多个方案时取最后一个
+                allocations = extract_allocations(content)
+                if not allocations:
+                    continue
+                if message.source in preferred:
+                    return allocations[-1], message.source
+                if fallback[0] is None:
+                    fallback = (allocations[-1], message.source)
+        return fallback
     except Exception as e:
         print(f"⚠️ JSON提取失败: {e}")
-        return None
+        return None, None
 
-def save_allocation_result(result, output_file="output_allocation.json"):
-    """保存分配结果到JSON文件"""
+def extract_json_from_result(result):
+    """从协作结果中提取JSON分配方案（见 extract_allocation_with_source）"""
+    return extract_allocation_with_source(result)[0]
+
+def save_allocation_result(result, output_file="output_allocation.json", repair=False, problem=None,
+                           repair_budget_ms=None):
+    """保存分配结果到JSON文件
+    
+    Args:
+        repair: 保存前先经本地修复与局部搜索优化（混合流水线，见 allocation_repair.py）；
+                对话中没有给出方案时由本地求解器直接生成
+        problem: 修复使用的任务场景（默认场景）
+        repair_budget_ms: 修复阶段的时间预算（毫秒），默认取 REPAIR_BUDGET_MS
+    """
     try:
-        allocation = extract_json_from_result(result)
+        allocation, source = extract_allocation_with_source(result)
+        if repair:
+            from allocation_repair import DEFAULT_REPAIR_BUDGET_MS, repair_allocation
+            
+            if repair_budget_ms is None:
+                repair_budget_ms = float(os.getenv("REPAIR_BUDGET_MS", DEFAULT_REPAIR_BUDGET_MS))
+            if source is not None and source not in FINAL_DECISION_AGENTS:
+                print(f"\n⚠️ 仲裁Agent未给出方案，修复 {source} 给出的方案")
+            allocation, report = repair_allocation(allocation, problem, repair_budget_ms, source=source)
+            print(f"\n🔧 本地修复完成（{report['elapsed_ms']:.0f}ms，方案来源 {report['source']}）："
+                  f"修复前问题 {len(report['issues_before'])} 项，修复后 {len(report['issues_after'])} 项")
+            print(f"   • 改派 {report['reassigned']}，调整时间 {report['retimed']}，"
+                  f"补充 {report['added']}，移除 {report['dropped']}")
+            print(f"   • 评分 {report['score_before']} -> {report['score_after']}（{report['search_notes']}）")
         if allocation:
             with open(output_file, "w", encoding="utf-8") as f:
                 json.dump(allocation, f, ensure_ascii=False, indent=2)
@@ -387,8 +493,12 @@ def save_allocation_result(result, output_file="output_allocation.json"):
         print(f"\n❌ 保存失败: {e}")
         return False, None
 
-def evaluate_and_visualize(allocation, output_file="output_allocation.json"):
-    """评估分配方案并生成可视化"""
+def evaluate_and_visualize(allocation, output_file="output_allocation.json", metrics=None, problem=None):
+    """评估分配方案并生成可视化（metrics 为对话过程中已提前算好的评估结果时直接使用）
+    
+    Args:
+        problem: 方案对应的任务场景（TaskAllocationProblem），应与协作时使用的场景相同（默认场景）
+    """
     try:
         print("\n" + "=" * 70)
         print("📊 开始评估分配方案...")
@@ -398,8 +508,9 @@ def evaluate_and_visualize(allocation, output_file="output_allocation.json"):
         from evaluation_metrics import AllocationEvaluator
         
         # 创建评估器并评估
-        evaluator = AllocationEvaluator(allocation)
-        metrics = evaluator.evaluate_all()
+        evaluator = AllocationEvaluator(allocation, problem)
+        if metrics is None:
+            metrics = evaluator.evaluate_all()
         
         # 生成评估报告
         report = evaluator.generate_report(metrics)
@@ -444,8 +555,32 @@ if __name__ == "__main__":
         print("╚══════════════════════════════════════════════════════════════════╝")
         print()
         
+        # 对话中每出现一个方案就在后台线程开始评估，对话结束后直接取用最终方案的评估结果
+        from concurrent.futures import ThreadPoolExecutor
+        from baseline_algorithms import TaskAllocationProblem
+        from evaluation_metrics import AllocationEvaluator
+        
+        # 协作、提前评估、修复和最终评估使用同一个结构化场景
+        problem = TaskAllocationProblem.from_default_scenario()
+        compiled = problem.compile()
+        executor = ThreadPoolExecutor(max_workers=2)
+        early_metrics = {}
+        
+        def start_evaluation(allocation, source):
+            key = json.dumps(allocation, sort_keys=True, ensure_ascii=False)
+            if key not in early_metrics:
+                print(f"\n⚡ 收到 {source} 的分配方案，后台开始评估")
+                early_metrics[key] = executor.submit(lambda: AllocationEvaluator(allocation, compiled).evaluate_all())
+        
+        # 流水线模式：llm（默认）由智能体给出最终方案；hybrid 限制对话轮数，方案保存前经本地修复和优化
+        pipeline = os.getenv("ALLOCATION_PIPELINE", "llm").strip().lower()
+        hybrid = pipeline == "hybrid"
+        max_messages = int(os.getenv("HYBRID_MAX_MESSAGES", 6)) if hybrid else 20
+        print(f"🔀 流水线模式: {pipeline}（对话消息上限 {max_messages}）")
+        
         # 运行异步协作流程
-        result = asyncio.run(run_uav_allocation_team())
+        result = asyncio.run(run_uav_allocation_team(problem=problem, on_allocation=start_evaluation,
+                                                    max_messages=max_messages))
         
         print()
         print("📊 协作统计：")
@@ -454,11 +589,19 @@ if __name__ == "__main__":
         print(f"   • 任务状态: 协作完成")
         
         # 保存结果
-        success, allocation = save_allocation_result(result)
+        success, allocation = save_allocation_result(result, repair=hybrid, problem=problem)
         
         # 如果成功保存，进行评估和可视化
         if success and allocation:
-            evaluate_and_visualize(allocation)
+            future = early_metrics.get(json.dumps(allocation, sort_keys=True, ensure_ascii=False))
+            metrics = None
+            if future is not None:
+                try:
+                    metrics = future.result()
+                except Exception as e:
+                    print(f"⚠️ 提前评估失败，重新评估: {e}")
+            evaluate_and_visualize(allocation, metrics=metrics, problem=problem)
+        executor.shutdown(wait=False)
         
         print()
         print("✨ 系统运行完成！")
@@ -1,16 +1,322 @@
 """
 传统任务分配基线算法
-包含：贪心算法、遗传算法、整数规划、随机分配
+包含：贪心算法、遗传算法、整数规划、随机分配、局部搜索
 """
 
+import bisect
 import json
+import math
 import random
+import re
+import time
 import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple
 import copy
 
 
+PRIORITY_CODES = {'紧急': 4, '高': 3, '中': 2, '低': 1}
+BASE_TIME_MIN = 8 * 60  # 所有无人机的初始可用时间 08:00（分钟）
+
+_clock_cache = {}
+
+
+def parse_clock(time_str: str, default: int = BASE_TIME_MIN) -> int:
+    """将 "HH:MM" 解析为当天分钟数（按字符串缓存），无法解析时返回default"""
+    cached = _clock_cache.get(time_str)
+    if cached is not None:
+        return cached
+    try:
+        t = datetime.strptime(time_str, '%H:%M')
+        minutes = t.hour * 60 + t.minute
+    except (TypeError, ValueError):
+        return default
+    _clock_cache[time_str] = minutes
+    return minutes
+
+
+class CompiledProblem:
+    """
+    任务分配问题的编译形式（结构体数组）
+    
+    任务和无人机的数值属性各存为一列NumPy数组，时间统一为整数分钟，
+    优先级和类型字符串驻留为整数编码，所有求解器共享同一份编译结果，
+    不再重复解析字典和时间字符串。
+    
+    可行性（任务×无人机）按"无人机能力类别"因子化计算：属性完全相同的无人机
+    归为一类，先算 任务×类别 矩阵，再按需展开为稠密矩阵、位图或按行模式去重的
+    稀疏列表，避免大机队下 T×U 矩阵撑爆内存。
+    """
+    
+    RETURN_TRIP_MIN = 15       # 往返时间（分钟）
+    LONG_ENDURANCE_MIN = 100   # "长续航"要求的最小续航（分钟）
+    HIGH_SPEED_KMH = 70        # "高速"要求的最小速度（km/h）
+    
+    def __init__(self, problem: 'TaskAllocationProblem'):
+        self._compile_uavs(problem.uavs)
+        self._compile_tasks(problem, problem.tasks)
+    
+    def derive(self, problem: 'TaskAllocationProblem', tasks: List[Dict]) -> 'CompiledProblem':
+        """
+        为一组（新增或修改过的）任务构建编译问题，复用本实例的无人机列与能力类别
+        
+        不再遍历机队，代价只与新任务数和能力类别数有关，供增量重规划使用。
+        """
+        derived = object.__new__(CompiledProblem)
+        for name in self._UAV_FIELDS:
+            setattr(derived, name, getattr(self, name))
+        derived._compile_tasks(problem, tasks)
+        return derived
+    
+    _UAV_FIELDS = ('uav_ids', 'uav_index', 'uav_speed', 'uav_endurance', 'uav_payload', 'uav_battery',
+                   'uav_type_names', 'uav_type', 'uav_available', 'uav_class', 'class_representative',
+                   'class_members', 'class_sensors')
+    
+    def _compile_uavs(self, uavs: List[Dict]):
+        """无人机列与能力类别"""
+        self.uav_ids = [u['uav_id'] for u in uavs]
+        self.uav_index = {uav_id: i for i, uav_id in enumerate(self.uav_ids)}
+        self.uav_speed = np.array([u.get('max_speed', 0) for u in uavs], dtype=np.float32)
+        self.uav_endurance = np.array([u.get('max_flight_time', 0) for u in uavs], dtype=np.float32)
+        self.uav_payload = np.array([u.get('max_payload', 0) for u in uavs], dtype=np.float32)
+        self.uav_battery = np.array([u.get('battery', 100) for u in uavs], dtype=np.float32)
+        self.uav_type_names, self.uav_type = self._intern([u.get('type', '') for u in uavs])
+        self.uav_available = np.array(
+            [u.get('availability', '可用') == '可用' for u in uavs], dtype=bool)
+        
+        # 无人机能力类别：影响可行性的属性完全相同者归为一类
+        signatures = {}
+        uav_class = []
+        for i, uav in enumerate(uavs):
+            signature = (float(self.uav_payload[i]), float(self.uav_speed[i]),
+                         float(self.uav_endurance[i]), float(self.uav_battery[i]),
+                         bool(self.uav_available[i]), frozenset(uav.get('sensors', ())))
+            uav_class.append(signatures.setdefault(signature, len(signatures)))
+        self.uav_class = np.array(uav_class, dtype=np.int32)
+        self.class_representative = np.full(len(signatures), -1, dtype=np.int64)
+        self.class_representative[self.uav_class[::-1]] = np.arange(len(uavs))[::-1]
+        self.class_members = [np.nonzero(self.uav_class == c)[0] for c in range(len(signatures))]
+        self.class_sensors = [sig[5] for sig in signatures]
+    
+    def _compile_tasks(self, problem: 'TaskAllocationProblem', tasks: List[Dict]):
+        """任务列、禁飞时段与能力需求（需先有无人机能力类别）"""
+        self.task_ids = [t['task_id'] for t in tasks]
+        self.task_index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        self.window_start = np.array(
+            [parse_clock(t.get('time_window', {}).get('start', '08:00')) for t in tasks], dtype=np.int32)
+        self.window_end = np.array(
+            [parse_clock(t.get('time_window', {}).get('end', '12:00')) for t in tasks], dtype=np.int32)
+        self.duration = np.array([t.get('estimated_duration', 30) for t in tasks], dtype=np.int32)
+        self.payload = np.array([t.get('payload', 0) for t in tasks], dtype=np.float32)
+        self.priority = np.array(
+            [PRIORITY_CODES.get(t.get('priority', '低'), 0) for t in tasks], dtype=np.int8)
+        self.task_type_names, self.task_type = self._intern([t.get('type', '') for t in tasks])
+        
+        # 每个任务的禁飞时段（CSR格式：no_fly_ptr[i]:no_fly_ptr[i+1] 为任务i的窗口）
+        counts, starts, ends = [], [], []
+        for task in tasks:
+            windows = problem.task_no_fly_windows(task)
+            counts.append(len(windows))
+            for w in windows:
+                starts.append(parse_clock(w.get('start', '00:00')))
+                ends.append(parse_clock(w.get('end', '00:00')))
+        self.no_fly_ptr = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        self.no_fly_start = np.array(starts, dtype=np.int32)
+        self.no_fly_end = np.array(ends, dtype=np.int32)
+        
+        # 任务能力需求（required_capabilities）：载重/长续航/高速 + 传感器关键词
+        self.required_payload = self.payload.copy()
+        self.needs_long_endurance = np.zeros(len(tasks), dtype=bool)
+        self.needs_high_speed = np.zeros(len(tasks), dtype=bool)
+        keywords = {}
+        keyword_rows, keyword_cols = [], []
+        for i, task in enumerate(tasks):
+            for req in task.get('required_capabilities', []):
+                match = re.fullmatch(r'载重\s*>=?\s*([\d.]+)\s*kg', req.strip())
+                if match:
+                    self.required_payload[i] = max(self.required_payload[i], float(match.group(1)))
+                elif req == '长续航':
+                    self.needs_long_endurance[i] = True
+                elif req == '高速':
+                    self.needs_high_speed[i] = True
+                else:
+                    keyword_rows.append(i)
+                    keyword_cols.append(keywords.setdefault(req, len(keywords)))
+        self.sensor_keywords = list(keywords)
+        self.task_keywords = np.zeros((len(tasks), len(keywords)), dtype=bool)
+        self.task_keywords[keyword_rows, keyword_cols] = True
+        self.class_has_keyword = np.array(
+            [[any(k in s for s in sensors) for k in self.sensor_keywords] for sensors in self.class_sensors],
+            dtype=bool).reshape(len(self.class_sensors), len(self.sensor_keywords))
+        
+        self._class_feasibility = None
+        self._groups = None
+        self._patterns = None
+        self._dense = None
+        self._bits = None
+    
+    @staticmethod
+    def _intern(values: List[str]) -> Tuple[List[str], np.ndarray]:
+        """把字符串列驻留为 (名称表, int16编码数组)"""
+        names = {}
+        codes = np.fromiter((names.setdefault(v, len(names)) for v in values),
+                            dtype=np.int16, count=len(values))
+        return list(names), codes
+    
+    @property
+    def n_tasks(self) -> int:
+        return len(self.task_ids)
+    
+    @property
+    def n_uavs(self) -> int:
+        return len(self.uav_ids)
+    
+    def task_type_code(self, name: str) -> int:
+        """返回任务类型编码，不存在时返回 -1"""
+        try:
+            return self.task_type_names.index(name)
+        except ValueError:
+            return -1
+    
+    @property
+    def n_classes(self) -> int:
+        return len(self.class_representative)
+    
+    def window_reachable(self) -> np.ndarray:
+        """任务是否能在自身时间窗口内完成（最早于08:00开始，含往返）"""
+        release = np.maximum(self.window_start, BASE_TIME_MIN)
+        return release + self.duration + self.RETURN_TRIP_MIN <= self.window_end
+    
+    def class_feasibility(self) -> np.ndarray:
+        """
+        任务×能力类别 可行性矩阵（广播计算，结果缓存）
+        
+        规则：载重满足；运输任务需要有载重能力；required_capabilities
+        （载重>=Xkg、长续航、高速、传感器关键词）满足；单次任务（含往返）
+        不超过按电量折算的续航；无人机可用；任务在时间窗口内可达。
+        """
+        if self._class_feasibility is None:
+            rep = self.class_representative
+            payload = self.uav_payload[rep][None, :]
+            endurance = self.uav_endurance[rep]
+            usable_endurance = np.where(endurance > 0, endurance * self.uav_battery[rep] / 100, np.inf)
+            
+            feasible = self.required_payload[:, None] <= payload
+            transport = self.task_type_code('运输')
+            if transport >= 0:
+                feasible &= ~((self.task_type == transport)[:, None] & (payload == 0))
+            feasible &= ~(self.needs_long_endurance[:, None] &
+                          (endurance < self.LONG_ENDURANCE_MIN)[None, :])
+            feasible &= ~(self.needs_high_speed[:, None] &
+                          (self.uav_speed[rep] < self.HIGH_SPEED_KMH)[None, :])
+            if self.sensor_keywords:
+                missing = self.task_keywords.astype(np.int32) @ (~self.class_has_keyword).T.astype(np.int32)
+                feasible &= missing == 0
+            feasible &= (self.duration + self.RETURN_TRIP_MIN)[:, None] <= usable_endurance[None, :]
+            feasible &= self.uav_available[rep][None, :]
+            feasible &= self.window_reachable()[:, None]
+            self._class_feasibility = feasible
+        return self._class_feasibility
+    
+    def feasibility_groups(self) -> Tuple[np.ndarray, List[np.ndarray], np.ndarray]:
+        """
+        可行性分组：对 任务×类别 矩阵的列去重，可行性列完全相同的能力类别合并为一组
+        
+        能力类别按无人机的原始属性（载重、速度、续航、电量、传感器列表）划分，生成的大机队上
+        有数十个类别，但对当前任务集而言其中许多类别的可行性完全相同；求解器按组而不是按类别
+        遍历，每个任务要查询的桶数随之减少。类别本身保持不变（新增任务可能区分开同组的类别，
+        见 derive()）。
+        
+        Returns:
+            (uav_group[U], group_members[G]（各组无人机索引，升序）, group_feasibility[T×G])
+        """
+        if self._groups is None:
+            feasible = self.class_feasibility()
+            if feasible.shape[1]:
+                group_feasibility, class_group = np.unique(feasible, axis=1, return_inverse=True)
+                class_group = class_group.reshape(-1)
+            else:
+                group_feasibility, class_group = feasible, np.zeros(0, dtype=np.int64)
+            uav_group = class_group[self.uav_class].astype(np.int32) if self.n_uavs else \
+                np.zeros(0, dtype=np.int32)
+            order = np.argsort(uav_group, kind='stable')
+            bounds = np.searchsorted(uav_group[order], np.arange(group_feasibility.shape[1] + 1))
+            group_members = [order[bounds[g]:bounds[g + 1]] for g in range(group_feasibility.shape[1])]
+            self._groups = (uav_group, group_members, group_feasibility)
+        return self._groups
+    
+    def feasibility_patterns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        稀疏形式：对可行性行去重，每种行模式只存一份可行无人机列表
+        
+        Returns:
+            (task_pattern[T], pattern_groups[P×G], pattern_ptr[P+1], pattern_uavs)
+            任务t的可行无人机为 pattern_uavs[pattern_ptr[p]:pattern_ptr[p+1]]（升序），p=task_pattern[t]；
+            pattern_groups 的列为 feasibility_groups() 的可行性分组
+        """
+        if self._patterns is None:
+            _, group_members, feasible = self.feasibility_groups()
+            if feasible.shape[0]:
+                pattern_groups, task_pattern = np.unique(feasible, axis=0, return_inverse=True)
+            else:
+                pattern_groups = np.zeros((0, feasible.shape[1]), dtype=bool)
+                task_pattern = np.zeros(0, dtype=np.int64)
+            members = [
+                np.sort(np.concatenate([group_members[g] for g in np.nonzero(row)[0]]
+                                       or [np.zeros(0, dtype=np.int64)]))
+                for row in pattern_groups
+            ]
+            sizes = [len(m) for m in members]
+            pattern_ptr = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+            pattern_uavs = np.concatenate(members) if members else np.zeros(0, dtype=np.int64)
+            self._patterns = (task_pattern.reshape(-1).astype(np.int32), pattern_groups,
+                              pattern_ptr, pattern_uavs.astype(np.int64))
+        return self._patterns
+    
+    def feasible_uavs(self, task_row: int) -> np.ndarray:
+        """返回任务可行的无人机索引（升序）"""
+        task_pattern, _, pattern_ptr, pattern_uavs = self.feasibility_patterns()
+        p = task_pattern[task_row]
+        return pattern_uavs[pattern_ptr[p]:pattern_ptr[p + 1]]
+    
+    def feasibility(self, packed: bool = False, chunk_rows: int = 4096) -> np.ndarray:
+        """
+        任务×无人机 可行性矩阵（结果缓存）
+        
+        Args:
+            packed: True 时返回按行打包的位图（uint8，T × ceil(U/8)），内存为稠密矩阵的1/8，
+                    按 chunk_rows 分块构建，峰值内存不随任务数增长
+        """
+        class_feasible = self.class_feasibility()
+        if not packed:
+            if self._dense is None:
+                self._dense = class_feasible[:, self.uav_class]
+            return self._dense
+        if self._bits is None:
+            n_bytes = (self.n_uavs + 7) // 8
+            bits = np.empty((self.n_tasks, n_bytes), dtype=np.uint8)
+            for lo in range(0, self.n_tasks, chunk_rows):
+                hi = min(lo + chunk_rows, self.n_tasks)
+                bits[lo:hi] = np.packbits(class_feasible[lo:hi][:, self.uav_class], axis=1)
+            self._bits = bits
+        return self._bits
+    
+    def is_feasible(self, task_row: int, uav_row: int) -> bool:
+        """单个 (任务, 无人机) 组合是否可行"""
+        return bool(self.class_feasibility()[task_row, self.uav_class[uav_row]])
+    
+    def nbytes(self) -> int:
+        """数值数组占用的字节数（不含ID字符串）"""
+        return sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+    
+    def __getstate__(self):
+        """序列化（如发送到进程池）时不携带可重建的稠密矩阵和位图视图"""
+        state = vars(self).copy()
+        state['_dense'] = None
+        state['_bits'] = None
+        return state
+
+
 class TaskAllocationProblem:
     """任务分配问题定义"""
     
@@ -18,7 +324,19 @@ class TaskAllocationProblem:
         self.tasks = tasks
         self.uavs = uavs
         self.constraints = constraints
+        self._compiled = None
         
+    def compile(self, refresh: bool = False) -> CompiledProblem:
+        """
+        构建（并缓存）结构体数组形式的编译问题
+        
+        Args:
+            refresh: 修改了tasks/uavs/constraints后需置为True重新编译
+        """
+        if self._compiled is None or refresh:
+            self._compiled = CompiledProblem(self)
+        return self._compiled
+    
     @classmethod
     def from_default_scenario(cls):
         """从默认场景创建问题实例"""
@@ -59,6 +377,297 @@ class TaskAllocationProblem:
         ]
         
         return cls(tasks, uavs, constraints)
+    
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """
+        从 uav_task_example.json 格式的字典创建问题实例
+        
+        字段映射：estimated_duration_min→estimated_duration，payload_kg→payload，
+        task_type→type；无人机的 capabilities/current_status 展平为
+        max_flight_time、max_speed、max_payload、sensors、location、battery、availability。
+        """
+        tasks = []
+        for t in data.get('tasks', []):
+            task = {k: v for k, v in t.items()
+                    if k not in ('estimated_duration_min', 'payload_kg', 'task_type')}
+            task['type'] = t.get('task_type', t.get('type', ''))
+            task['estimated_duration'] = t.get('estimated_duration_min', t.get('estimated_duration', 30))
+            if 'payload_kg' in t or 'payload' in t:
+                task['payload'] = t.get('payload_kg', t.get('payload', 0))
+            tasks.append(task)
+        
+        uavs = []
+        for u in data.get('available_uavs', data.get('uavs', [])):
+            capabilities = u.get('capabilities', {})
+            status = u.get('current_status', {})
+            uavs.append({
+                'uav_id': u['uav_id'],
+                'type': u.get('type', ''),
+                'max_flight_time': capabilities.get('max_flight_time', u.get('max_flight_time', 0)),
+                'max_speed': capabilities.get('max_speed_kmh', u.get('max_speed', 0)),
+                'max_payload': capabilities.get('max_payload_kg', u.get('max_payload', 0)),
+                'sensors': capabilities.get('sensors', u.get('sensors', [])),
+                'battery': status.get('battery_percent', u.get('battery', 100)),
+                'location': status.get('location', u.get('location', '')),
+                'availability': status.get('availability', u.get('availability', '可用')),
+            })
+        
+        return cls(tasks, uavs, data.get('constraints', []))
+    
+    @classmethod
+    def from_json_file(cls, json_file: str):
+        """从 uav_task_example.json 格式的文件创建问题实例"""
+        with open(json_file, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+    
+    def task_no_fly_windows(self, task: Dict) -> List[Dict]:
+        """返回与任务作业/起降地点同名的禁飞区时间窗口列表"""
+        places = {task.get(key) for key in ('location', 'from_location', 'to_location')} - {None}
+        return [
+            c['time_window'] for c in self.constraints
+            if c.get('type') == '禁飞区' and c.get('location') in places and 'time_window' in c
+        ]
+
+    def to_task_input(self) -> Dict:
+        """转换为 AllocationEvaluator 使用的任务输入格式"""
+        return {
+            'total_tasks': len(self.tasks),
+            'total_uavs': len(self.uavs),
+            'tasks': self.tasks,
+            'uavs': self.uavs,
+        }
+
+
+class EarliestAvailableTree:
+    """
+    最早可用时间锦标赛树（数组式堆布局的最小值线段树）
+    
+    叶子按无人机在问题中的原始顺序排列，内部节点保存子树最小可用时间，
+    支持 O(log U) 查询"最靠前的可用时间 <= 阈值的无人机"和单点更新。
+    """
+    
+    def __init__(self, uav_indices: List[int], initial_time: float):
+        self.uav_indices = uav_indices
+        self.position = {uav: i for i, uav in enumerate(uav_indices)}
+        self.size = 1
+        while self.size < len(uav_indices):
+            self.size *= 2
+        self.tree = [float('inf')] * (2 * self.size)
+        for i in range(len(uav_indices)):
+            self.tree[self.size + i] = initial_time
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = min(self.tree[2 * node], self.tree[2 * node + 1])
+    
+    def leftmost_at_most(self, threshold: float) -> int:
+        """返回可用时间 <= threshold 的最靠前叶子位置，不存在时返回 -1"""
+        tree = self.tree
+        if tree[1] > threshold:
+            return -1
+        node = 1
+        while node < self.size:
+            node *= 2
+            if tree[node] > threshold:
+                node += 1
+        return node - self.size
+    
+    def earliest(self, ready_time: float) -> Tuple[float, int]:
+        """返回 (最早开始时间, 无人机索引)：优先取已空闲中最靠前的，否则取最早可用者"""
+        pos = self.leftmost_at_most(ready_time)
+        if pos >= 0:
+            return ready_time, self.uav_indices[pos]
+        available = self.tree[1]
+        return available, self.uav_indices[self.leftmost_at_most(available)]
+    
+    def update(self, uav_index: int, available: float):
+        """更新某架无人机的可用时间"""
+        tree = self.tree
+        node = self.size + self.position[uav_index]
+        tree[node] = available
+        node //= 2
+        while node:
+            value = min(tree[2 * node], tree[2 * node + 1])
+            if tree[node] == value:
+                break
+            tree[node] = value
+            node //= 2
+
+
+class ScheduleState:
+    """
+    可增量修改的排程状态：每架无人机一个有序任务序列
+
+    序列中任务依次执行，开始时间 = max(上一任务结束, 窗口开始)，结束时间含往返，
+    所有任务必须在窗口内完成。修改某架无人机的序列时只从改动位置起重算该序列，
+    一旦重算出的结束时间与原来相同且其后序列未变，就提前停止——
+    因此一次移动的代价只与受影响的序列片段长度有关，而不是整个方案。
+
+    目标值 = 已分配任务的优先级权重和 - END_PENALTY × 结束时间之和（分钟，相对08:00），
+    即先比较完成任务的加权数量，同等情况下任务结束越早越好。
+    """
+
+    END_PENALTY = 1e-4  # 每分钟结束时间折算的权重
+
+    def __init__(self, problem: TaskAllocationProblem):
+        self.problem = problem
+        compiled = problem.compile()
+        self.compiled = compiled
+        self.ws = compiled.window_start.tolist()
+        self.we = compiled.window_end.tolist()
+        self.dur = (compiled.duration + CompiledProblem.RETURN_TRIP_MIN).tolist()
+        self.weight = compiled.priority.astype(float).tolist()
+        self.base = BASE_TIME_MIN
+
+        self.sequences = [[] for _ in range(compiled.n_uavs)]
+        self.uav_of = [-1] * compiled.n_tasks   # 任务所在无人机，-1为未分配
+        self.end_of = [0] * compiled.n_tasks    # 已分配任务的结束时间
+        self.unassigned = list(range(compiled.n_tasks))
+        self._pool_pos = {t: i for i, t in enumerate(self.unassigned)}
+        self.weight_total = 0.0
+        self.end_total = 0.0
+
+    @classmethod
+    def from_allocation(cls, problem: TaskAllocationProblem, allocation: Dict) -> 'ScheduleState':
+        """
+        由标准格式的分配结果构建状态
+
+        每架无人机上的任务按开始时间排序后按规则重新排程，
+        能力不符、重复或超窗的任务放回未分配池。
+        """
+        state = cls(problem)
+        compiled = state.compiled
+        allocation = allocation.get('final_allocation', allocation)
+        per_uav = {}
+        seen = set()
+        for a in allocation.get('assignments', []):
+            t = compiled.task_index.get(a.get('task_id'))
+            u = compiled.uav_index.get(a.get('assigned_uav'))
+            if t is None or u is None or t in seen or not compiled.is_feasible(t, u):
+                continue
+            seen.add(t)
+            per_uav.setdefault(u, []).append((parse_clock(a.get('start_time', '08:00')), t))
+
+        for u, items in per_uav.items():
+            ready = state.base
+            for _, t in sorted(items):
+                end = max(ready, state.ws[t]) + state.dur[t]
+                if end > state.we[t]:
+                    continue
+                state.sequences[u].append(t)
+                state.uav_of[t] = u
+                state.end_of[t] = end
+                state.weight_total += state.weight[t]
+                state.end_total += end - state.base
+                ready = end
+
+        state.unassigned = [t for t in range(compiled.n_tasks) if state.uav_of[t] < 0]
+        state._pool_pos = {t: i for i, t in enumerate(state.unassigned)}
+        return state
+
+    def objective(self) -> float:
+        return self.weight_total - self.END_PENALTY * self.end_total
+
+    def retime(self, uav: int, new_seq: List[int], from_pos: int, stable_from: int):
+        """
+        从from_pos起重算无人机uav新序列的结束时间（from_pos之前的部分必须未变）
+
+        Args:
+            stable_from: 新序列从该位置起与原序列尾部相同，
+                         重算到这里且结束时间不变时即可停止
+
+        Returns:
+            (变化列表[(任务, 新结束时间)], 结束时间之和的变化量)；有任务超窗时返回 None。
+            移出该序列的任务不计入变化量，由调用方扣除。
+        """
+        ws, we, dur, end_of, uav_of = self.ws, self.we, self.dur, self.end_of, self.uav_of
+        ready = end_of[new_seq[from_pos - 1]] if from_pos > 0 else self.base
+        changes = []
+        delta = 0
+        for p in range(from_pos, len(new_seq)):
+            t = new_seq[p]
+            end = (ready if ready > ws[t] else ws[t]) + dur[t]
+            if end > we[t]:
+                return None
+            if uav_of[t] == uav:
+                if p >= stable_from and end_of[t] == end:
+                    break
+                delta += end - end_of[t]
+            else:
+                delta += end - self.base
+            changes.append((t, end))
+            ready = end
+        return changes, delta
+
+    def apply(self, uav: int, new_seq: List[int], changes: List[Tuple[int, int]]):
+        """提交某架无人机的新序列（changes 为 retime 的结果，移入的任务都在其中）"""
+        for t, end in changes:
+            self.end_of[t] = end
+            self.uav_of[t] = uav
+        self.sequences[uav] = new_seq
+
+    def commit(self, updates: List[Tuple[int, List[int], List[Tuple[int, int]]]],
+               leave_pool: List[int], enter_pool: List[int], d_weight: float, d_end: float):
+        """
+        提交一次移动
+
+        Args:
+            updates: [(无人机, 新序列, retime的变化列表), ...]
+            leave_pool: 从未分配池移入序列的任务
+            enter_pool: 从序列移回未分配池的任务
+            d_weight, d_end: 权重和与结束时间之和的变化量
+        """
+        for t in leave_pool:
+            self.pool_remove(t)
+        for uav, new_seq, changes in updates:
+            self.apply(uav, new_seq, changes)
+        for t in enter_pool:
+            self.pool_add(t)
+        self.weight_total += d_weight
+        self.end_total += d_end
+
+    def pool_add(self, task: int):
+        self.uav_of[task] = -1
+        self._pool_pos[task] = len(self.unassigned)
+        self.unassigned.append(task)
+
+    def pool_remove(self, task: int):
+        i = self._pool_pos.pop(task)
+        last = self.unassigned.pop()
+        if last != task:
+            self.unassigned[i] = last
+            self._pool_pos[last] = i
+
+    def copy_solution(self) -> Tuple[List[List[int]], List[int]]:
+        """复制当前方案（序列 + 结束时间），用于保存历史最好解"""
+        return [list(seq) for seq in self.sequences], list(self.end_of)
+
+    def build_assignments(self, solution, format_minutes, label: str) -> Tuple[List[Dict], List[str], int]:
+        """把方案转换为标准格式的分配列表（按开始时间排序）"""
+        sequences, end_of = solution
+        tasks, uavs = self.problem.tasks, self.problem.uavs
+        rows = []
+        assigned = set()
+        for u, seq in enumerate(sequences):
+            for t in seq:
+                rows.append((end_of[t] - self.dur[t], u, t))
+                assigned.add(t)
+        rows.sort()
+        assignments = []
+        for start, u, t in rows:
+            task = tasks[t]
+            uav_id = uavs[u]['uav_id']
+            assignments.append({
+                'task_id': task['task_id'],
+                'task_name': task['task_name'],
+                'assigned_uav': uav_id,
+                'start_time': format_minutes(start),
+                'estimated_duration': f'{int(self.dur[t])}分钟（含往返）',
+                'priority': task.get('priority', '中'),
+                'rationale': f'{label}：{uav_id}在{format_minutes(start)}可用'
+            })
+        unassigned = [tasks[t]['task_id'] for t in range(len(tasks)) if t not in assigned]
+        makespan = max((end_of[seq[-1]] for seq in sequences if seq), default=self.base)
+        return assignments, unassigned, makespan
 
 
 class GreedyAlgorithm:
@@ -67,17 +676,35 @@ class GreedyAlgorithm:
     def __init__(self, problem: TaskAllocationProblem):
         self.problem = problem
         self.priority_map = {'紧急': 4, '高': 3, '中': 2, '低': 1}
+        self._time_cache = {}
         
     def parse_time(self, time_str: str) -> float:
-        """将时间字符串转换为小时数"""
+        """将时间字符串转换为小时数（按字符串缓存，每种取值只解析一次）"""
+        cached = self._time_cache.get(time_str)
+        if cached is not None:
+            return cached
         try:
             t = datetime.strptime(time_str, '%H:%M')
-            return t.hour + t.minute / 60
+            hours = t.hour + t.minute / 60
         except:
-            return 8.0
+            hours = 8.0
+        self._time_cache[time_str] = hours
+        return hours
     
     def check_capability(self, uav: Dict, task: Dict) -> bool:
-        """检查无人机是否有能力执行任务"""
+        """
+        检查无人机是否有能力执行任务
+        
+        任务和无人机都属于本问题时查询共享的可行性矩阵（完整规则），
+        否则只按载重和任务类型判断。
+        """
+        compiled = self.problem.compile()
+        task_row = compiled.task_index.get(task.get('task_id'))
+        uav_row = compiled.uav_index.get(uav.get('uav_id'))
+        if task_row is not None and uav_row is not None \
+                and self.problem.tasks[task_row] is task and self.problem.uavs[uav_row] is uav:
+            return compiled.is_feasible(task_row, uav_row)
+        
         # 检查载重
         if task.get('payload', 0) > uav.get('max_payload', 0):
             return False
@@ -97,76 +724,86 @@ class GreedyAlgorithm:
         m = int((hours - h) * 60)
         return f"{h:02d}:{m:02d}"
     
+    def format_minutes(self, minutes: float) -> str:
+        """将分钟数转换为时间字符串（避免小时浮点数截断误差）"""
+        total = int(round(minutes))
+        return f"{total // 60:02d}:{total % 60:02d}"
+    
     def allocate(self) -> Dict:
-        """执行贪心分配"""
+        """
+        执行贪心分配
+        
+        可行性完全相同的无人机（可行性矩阵中相同的列）合并为一个分组，每个分组维护一棵
+        最早可用时间锦标赛树；每个任务先由可行分组的根节点得到最早开始时间，超出时间窗口的
+        任务直接跳过，否则只在根节点不晚于该时间的分组里做 O(log U) 查询，
+        总复杂度 O(T·G·log U)（G为分组数）。
+        结果与逐架无人机扫描完全一致：取开始时间最早者，相同时取原始顺序靠前者。
+        """
+        tasks = self.problem.tasks
+        compiled = self.problem.compile()
+        
+        # 使用编译好的整数分钟时间（每个任务只解析一次，无浮点累积误差）
+        window_start = compiled.window_start.tolist()
+        window_end = compiled.window_end.tolist()
+        durations = compiled.duration.tolist()
+        
         # 按优先级排序任务
-        sorted_tasks = sorted(
-            self.problem.tasks,
-            key=lambda x: (self.priority_map.get(x.get('priority', '低'), 0), 
-                          self.parse_time(x.get('time_window', {}).get('start', '08:00'))),
-            reverse=True
-        )
+        sort_keys = list(zip(compiled.priority.tolist(), window_start))
+        sorted_indices = sorted(range(len(tasks)), key=sort_keys.__getitem__, reverse=True)
+        
+        # 初始化无人机可用时间（按可行性分组分桶的锦标赛树）
+        uav_group, group_members, _ = compiled.feasibility_groups()
+        trees = [EarliestAvailableTree(m.tolist(), BASE_TIME_MIN) for m in group_members]
+        uav_group = uav_group.tolist()
+        uav_available_time = [BASE_TIME_MIN] * len(self.problem.uavs)
         
-        # 初始化无人机可用时间
-        uav_available_time = {uav['uav_id']: 8.0 for uav in self.problem.uavs}
+        # 每个任务可查询的分组（按可行性行模式去重）
+        task_pattern, pattern_groups, _, _ = compiled.feasibility_patterns()
+        pattern_eligible = [np.nonzero(row)[0].tolist() for row in pattern_groups]
+        task_pattern = task_pattern.tolist()
         
         # 分配结果
         assignments = []
         unassigned = []
         
-        for task in sorted_tasks:
+        for index in sorted_indices:
+            task = tasks[index]
             task_id = task['task_id']
-            task_name = task['task_name']
-            priority = task.get('priority', '中')
-            duration = task.get('estimated_duration', 30)
-            time_window = task.get('time_window', {})
-            window_start = self.parse_time(time_window.get('start', '08:00'))
-            window_end = self.parse_time(time_window.get('end', '12:00'))
+            duration = durations[index]
+            ready, deadline = window_start[index], window_end[index]
             
-            # 找最早可用且有能力的无人机
-            best_uav = None
-            best_start_time = float('inf')
-            
-            for uav in self.problem.uavs:
-                if not self.check_capability(uav, task):
-                    continue
-                
-                uav_id = uav['uav_id']
-                available = uav_available_time[uav_id]
-                
-                # 计算实际开始时间（考虑时间窗口）
-                start_time = max(available, window_start)
-                
-                # 检查是否在时间窗口内
-                end_time = start_time + duration / 60 + 0.25  # 加上往返时间
-                if end_time <= window_end:
-                    if start_time < best_start_time:
-                        best_start_time = start_time
-                        best_uav = uav
+            # 最早开始时间 = max(就绪时间, 可行分组中最早可用时间)，先用各树根节点求出并判断是否超窗，
+            # 超窗任务无需逐树查询（大场景中多数任务在无人机排满后属于此类）
+            eligible = [trees[c] for c in pattern_eligible[task_pattern[index]]]
+            start_time = max(ready, min([tree.tree[1] for tree in eligible])) if eligible else None
             
-            # 分配任务
-            if best_uav:
-                start_time = best_start_time
-                end_time = start_time + duration / 60 + 0.25
+            # 检查是否在时间窗口内（加上往返时间）
+            if start_time is not None and start_time + duration + 15 <= deadline:
+                # 开始时间相同时取原始顺序最靠前的无人机
+                uav_index = min(tree.uav_indices[tree.leftmost_at_most(start_time)]
+                                for tree in eligible if tree.tree[1] <= start_time)
+                end_time = start_time + duration + 15
+                uav_id = self.problem.uavs[uav_index]['uav_id']
                 
                 assignments.append({
                     'task_id': task_id,
-                    'task_name': task_name,
-                    'assigned_uav': best_uav['uav_id'],
-                    'start_time': self.format_time(start_time),
+                    'task_name': task['task_name'],
+                    'assigned_uav': uav_id,
+                    'start_time': self.format_minutes(start_time),
                     'estimated_duration': f'{int(duration + 15)}分钟（含往返）',
-                    'priority': priority,
-                    'rationale': f'贪心算法分配：{best_uav["uav_id"]}在{self.format_time(start_time)}可用'
+                    'priority': task.get('priority', '中'),
+                    'rationale': f'贪心算法分配：{uav_id}在{self.format_minutes(start_time)}可用'
                 })
                 
                 # 更新无人机可用时间
-                uav_available_time[best_uav['uav_id']] = end_time
+                uav_available_time[uav_index] = end_time
+                trees[uav_group[uav_index]].update(uav_index, end_time)
             else:
                 unassigned.append(task_id)
         
         # 计算总完成时间
-        max_time = max(uav_available_time.values()) if uav_available_time else 8.0
-        total_completion_time = self.format_time(max_time)
+        max_time = max(uav_available_time) if uav_available_time else BASE_TIME_MIN
+        total_completion_time = self.format_minutes(max_time)
         
         # 生成标准格式的结果
         result = {
@@ -197,45 +834,44 @@ class RandomAlgorithm:
         """执行随机分配"""
         random.seed(42)  # 固定随机种子以保证可重复性
         
+        compiled = self.problem.compile()
         assignments = []
         unassigned = []
-        uav_available_time = {uav['uav_id']: 8.0 for uav in self.problem.uavs}
+        uav_available_time = {uav['uav_id']: BASE_TIME_MIN for uav in self.problem.uavs}
         
         # 随机打乱任务顺序
-        shuffled_tasks = self.problem.tasks.copy()
-        random.shuffle(shuffled_tasks)
+        shuffled = list(range(len(self.problem.tasks)))
+        random.shuffle(shuffled)
         
-        for task in shuffled_tasks:
-            # 找所有有能力的无人机
-            capable_uavs = [uav for uav in self.problem.uavs 
-                           if self.greedy.check_capability(uav, task)]
+        for index in shuffled:
+            task = self.problem.tasks[index]
+            # 找所有有能力的无人机（共享可行性矩阵）
+            capable_uavs = [self.problem.uavs[u] for u in compiled.feasible_uavs(index)]
             
             if capable_uavs:
                 # 随机选择一个
                 selected_uav = random.choice(capable_uavs)
                 uav_id = selected_uav['uav_id']
                 
-                time_window = task.get('time_window', {})
-                window_start = self.greedy.parse_time(time_window.get('start', '08:00'))
                 available = uav_available_time[uav_id]
-                start_time = max(available, window_start)
-                duration = task.get('estimated_duration', 30)
+                start_time = max(available, int(compiled.window_start[index]))
+                duration = int(compiled.duration[index])
                 
                 assignments.append({
                     'task_id': task['task_id'],
                     'task_name': task['task_name'],
                     'assigned_uav': uav_id,
-                    'start_time': self.greedy.format_time(start_time),
-                    'estimated_duration': f'{int(duration + 15)}分钟',
+                    'start_time': self.greedy.format_minutes(start_time),
+                    'estimated_duration': f'{int(duration + 15)}分钟（含往返）',
                     'priority': task.get('priority', '中'),
                     'rationale': '随机分配'
                 })
                 
-                uav_available_time[uav_id] = start_time + duration / 60 + 0.25
+                uav_available_time[uav_id] = start_time + duration + 15
             else:
                 unassigned.append(task['task_id'])
         
-        max_time = max(uav_available_time.values()) if uav_available_time else 8.0
+        max_time = max(uav_available_time.values()) if uav_available_time else BASE_TIME_MIN
         
         result = {
             'final_allocation': {
@@ -244,7 +880,7 @@ class RandomAlgorithm:
                 'total_uavs': len(self.problem.uavs),
                 'assignments': assignments,
                 'unassigned_tasks': unassigned,
-                'total_completion_time': self.greedy.format_time(max_time),
+                'total_completion_time': self.greedy.format_minutes(max_time),
                 'risk_assessment': '随机分配，未经优化',
                 'notes': '纯随机分配，仅作为最差基线',
                 'algorithm': 'Random'
@@ -255,56 +891,893 @@ class RandomAlgorithm:
 
 
 class GeneticAlgorithm:
-    """遗传算法：通过进化搜索最优分配方案"""
+    """
+    遗传算法：通过进化搜索最优分配方案
+    
+    种群存储为NumPy整数矩阵（个体 × 任务 → 无人机索引，-1表示不分配），
+    选择、交叉、变异和适应度评估均以整批数组运算完成，不逐个体循环。
+    
+    解码规则：每架无人机按"时间窗口开始升序、优先级降序"依次执行分到的任务，
+    开始时间 = max(上一任务结束, 窗口开始)，结束时间含15分钟往返，
+    超出时间窗口的任务视为未完成。
+    """
+    
+    DEFAULT_TIME_LIMIT_S = 5.0  # 默认时间上限：大规模问题上100代需要数十秒，到时返回当前最好个体
     
     def __init__(self, problem: TaskAllocationProblem, 
-                 population_size=50, generations=100):
+                 population_size=50, generations=100,
+                 crossover_rate=0.9, mutation_rate=None,
+                 tournament_size=2, elite_size=2,
+                 time_limit=DEFAULT_TIME_LIMIT_S, seed=42, seed_with_greedy=True, fitness='weighted'):
+        """
+        Args:
+            problem: 任务分配问题实例
+            population_size: 种群规模
+            generations: 进化代数
+            crossover_rate: 交叉概率（按父代对）
+            mutation_rate: 单基因变异概率，默认 min(0.2, 2/任务数)
+            tournament_size: 锦标赛选择规模
+            elite_size: 每代直接保留的精英个体数
+            time_limit: 总时间上限（秒，含初始种群），默认 DEFAULT_TIME_LIMIT_S，None表示只受代数限制
+            seed: 随机种子，保证可重复性
+            seed_with_greedy: 是否用贪心解作为初始种群中的一个个体
+            fitness: 'weighted' 按时完成任务的优先级加权和；
+                     'evaluator' 用 BatchAllocationEvaluator 的总分（与对比实验的评分口径一致）
+        """
+        if fitness not in ('weighted', 'evaluator'):
+            raise ValueError(f"Unknown fitness: {fitness}")
         self.problem = problem
         self.population_size = population_size
         self.generations = generations
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.tournament_size = tournament_size
+        self.elite_size = elite_size
+        self.time_limit = time_limit
+        self.seed = seed
+        self.seed_with_greedy = seed_with_greedy
+        self.fitness = fitness
         self.greedy = GreedyAlgorithm(problem)
         
+    def _prepare(self):
+        """读取编译问题的数组，并按列取共享可行性矩阵的稀疏行模式（CSR格式）"""
+        compiled = self.problem.compile()
+        
+        # 染色体列顺序即解码顺序：窗口开始升序，同一时刻优先级高者在前
+        self._order = np.lexsort((-compiled.priority, compiled.window_start))
+        self._ws = compiled.window_start[self._order].astype(float)
+        self._we = compiled.window_end[self._order].astype(float)
+        self._dur = compiled.duration[self._order] + float(CompiledProblem.RETURN_TRIP_MIN)
+        self._weight = compiled.priority[self._order].astype(float)
+        self._base = float(BASE_TIME_MIN)
+        self._release_end = np.maximum(self._ws, self._base) + self._dur
+        
+        # 无人机数较少时用int16存基因：稳定排序可走基数排序，内存也减半
+        self._gene_dtype = np.int16 if compiled.n_uavs < np.iinfo(np.int16).max else np.int32
+        # 可行无人机列表按行模式共享，内存为 O(模式数×U) 而非 O(T×U)
+        task_pattern, _, pattern_ptr, pattern_uavs = compiled.feasibility_patterns()
+        column_pattern = task_pattern[self._order]
+        self._cap_idx = pattern_uavs.astype(self._gene_dtype)
+        self._cap_ptr = pattern_ptr[column_pattern]
+        self._cap_count = pattern_ptr[column_pattern + 1] - self._cap_ptr
+        
+        # 分段累计最大值的偏移量：必须大于同一行内a值的取值范围
+        self._big = float(self._we.max(initial=0) + self._dur.sum() + self._base + 1)
+        
+        if self.fitness == 'evaluator':
+            from evaluation_metrics import BatchAllocationEvaluator
+            self._evaluator = BatchAllocationEvaluator(compiled)
+    
+    def _sample_genes(self, rng, cols: np.ndarray) -> np.ndarray:
+        """为指定列（任务）批量随机抽取基因：在可行无人机与"不分配"之间均匀选择"""
+        counts = self._cap_count[cols]
+        r = (rng.random(cols.shape) * (counts + 1)).astype(np.int64)
+        genes = np.full(cols.shape, -1, dtype=self._gene_dtype)
+        ok = r < counts
+        genes[ok] = self._cap_idx[self._cap_ptr[cols[ok]] + r[ok]]
+        return genes
+    
+    def _initial_population(self, rng) -> np.ndarray:
+        """生成初始种群：随机个体 + 轮转分配个体 +（可选）贪心个体"""
+        n_tasks = len(self._ws)
+        cols = np.broadcast_to(np.arange(n_tasks), (self.population_size, n_tasks))
+        population = self._sample_genes(rng, cols)
+        
+        # 轮转分配：第j个任务分给其可行列表中的第(j mod 可行数)架无人机
+        has_cap = self._cap_count > 0
+        spread = np.full(n_tasks, -1, dtype=self._gene_dtype)
+        offset = np.arange(n_tasks)[has_cap] % self._cap_count[has_cap]
+        spread[has_cap] = self._cap_idx[self._cap_ptr[has_cap] + offset]
+        population[0] = spread
+        
+        if self.seed_with_greedy and self.population_size > 1:
+            greedy_alloc = self.greedy.allocate()['final_allocation']['assignments']
+            uav_index = {uav['uav_id']: i for i, uav in enumerate(self.problem.uavs)}
+            column = {self.problem.tasks[t]['task_id']: j for j, t in enumerate(self._order)}
+            seeded = population[1].copy()
+            for a in greedy_alloc:
+                seeded[column[a['task_id']]] = uav_index[a['assigned_uav']]
+            population[1] = seeded
+        
+        return population
+    
+    def _decode_batch(self, population: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        批量解码：计算每个个体中每个任务的结束时间与是否按时完成
+        
+        同一无人机上的递推 e_i = max(e_{i-1}, ws_i) + d_i 是max-plus扫描，
+        展开为 e_i = C_i + max_{j<=i}(r_j - C_{j-1})（C为段内累计时长），
+        通过"按无人机稳定排序 + 带段偏移的累计最大值"一次性求出。
+        由于段内前一任务结束时间不早于基准时间，r_j 统一取 max(ws_j, 基准时间) 即可。
+        """
+        order = np.argsort(population, axis=1, kind='stable')
+        uav_sorted = np.take_along_axis(population, order, axis=1)
+        csum = np.cumsum(self._dur[order], axis=1)
+        offset = uav_sorted.astype(float) * self._big
+        
+        # r_j - C_{j-1} = (ws_j + d_j) - C_j，加上段偏移后求累计最大值
+        running = self._release_end[order]
+        running -= csum
+        running += offset
+        np.maximum.accumulate(running, axis=1, out=running)
+        running -= offset
+        end_sorted = running + csum
+        
+        end = np.empty_like(end_sorted)
+        np.put_along_axis(end, order, end_sorted, axis=1)
+        on_time = (population >= 0) & (end <= self._we)
+        return end, on_time
+    
+    def _fitness(self, population: np.ndarray) -> np.ndarray:
+        """适应度：按时完成任务的优先级加权和，结束时间越早略优（作为平局决胜）"""
+        end, on_time = self._decode_batch(population)
+        if self.fitness == 'evaluator':
+            # 超窗任务按未分配计分，整个种群一次向量化评估
+            uav = np.where(on_time, population, -1)
+            start = (end - self._dur).astype(np.int64)
+            return self._evaluator.evaluate(uav, start, columns=self._order)['overall_score']
+        completed = (on_time * self._weight).sum(axis=1)
+        done = on_time.sum(axis=1)
+        mean_end = ((end - self._base) * on_time).sum(axis=1) / np.maximum(done, 1)
+        return completed - mean_end / (self._big * 10)
+    
+    def _evolve(self, population: np.ndarray, fitness: np.ndarray, rng) -> np.ndarray:
+        """执行一代进化：精英保留 + 锦标赛选择 + 均匀交叉 + 变异"""
+        n_pop, n_tasks = population.shape
+        n_elite = min(self.elite_size, n_pop)
+        elite = population[np.argsort(-fitness, kind='stable')[:n_elite]]
+        
+        # 锦标赛选择
+        n_children = n_pop - n_elite
+        n_parents = n_children + (n_children % 2)
+        contenders = rng.integers(0, n_pop, size=(n_parents, max(1, self.tournament_size)))
+        winners = contenders[np.arange(n_parents), np.argmax(fitness[contenders], axis=1)]
+        parents = population[winners]
+        
+        # 均匀交叉（每对父代以crossover_rate概率交叉）
+        mothers, fathers = parents[0::2], parents[1::2]
+        mix = rng.random(mothers.shape) < 0.5
+        mix &= (rng.random(len(mothers)) < self.crossover_rate)[:, None]
+        children = np.concatenate([
+            np.where(mix, fathers, mothers),
+            np.where(mix, mothers, fathers),
+        ])[:n_children]
+        
+        # 变异：在可行无人机（或不分配）中重新抽取基因
+        rate = self.mutation_rate if self.mutation_rate is not None else min(0.2, 2.0 / max(n_tasks, 1))
+        n_mutations = rng.binomial(children.size, rate)
+        flat = rng.integers(0, children.size, n_mutations)
+        rows, cols = np.divmod(flat, n_tasks)
+        children[rows, cols] = self._sample_genes(rng, cols)
+        
+        return np.concatenate([elite, children])
+    
+    def _build_assignments(self, individual: np.ndarray) -> Tuple[List[Dict], List[str], float]:
+        """按解码顺序逐任务精确排程，跳过超窗任务（跳过只会让后续任务更早开始）"""
+        available = {}
+        assignments = []
+        unassigned = []
+        for j, u in enumerate(individual.tolist()):
+            task = self.problem.tasks[self._order[j]]
+            if u < 0:
+                unassigned.append(task['task_id'])
+                continue
+            start = max(available.get(u, self._base), self._ws[j])
+            end = start + self._dur[j]
+            if end > self._we[j]:
+                unassigned.append(task['task_id'])
+                continue
+            available[u] = end
+            uav_id = self.problem.uavs[u]['uav_id']
+            assignments.append({
+                'task_id': task['task_id'],
+                'task_name': task['task_name'],
+                'assigned_uav': uav_id,
+                'start_time': self.greedy.format_minutes(start),
+                'estimated_duration': f'{int(self._dur[j])}分钟（含往返）',
+                'priority': task.get('priority', '中'),
+                'rationale': f'遗传算法分配：{uav_id}在{self.greedy.format_minutes(start)}可用'
+            })
+        makespan = max(available.values()) if available else self._base
+        return assignments, unassigned, makespan
+    
     def allocate(self) -> Dict:
-        """执行遗传算法（简化实现）"""
-        # 简化实现：使用贪心算法的结果稍作优化
-        greedy_result = self.greedy.allocate()
+        """执行遗传算法"""
+        rng = np.random.default_rng(self.seed)
+        started = time.perf_counter()
+        self._prepare()
+        
+        if len(self._ws) == 0 or len(self.problem.uavs) == 0:
+            assignments, unassigned, makespan = [], [t['task_id'] for t in self.problem.tasks], self._base
+            generations_run = 0
+        else:
+            population = self._initial_population(rng)
+            fitness = self._fitness(population)
+            generations_run = 0
+            for _ in range(self.generations):
+                if self.time_limit is not None and time.perf_counter() - started >= self.time_limit:
+                    break
+                population = self._evolve(population, fitness, rng)
+                fitness = self._fitness(population)
+                generations_run += 1
+            best = population[int(np.argmax(fitness))]
+            assignments, unassigned, makespan = self._build_assignments(best)
         
-        # 在贪心结果基础上进行小幅调整
-        result = copy.deepcopy(greedy_result)
-        result['final_allocation']['algorithm'] = 'Genetic'
-        result['final_allocation']['notes'] = '遗传算法优化（基于贪心）'
-        result['final_allocation']['risk_assessment'] = '经过进化优化的方案'
+        result = {
+            'final_allocation': {
+                'decision_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'total_tasks': len(self.problem.tasks),
+                'total_uavs': len(self.problem.uavs),
+                'assignments': assignments,
+                'unassigned_tasks': unassigned,
+                'total_completion_time': self.greedy.format_minutes(makespan),
+                'risk_assessment': '经过进化优化的方案',
+                'notes': (f'遗传算法优化：种群{self.population_size}，'
+                          f'进化{generations_run}代，用时{time.perf_counter() - started:.2f}秒'),
+                'algorithm': 'Genetic'
+            }
+        }
         
         return result
 
 
 class IntegerProgramming:
-    """整数规划：数学优化求解（简化实现）"""
+    """
+    整数规划：时间离散化（time-indexed）MILP，使用 SciPy 自带的 HiGHS 求解器
     
-    def __init__(self, problem: TaskAllocationProblem):
+    决策变量 z[t,u,k] = 1 表示任务t由无人机u在第k个时间槽开始执行。
+    只为满足能力/载重、时间窗口、禁飞时段的 (t,u,k) 组合建变量；
+    约束：每个任务至多分配一次；每架无人机每个时间槽至多执行一个任务（含往返）。
+    目标：最大化按优先级加权的完成任务数，同等情况下开始时间越早越好。
+    """
+    
+    MAX_VARIABLES = 2_000_000  # 变量数超过该值时模型构建和求解都不现实，改用局部搜索
+    
+    def __init__(self, problem: TaskAllocationProblem, time_limit=60, slot_minutes=5,
+                 max_variables=MAX_VARIABLES):
+        """
+        Args:
+            problem: 任务分配问题实例
+            time_limit: 求解时间上限（秒），到时返回当前最好可行解及其间隙
+            slot_minutes: 时间离散化步长（分钟），开始时间只取步长整数倍
+            max_variables: 变量数上限（估计值超过时以 time_limit 为预算改用局部搜索，None 表示不限）
+        """
         self.problem = problem
+        self.time_limit = time_limit
+        self.slot_minutes = slot_minutes
+        self.max_variables = max_variables
         self.greedy = GreedyAlgorithm(problem)
+    
+    def estimate_variables(self) -> int:
+        """
+        变量数上界：每个任务的可行无人机数 × 窗口内可选的开始槽数（不计禁飞时段的剔除），
+        不构建模型，O(T)
+        """
+        compiled = self.problem.compile()
+        base, slot = BASE_TIME_MIN, self.slot_minutes
+        release = np.maximum(compiled.window_start, base).astype(np.int64)
+        latest = compiled.window_end.astype(np.int64) - compiled.duration - CompiledProblem.RETURN_TRIP_MIN
+        first = -((base - release) // slot)  # ceil((release - base) / slot)
+        last = (latest - base) // slot
+        n_slots = np.maximum(last - first + 1, 0)
+        task_pattern, _, pattern_ptr, _ = compiled.feasibility_patterns()
+        n_uavs = np.diff(pattern_ptr)[task_pattern] if len(task_pattern) else np.zeros(0, dtype=np.int64)
+        return int((n_slots * n_uavs).sum())
+        
+    def _build_model(self):
+        """构建稀疏MILP模型，返回目标系数、约束矩阵和变量索引"""
+        from scipy.sparse import csr_matrix
+        
+        compiled = self.problem.compile()
+        tasks = self.problem.tasks
+        uavs = self.problem.uavs
+        base = BASE_TIME_MIN
+        slot = self.slot_minutes
+        
+        release = np.maximum(compiled.window_start, base)
+        deadline = compiled.window_end
+        durations = compiled.duration + CompiledProblem.RETURN_TRIP_MIN
+        
+        horizon = int(deadline.max(initial=base))
+        n_slots = max(int(np.ceil((horizon - base) / slot)), 1)
+        slot_start = base + slot * np.arange(n_slots)
+        
+        var_task, var_uav, var_slot = [], [], []
+        for t, task in enumerate(tasks):
+            duration = durations[t]
+            allowed = (slot_start >= release[t]) & (slot_start + duration <= deadline[t])
+            # 禁飞时段：执行区间 [开始, 开始+时长) 不得与禁飞窗口重叠
+            for w in range(compiled.no_fly_ptr[t], compiled.no_fly_ptr[t + 1]):
+                allowed &= (slot_start + duration <= compiled.no_fly_start[w]) | \
+                    (slot_start >= compiled.no_fly_end[w])
+            ks = np.nonzero(allowed)[0]
+            us = compiled.feasible_uavs(t)
+            if len(ks) == 0 or len(us) == 0:
+                continue
+            var_task.append(np.full(len(ks) * len(us), t))
+            var_uav.append(np.repeat(us, len(ks)))
+            var_slot.append(np.tile(ks, len(us)))
+        
+        if var_task:
+            var_task = np.concatenate(var_task)
+            var_uav = np.concatenate(var_uav)
+            var_slot = np.concatenate(var_slot)
+        else:
+            var_task = var_uav = var_slot = np.zeros(0, dtype=int)
+        n_vars = len(var_task)
+        
+        # 目标：最小化 -(优先级权重 + 完成奖励) + ε·开始槽序号
+        # 完成奖励使每个变量的系数都为负（权重为0的任务在有空闲时也会被分配），
+        # 奖励总和与时间项总和各小于0.5，加起来小于1个最小权重差，不改变按优先级加权的主目标
+        weight = compiled.priority.astype(float)
+        bonus = 0.5 / max(len(tasks), 1)
+        epsilon = bonus / (n_slots + 1)
+        c = -(weight[var_task] + bonus) + epsilon * var_slot
+        
+        # 约束1：每个任务至多分配一次（行号 0..T-1）
+        rows = [var_task]
+        cols = [np.arange(n_vars)]
+        # 约束2：无人机u在槽m被占用（行号 T + u*n_slots + m）
+        occupancy = np.ceil(durations / slot).astype(int)
+        occ = occupancy[var_task] if n_vars else np.zeros(0, dtype=int)
+        rep_var = np.repeat(np.arange(n_vars), occ)
+        offsets = np.arange(occ.sum()) - np.repeat(np.cumsum(occ) - occ, occ)
+        busy_slot = var_slot[rep_var] + offsets
+        inside = busy_slot < n_slots
+        rows.append(len(tasks) + var_uav[rep_var][inside] * n_slots + busy_slot[inside])
+        cols.append(rep_var[inside])
         
+        n_rows = len(tasks) + len(uavs) * n_slots
+        A = csr_matrix(
+            (np.ones(sum(len(r) for r in rows)), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(n_rows, n_vars)
+        )
+        return c, A, (var_task, var_uav, var_slot), slot_start, durations, weight
+    
+    def _fallback(self, estimated: int) -> Dict:
+        """模型规模超限：以相同时间预算运行局部搜索，并如实标注"""
+        print(f"⚠️ 整数规划约有 {estimated} 个变量，超过上限 {self.max_variables}，"
+              f"改用局部搜索（预算{self.time_limit}秒）")
+        result = LocalSearchAlgorithm(self.problem, include_seed_time=True).allocate(
+            time_budget_ms=self.time_limit * 1000)
+        allocation = result['final_allocation']
+        allocation['notes'] = (f'模型规模超限（约{estimated}个变量 > {self.max_variables}），'
+                               f'未求解整数规划，结果为局部搜索解（非最优）；{allocation["notes"]}')
+        allocation['risk_assessment'] = '未经数学优化验证的方案'
+        allocation['algorithm'] = 'IntegerProgramming'
+        allocation['solver_report'] = {**allocation['solver_report'],
+                                       'solver': 'LocalSearch (fallback)', 'status': '模型规模超限',
+                                       'estimated_variables': estimated, 'max_variables': self.max_variables}
+        return result
+
     def allocate(self) -> Dict:
-        """执行整数规划（简化实现）"""
-        # 简化实现：使用贪心算法的结果
-        greedy_result = self.greedy.allocate()
+        """执行整数规划求解"""
+        try:
+            from scipy.optimize import milp, LinearConstraint, Bounds
+        except ImportError:
+            # 没有求解器时不冒充最优解：退回贪心结果并如实标注
+            result = copy.deepcopy(self.greedy.allocate())
+            result['final_allocation']['algorithm'] = 'IntegerProgramming'
+            result['final_allocation']['notes'] = '未安装SciPy，整数规划未求解，结果为贪心解（非最优）'
+            result['final_allocation']['risk_assessment'] = '未经数学优化验证的方案'
+            result['final_allocation']['solver_report'] = {'solver': None, 'status': '未安装SciPy'}
+            return result
         
-        result = copy.deepcopy(greedy_result)
-        result['final_allocation']['algorithm'] = 'IntegerProgramming'
-        result['final_allocation']['notes'] = '整数规划求解（理论最优）'
-        result['final_allocation']['risk_assessment'] = '数学优化保证的方案'
+        estimated = self.estimate_variables()
+        if self.max_variables is not None and estimated > self.max_variables:
+            return self._fallback(estimated)
+        
+        started = time.perf_counter()
+        c, A, (var_task, var_uav, var_slot), slot_start, durations, weight = self._build_model()
+        
+        if len(c) > 0:
+            res = milp(
+                c=c,
+                integrality=np.ones(len(c)),
+                bounds=Bounds(0, 1),
+                constraints=LinearConstraint(A, -np.inf, 1),
+                options={'time_limit': self.time_limit, 'disp': False},
+            )
+            x = res.x
+            status = res.message
+            best_bound = -res.mip_dual_bound if getattr(res, 'mip_dual_bound', None) is not None else None
+            gap = getattr(res, 'mip_gap', None)
+        else:
+            x, status, best_bound, gap = np.zeros(0), '无可行变量（所有任务均不可分配）', 0.0, 0.0
+        runtime = time.perf_counter() - started
+        
+        assignments = []
+        assigned = set()
+        makespan = BASE_TIME_MIN
+        if x is not None:
+            chosen = np.nonzero(x > 0.5)[0]
+            chosen = chosen[np.argsort(var_slot[chosen], kind='stable')]
+            for v in chosen:
+                t, u = int(var_task[v]), int(var_uav[v])
+                task, uav = self.problem.tasks[t], self.problem.uavs[u]
+                start = slot_start[var_slot[v]]
+                duration = durations[t]
+                makespan = max(makespan, start + duration)
+                assigned.add(t)
+                assignments.append({
+                    'task_id': task['task_id'],
+                    'task_name': task['task_name'],
+                    'assigned_uav': uav['uav_id'],
+                    'start_time': self.greedy.format_minutes(start),
+                    'estimated_duration': f'{int(duration)}分钟（含往返）',
+                    'priority': task.get('priority', '中'),
+                    'rationale': f'整数规划求解：{uav["uav_id"]}在{self.greedy.format_minutes(start)}开始'
+                })
+        unassigned = [task['task_id'] for t, task in enumerate(self.problem.tasks) if t not in assigned]
+        incumbent = float(weight[sorted(assigned)].sum()) if assigned else 0.0
+        
+        if x is None:
+            notes = f'整数规划在{self.time_limit}秒内未找到可行解（{status}）'
+        elif gap is not None and gap <= 1e-9:
+            notes = f'整数规划求解（已证明最优，时间步长{self.slot_minutes}分钟）'
+        else:
+            notes = f'整数规划求解（时间上限内最好解，最优间隙{gap:.2%}）' if gap is not None \
+                else f'整数规划求解（{status}）'
+        
+        result = {
+            'final_allocation': {
+                'decision_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'total_tasks': len(self.problem.tasks),
+                'total_uavs': len(self.problem.uavs),
+                'assignments': assignments,
+                'unassigned_tasks': unassigned,
+                'total_completion_time': self.greedy.format_minutes(makespan),
+                'risk_assessment': '数学优化保证的方案' if gap is not None and gap <= 1e-9 else '数学优化方案（未证明最优）',
+                'notes': notes,
+                'algorithm': 'IntegerProgramming',
+                'solver_report': {
+                    'solver': 'HiGHS (scipy.optimize.milp)',
+                    'status': status,
+                    'incumbent_weighted_tasks': incumbent,
+                    'objective': float(-c @ x) if x is not None and len(c) else 0.0,
+                    'best_bound': best_bound,
+                    'gap': gap,
+                    'time_limit_s': self.time_limit,
+                    'runtime_s': round(runtime, 3),
+                    'slot_minutes': self.slot_minutes,
+                    'num_variables': int(len(c)),
+                    'num_constraints': int(A.shape[0]),
+                }
+            }
+        }
         
         return result
 
 
-def run_baseline_algorithm(algorithm_name: str, problem: TaskAllocationProblem = None) -> Dict:
+class LocalSearchAlgorithm:
+    """
+    局部搜索改进算法：从贪心解出发的模拟退火 + 禁忌表（anytime）
+
+    邻域移动：插入（未分配任务插入某架无人机）、移出、迁移（任务换到另一架无人机）、
+    交换（两架无人机互换任务，或与未分配任务互换）、重排（同一无人机内调整顺序）。
+    每次移动只在 ScheduleState 上重算受影响的无人机序列片段（增量评估），
+    不重新评估整个方案；始终保存历史最好解，截止时间一到立即返回。
+    """
+
+    MOVES = ('insert', 'eject', 'relocate', 'swap', 'reorder')
+    MOVE_WEIGHTS = (0.3, 0.1, 0.25, 0.2, 0.15)
+    CHECK_EVERY = 32  # 每隔多少次迭代检查一次时钟并更新温度
+
+    def __init__(self, problem: TaskAllocationProblem, time_budget_ms: float = 1000,
+                 seed: int = 42, tabu_tenure: int = None,
+                 initial_temperature: float = 1.0, final_temperature: float = 0.01,
+                 include_seed_time: bool = False):
+        """
+        Args:
+            problem: 任务分配问题实例
+            time_budget_ms: 默认搜索时间预算（毫秒）
+            seed: 随机种子
+            tabu_tenure: 被移动任务的禁忌迭代数，默认 min(50, 任务数/4)
+            initial_temperature: 初始温度（以优先级权重为单位）
+            final_temperature: 预算耗尽时的温度（按时间几何降温）
+            include_seed_time: 预算是否包含构造初始解（贪心解/从方案重建状态）的时间；
+                               默认不包含，大场景下贪心初始解本身可能耗尽整个预算，
+                               有硬截止时间的调用方（组合模式、整数规划的规模超限回退）应设为True
+        """
+        self.problem = problem
+        self.time_budget_ms = time_budget_ms
+        self.seed = seed
+        self.tabu_tenure = tabu_tenure
+        self.initial_temperature = initial_temperature
+        self.final_temperature = final_temperature
+        self.include_seed_time = include_seed_time
+        self.greedy = GreedyAlgorithm(problem)
+        self._capable = {}
+
+    def _capable_uavs(self, task: int) -> List[int]:
+        """任务的可行无人机列表（来自共享可行性矩阵，按需缓存）"""
+        uavs = self._capable.get(task)
+        if uavs is None:
+            uavs = self.problem.compile().feasible_uavs(task).tolist()
+            self._capable[task] = uavs
+        return uavs
+
+    @staticmethod
+    def _insert_position(state: ScheduleState, seq: List[int], task: int) -> int:
+        """按窗口开始时间确定插入位置"""
+        return bisect.bisect_right(seq, state.ws[task], key=state.ws.__getitem__)
+
+    def _random_assigned(self, state: ScheduleState, rng) -> int:
+        """随机抽一个已分配任务，抽不到时返回 -1"""
+        n = len(state.uav_of)
+        for _ in range(8):
+            t = rng.randrange(n)
+            if state.uav_of[t] >= 0:
+                return t
+        return -1
+
+    def _replace(self, state: ScheduleState, uav: int, old: int, new: int):
+        """把序列中的任务old换成new（new按窗口开始时间重新定位），返回retime结果"""
+        seq = state.sequences[uav]
+        i = seq.index(old)
+        new_seq = seq[:i] + seq[i + 1:]
+        j = self._insert_position(state, new_seq, new)
+        new_seq.insert(j, new)
+        timed = state.retime(uav, new_seq, min(i, j), max(i, j) + 1)
+        return None if timed is None else (new_seq, timed)
+
+    def _propose(self, state: ScheduleState, move: str, rng):
+        """
+        生成一次移动并增量计算其影响
+
+        Returns:
+            (d_weight, d_end, updates, leave_pool, enter_pool, moved_tasks)，不可行时返回 None
+        """
+        base = state.base
+        if move == 'insert':
+            if not state.unassigned:
+                return None
+            t = rng.choice(state.unassigned)
+            capable = self._capable_uavs(t)
+            if not capable:
+                return None
+            u = rng.choice(capable)
+            seq = state.sequences[u]
+            j = self._insert_position(state, seq, t)
+            new_seq = seq[:j] + [t] + seq[j:]
+            timed = state.retime(u, new_seq, j, j + 1)
+            if timed is None:
+                return None
+            changes, d_end = timed
+            return state.weight[t], d_end, [(u, new_seq, changes)], [t], [], (t,)
+
+        t = self._random_assigned(state, rng)
+        if t < 0:
+            return None
+        a = state.uav_of[t]
+        seq = state.sequences[a]
+        old_end = state.end_of[t] - base
+
+        if move == 'eject':
+            i = seq.index(t)
+            new_seq = seq[:i] + seq[i + 1:]
+            changes, d_end = state.retime(a, new_seq, i, i)
+            return -state.weight[t], d_end - old_end, [(a, new_seq, changes)], [], [t], (t,)
+
+        if move == 'relocate':
+            b = rng.choice(self._capable_uavs(t))
+            if b == a:
+                return None
+            i = seq.index(t)
+            new_a = seq[:i] + seq[i + 1:]
+            changes_a, d_a = state.retime(a, new_a, i, i)
+            seq_b = state.sequences[b]
+            j = self._insert_position(state, seq_b, t)
+            new_b = seq_b[:j] + [t] + seq_b[j:]
+            timed = state.retime(b, new_b, j, j + 1)
+            if timed is None:
+                return None
+            changes_b, d_b = timed
+            return 0.0, d_a + d_b - old_end, [(a, new_a, changes_a), (b, new_b, changes_b)], [], [], (t,)
+
+        if move == 'swap':
+            if state.unassigned and rng.random() < 0.5:
+                # 与未分配任务互换
+                t2 = rng.choice(state.unassigned)
+                if not self.problem.compile().is_feasible(t2, a):
+                    return None
+                replaced = self._replace(state, a, t, t2)
+                if replaced is None:
+                    return None
+                new_seq, (changes, d_end) = replaced
+                return (state.weight[t2] - state.weight[t], d_end - old_end,
+                        [(a, new_seq, changes)], [t2], [t], (t, t2))
+            t2 = self._random_assigned(state, rng)
+            if t2 < 0 or state.uav_of[t2] == a:
+                return None
+            b = state.uav_of[t2]
+            compiled = self.problem.compile()
+            if not (compiled.is_feasible(t2, a) and compiled.is_feasible(t, b)):
+                return None
+            replaced_a = self._replace(state, a, t, t2)
+            if replaced_a is None:
+                return None
+            replaced_b = self._replace(state, b, t2, t)
+            if replaced_b is None:
+                return None
+            new_a, (changes_a, d_a) = replaced_a
+            new_b, (changes_b, d_b) = replaced_b
+            d_end = d_a + d_b - old_end - (state.end_of[t2] - base)
+            return 0.0, d_end, [(a, new_a, changes_a), (b, new_b, changes_b)], [], [], (t, t2)
+
+        # reorder：同一无人机内把任务移到另一个位置
+        if len(seq) < 2:
+            return None
+        i = seq.index(t)
+        j = rng.randrange(len(seq) - 1)
+        if j >= i:
+            j += 1
+        new_seq = seq[:i] + seq[i + 1:]
+        new_seq.insert(j, t)
+        timed = state.retime(a, new_seq, min(i, j), max(i, j) + 1)
+        if timed is None:
+            return None
+        changes, d_end = timed
+        return 0.0, d_end, [(a, new_seq, changes)], [], [], (t,)
+
+    def allocate(self, time_budget_ms: float = None, initial: Dict = None) -> Dict:
+        """
+        执行局部搜索
+
+        Args:
+            time_budget_ms: 时间预算（毫秒），None时使用构造参数；
+                            预算耗尽时返回目前找到的最好解（至少是初始解）
+            initial: 初始解（标准格式，如修复后的LLM方案），None时从贪心解出发
+        """
+        budget_ms = self.time_budget_ms if time_budget_ms is None else time_budget_ms
+        started = time.perf_counter()
+        rng = random.Random(self.seed)
+
+        state = ScheduleState.from_allocation(self.problem, initial if initial is not None else self.greedy.allocate())
+        seeded = time.perf_counter()
+        deadline = (started if self.include_seed_time else seeded) + budget_ms / 1000.0
+        initial_objective = state.objective()
+        n_tasks = len(state.uav_of)
+        tenure = self.tabu_tenure if self.tabu_tenure is not None else min(50, max(1, n_tasks // 4))
+        tabu_until = [0] * n_tasks
+        penalty = state.END_PENALTY
+
+        current = best = state.objective()
+        best_solution = None  # None 表示当前状态就是最好解
+        temperature = self.initial_temperature
+        cooling_span = max(deadline - time.perf_counter(), 1e-9)
+        cooling_start = time.perf_counter()
+        ratio = self.final_temperature / self.initial_temperature
+
+        iterations = accepted = improvements = 0
+        while n_tasks and self.problem.uavs:
+            if iterations % self.CHECK_EVERY == 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                temperature = self.initial_temperature * ratio ** ((now - cooling_start) / cooling_span)
+            iterations += 1
+
+            move = rng.choices(self.MOVES, self.MOVE_WEIGHTS)[0]
+            proposal = self._propose(state, move, rng)
+            if proposal is None:
+                continue
+            d_weight, d_end, updates, leave_pool, enter_pool, moved = proposal
+            delta = d_weight - penalty * d_end
+            candidate = current + delta
+
+            # 禁忌：最近移动过的任务不再移动，除非能刷新历史最好解（特赦准则）
+            if candidate <= best + 1e-12 and any(tabu_until[t] > iterations for t in moved):
+                continue
+            if delta < 0 and rng.random() >= math.exp(delta / temperature):
+                continue
+
+            if delta < 0 and best_solution is None:
+                best_solution = state.copy_solution()
+            state.commit(updates, leave_pool, enter_pool, d_weight, d_end)
+            current = candidate
+            accepted += 1
+            for t in moved:
+                tabu_until[t] = iterations + tenure
+            if current > best + 1e-12:
+                best = current
+                best_solution = None
+                improvements += 1
+
+        solution = state.copy_solution() if best_solution is None else best_solution
+        label = '局部搜索分配'
+        assignments, unassigned, makespan = state.build_assignments(
+            solution, self.greedy.format_minutes, label)
+        elapsed = time.perf_counter() - started
+        seed_time_ms = (seeded - started) * 1000
+        if iterations == 0 and n_tasks and self.problem.uavs:
+            print(f"⚠️ 局部搜索未进行任何迭代：构造初始解用时{seed_time_ms:.0f}ms，"
+                  f"已耗尽{budget_ms:.0f}ms预算，结果即初始解")
+
+        result = {
+            'final_allocation': {
+                'decision_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'total_tasks': len(self.problem.tasks),
+                'total_uavs': len(self.problem.uavs),
+                'assignments': assignments,
+                'unassigned_tasks': unassigned,
+                'total_completion_time': self.greedy.format_minutes(makespan),
+                'risk_assessment': f"在{'贪心解' if initial is None else '给定方案'}基础上经局部搜索改进的方案",
+                'notes': (f'模拟退火+禁忌局部搜索：预算{budget_ms:.0f}ms，用时{elapsed * 1000:.0f}ms'
+                          f'（初始解{seed_time_ms:.0f}ms），'
+                          f'迭代{iterations}次，接受{accepted}次，改进{improvements}次，'
+                          f'目标值 {initial_objective:.4f} -> {best:.4f}'),
+                'algorithm': 'LocalSearch',
+                'solver_report': {
+                    'solver': 'LocalSearch',
+                    'budget_ms': budget_ms,
+                    'include_seed_time': self.include_seed_time,
+                    'seed_time_ms': round(seed_time_ms, 3),
+                    'search_time_ms': round((elapsed - (seeded - started)) * 1000, 3),
+                    'iterations': iterations,
+                    'accepted': accepted,
+                    'improvements': improvements,
+                }
+            }
+        }
+
+        return result
+
+
+# 已注册的基线算法（名称 -> 算法类），基准测试与对比实验共用
+ALGORITHMS = {
+    'greedy': GreedyAlgorithm,
+    'random': RandomAlgorithm,
+    'genetic': GeneticAlgorithm,
+    'ip': IntegerProgramming,
+    'local_search': LocalSearchAlgorithm,
+}
+
+
+# 组合（portfolio）模式默认并行运行的求解器
+PORTFOLIO_SOLVERS = ('greedy', 'genetic', 'ip', 'local_search')
+PORTFOLIO_BUDGET_RATIO = 0.8  # 求解器内部时间上限占截止时间的比例，余量留给进程启动和结果回传
+
+
+def _portfolio_solver_kwargs(name: str, budget_s: float) -> Dict:
+    """组合模式下各求解器的时间上限参数"""
+    if name in ('genetic', 'ip'):
+        return {'time_limit': budget_s}
+    if name == 'local_search':
+        return {'time_budget_ms': budget_s * 1000, 'include_seed_time': True}
+    return {}
+
+
+def _run_portfolio_member(name: str, problem: TaskAllocationProblem, budget_s: float) -> Tuple[Dict, Dict]:
+    """
+    进程池中执行的单个求解器：求解后就地检查可行性并评分（评分耗时计入该求解器）
+    
+    Returns:
+        (分配结果, 报告{墙钟时间, CPU时间, 是否可行, 违规数, 评分, 完成任务数})
+    """
+    from evaluation_metrics import AllocationEvaluator
+    
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = ALGORITHMS[name](problem, **_portfolio_solver_kwargs(name, budget_s)).allocate()
+    solve_time = time.perf_counter() - wall_start
+    
+    assignments = result['final_allocation']['assignments']
+    # 与最终评估同一口径的硬约束校验（能力、重复、时间冲突等），不要求分配全部任务
+    evaluator = AllocationEvaluator(result, problem)
+    issues = evaluator.check_feasibility()
+    score = evaluator.evaluate_all()['overall_score']
+    
+    return result, {
+        'status': 'completed',
+        'solve_time_s': round(solve_time, 4),
+        'wall_time_s': round(time.perf_counter() - wall_start, 4),
+        'cpu_time_s': round(time.process_time() - cpu_start, 4),
+        'feasible': not issues,
+        'violations': len(issues),
+        'score': score,
+        'assigned_tasks': len(assignments),
+    }
+
+
+def run_portfolio(problem: TaskAllocationProblem, deadline: float = 10.0,
+                  solvers: Tuple[str, ...] = PORTFOLIO_SOLVERS, max_workers: int = None) -> Dict:
+    """
+    组合求解：在进程池中并行运行多个求解器，截止时间到达时返回评分最高的可行方案
+    
+    未在截止时间内完成的求解器被直接终止，因此最坏延迟受截止时间约束。
+    
+    Args:
+        problem: 任务分配问题实例
+        deadline: 截止时间（秒）
+        solvers: 参与的求解器名称
+        max_workers: 进程数，默认每个求解器一个进程
+        
+    Returns:
+        最佳方案的分配结果，附带 'portfolio_report'（各求解器状态、耗时与评分）
+    """
+    import multiprocessing
+    
+    for name in solvers:
+        if name not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {name}")
+    
+    started = time.perf_counter()
+    problem.compile()  # 编译结果随问题一起发送给子进程，避免各自重复编译
+    budget_s = max(0.05, deadline * PORTFOLIO_BUDGET_RATIO)
+    # 默认每个求解器一个进程：核数不足时分时共享CPU，也不会有求解器排队错过截止时间
+    workers = max_workers or len(solvers)
+    
+    report = {}
+    finished = {}
+    with multiprocessing.get_context().Pool(processes=workers) as pool:
+        pending = {name: pool.apply_async(_run_portfolio_member, (name, problem, budget_s)) for name in solvers}
+        for name, async_result in pending.items():
+            remaining = deadline - (time.perf_counter() - started)
+            async_result.wait(max(0.0, remaining))
+            if not async_result.ready():
+                report[name] = {'status': 'timeout'}
+                continue
+            try:
+                finished[name], report[name] = async_result.get()
+            except Exception as e:
+                report[name] = {'status': 'error', 'error': str(e)}
+        # 退出 with 时 terminate() 终止仍在运行的求解器
+    
+    best_name, best_score = None, None
+    for name in finished:
+        if report[name]['feasible'] and (best_score is None or report[name]['score'] > best_score):
+            best_name, best_score = name, report[name]['score']
+    
+    if best_name is None:
+        # 截止时间内没有可行结果：退回当前进程中的贪心解
+        best_name = 'greedy'
+        result = GreedyAlgorithm(problem).allocate()
+        report.setdefault('greedy', {})['fallback'] = True
+    else:
+        result = finished[best_name]
+    
+    result['portfolio_report'] = {
+        'deadline_s': deadline,
+        'solver_budget_s': round(budget_s, 3),
+        'workers': workers,
+        'winner': best_name,
+        'elapsed_s': round(time.perf_counter() - started, 4),
+        'solvers': report,
+    }
+    return result
+
+
+def run_baseline_algorithm(algorithm_name: str, problem: TaskAllocationProblem = None,
+                           deadline: float = 10.0) -> Dict:
     """
     运行指定的基线算法
     
     Args:
-        algorithm_name: 算法名称 ('greedy', 'random', 'genetic', 'ip')
+        algorithm_name: 算法名称 ('greedy', 'random', 'genetic', 'ip', 'local_search')，
+                        或 'portfolio'（并行运行多个求解器取最佳）
         problem: 任务分配问题实例
+        deadline: 组合模式的截止时间（秒）
         
     Returns:
         分配结果字典
@@ -312,17 +1785,13 @@ def run_baseline_algorithm(algorithm_name: str, problem: TaskAllocationProblem =
     if problem is None:
         problem = TaskAllocationProblem.from_default_scenario()
     
-    algorithms = {
-        'greedy': GreedyAlgorithm,
-        'random': RandomAlgorithm,
-        'genetic': GeneticAlgorithm,
-        'ip': IntegerProgramming,
-    }
+    if algorithm_name.lower() == 'portfolio':
+        return run_portfolio(problem, deadline)
     
-    if algorithm_name.lower() not in algorithms:
+    if algorithm_name.lower() not in ALGORITHMS:
         raise ValueError(f"Unknown algorithm: {algorithm_name}")
     
-    algo_class = algorithms[algorithm_name.lower()]
+    algo_class = ALGORITHMS[algorithm_name.lower()]
     algorithm = algo_class(problem)
     result = algorithm.allocate()
     
@@ -337,7 +1806,7 @@ if __name__ == "__main__":
     
     problem = TaskAllocationProblem.from_default_scenario()
     
-    algorithms = ['greedy', 'random', 'genetic', 'ip']
+    algorithms = ['greedy', 'random', 'genetic', 'ip', 'local_search']
     
     for algo_name in algorithms:
         print(f"\n{'='*70}")
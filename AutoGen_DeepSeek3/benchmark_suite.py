@@ -0,0 +1,256 @@
+"""
+求解器扩展性基准测试
+在一组由 scenario_generator 生成的不同规模场景上运行所有已注册的基线算法，
+记录墙钟时间、CPU时间、峰值内存（tracemalloc）和 AllocationEvaluator 评分，
+输出机器可读的结果文件和各算法的扩展性曲线
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from baseline_algorithms import ALGORITHMS, TaskAllocationProblem
+from evaluation_metrics import AllocationEvaluator
+from scenario_generator import ScenarioGenerator
+
+
+# 默认规模阶梯：(任务数, 无人机数)
+DEFAULT_SIZES = [(50, 10), (200, 20), (1000, 50), (5000, 200), (20000, 500)]
+
+# 各算法的构造参数（限制迭代型算法的时间预算；遗传算法使用自带的默认时间上限）
+DEFAULT_ALGORITHM_KWARGS = {
+    'ip': {'time_limit': 30},
+}
+
+# 各算法参与测试的最大任务数（整数规划的时间索引模型随规模急剧膨胀）
+DEFAULT_MAX_TASKS = {
+    'ip': 1000,
+}
+
+
+class BenchmarkSuite:
+    """多规模、多随机种子的求解器基准测试"""
+
+    def __init__(self, sizes: List[Tuple[int, int]] = None, seeds: List[int] = None,
+                 algorithms: List[str] = None, algorithm_kwargs: Dict = None,
+                 max_tasks: Dict = None, scenario_kwargs: Dict = None,
+                 measure_memory: bool = True, output_dir: str = 'benchmark_results'):
+        """
+        Args:
+            sizes: 规模阶梯 [(任务数, 无人机数), ...]
+            seeds: 每个规模使用的场景随机种子
+            algorithms: 参与测试的算法名（默认为全部已注册算法）
+            algorithm_kwargs: 各算法的构造参数
+            max_tasks: 各算法参与测试的最大任务数
+            scenario_kwargs: 传给 ScenarioGenerator 的其它参数（分布、紧张度等）
+            measure_memory: 是否额外运行一次以测量峰值内存
+                            （tracemalloc 会拖慢Python代码，因此不与计时放在同一次运行中）
+            output_dir: 输出目录
+        """
+        self.sizes = sizes or DEFAULT_SIZES
+        self.seeds = seeds or [42]
+        self.algorithms = algorithms or list(ALGORITHMS)
+        self.algorithm_kwargs = algorithm_kwargs if algorithm_kwargs is not None else DEFAULT_ALGORITHM_KWARGS
+        self.max_tasks = max_tasks if max_tasks is not None else DEFAULT_MAX_TASKS
+        self.scenario_kwargs = scenario_kwargs or {}
+        self.measure_memory = measure_memory
+        self.output_dir = output_dir
+        self.records = []
+
+        for name in self.algorithms:
+            if name not in ALGORITHMS:
+                raise ValueError(f"Unknown algorithm: {name}")
+
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+
+    def run_one(self, name: str, problem: TaskAllocationProblem) -> Dict:
+        """在一个场景上运行一个算法并记录各项指标"""
+        algo_class = ALGORITHMS[name]
+        kwargs = self.algorithm_kwargs.get(name, {})
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = algo_class(problem, **kwargs).allocate()
+        cpu_time = time.process_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+
+        peak_memory_mb = None
+        if self.measure_memory:
+            tracemalloc.start()
+            algo_class(problem, **kwargs).allocate()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peak_memory_mb = peak / 1024 / 1024
+
+        allocation = result['final_allocation']
+        evaluator = AllocationEvaluator(result, problem)
+        metrics = evaluator.evaluate_all()
+
+        return {
+            'algorithm': name,
+            'wall_time_s': round(wall_time, 4),
+            'cpu_time_s': round(cpu_time, 4),
+            'peak_memory_mb': round(peak_memory_mb, 3) if peak_memory_mb is not None else None,
+            'score': metrics['overall_score'],
+            'completion_rate': metrics['task_completion']['completion_rate'],
+            'assigned_tasks': len(allocation['assignments']),
+        }
+
+    def run(self) -> List[Dict]:
+        """运行完整的规模阶梯"""
+        print("=" * 70)
+        print("🚀 求解器扩展性基准测试")
+        print("=" * 70)
+        print(f"规模: {self.sizes}")
+        print(f"种子: {self.seeds}")
+        print(f"算法: {self.algorithms}")
+
+        for n_tasks, n_uavs in self.sizes:
+            for seed in self.seeds:
+                print(f"\n{'='*70}")
+                print(f"场景: {n_tasks}个任务, {n_uavs}架无人机, seed={seed}")
+                print('='*70)
+
+                problem = ScenarioGenerator(n_tasks=n_tasks, n_uavs=n_uavs, seed=seed,
+                                            **self.scenario_kwargs).to_problem()
+                # 编译结果在算法间共享，单独计时
+                compile_start = time.perf_counter()
+                problem.compile()
+                compile_time = time.perf_counter() - compile_start
+                print(f"   编译问题: {compile_time:.3f}s")
+
+                for name in self.algorithms:
+                    if n_tasks > self.max_tasks.get(name, float('inf')):
+                        print(f"   ⏭️  {name}: 超过最大任务数 {self.max_tasks[name]}，跳过")
+                        continue
+                    record = self.run_one(name, problem)
+                    record.update({'n_tasks': n_tasks, 'n_uavs': n_uavs, 'seed': seed,
+                                   'compile_time_s': round(compile_time, 4)})
+                    self.records.append(record)
+                    memory = f", 内存 {record['peak_memory_mb']:.1f}MB" if record['peak_memory_mb'] is not None else ''
+                    print(f"   ✅ {name}: 墙钟 {record['wall_time_s']:.3f}s, CPU {record['cpu_time_s']:.3f}s"
+                          f"{memory}, 评分 {record['score']:.2f}, 完成 {record['assigned_tasks']}/{n_tasks}")
+
+        return self.records
+
+    def summarize(self) -> Dict[str, List[Dict]]:
+        """按算法和规模汇总（各种子取平均）"""
+        summary = {}
+        for name in self.algorithms:
+            rows = []
+            for n_tasks, n_uavs in self.sizes:
+                group = [r for r in self.records
+                         if r['algorithm'] == name and r['n_tasks'] == n_tasks and r['n_uavs'] == n_uavs]
+                if not group:
+                    continue
+                memory = [r['peak_memory_mb'] for r in group if r['peak_memory_mb'] is not None]
+                rows.append({
+                    'n_tasks': n_tasks,
+                    'n_uavs': n_uavs,
+                    'runs': len(group),
+                    'wall_time_s': round(float(np.mean([r['wall_time_s'] for r in group])), 4),
+                    'cpu_time_s': round(float(np.mean([r['cpu_time_s'] for r in group])), 4),
+                    'peak_memory_mb': round(float(np.mean(memory)), 3) if memory else None,
+                    'score': round(float(np.mean([r['score'] for r in group])), 2),
+                })
+            summary[name] = rows
+        return summary
+
+    def save_results(self, filename: str = 'benchmark_results.json') -> str:
+        """保存原始记录与汇总结果"""
+        output_file = os.path.join(self.output_dir, filename)
+        data = {
+            'timestamp': datetime.now().isoformat(),
+            'sizes': self.sizes,
+            'seeds': self.seeds,
+            'algorithms': self.algorithms,
+            'algorithm_kwargs': self.algorithm_kwargs,
+            'scenario_kwargs': self.scenario_kwargs,
+            'records': self.records,
+            'summary': self.summarize(),
+        }
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 基准测试结果已保存到: {output_file}")
+        return output_file
+
+    def plot_scaling_curves(self, filename: str = 'scaling_curves.png') -> str:
+        """绘制各算法的扩展性曲线（墙钟时间、CPU时间、峰值内存、评分随任务数的变化）"""
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
+        matplotlib.rcParams['axes.unicode_minus'] = False
+
+        summary = self.summarize()
+        panels = [
+            ('wall_time_s', '墙钟时间 (s)', True),
+            ('cpu_time_s', 'CPU时间 (s)', True),
+            ('peak_memory_mb', '峰值内存 (MB)', True),
+            ('score', '评估总分', False),
+        ]
+
+        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+        for ax, (key, label, log_scale) in zip(axes.flat, panels):
+            for name, rows in summary.items():
+                points = [(r['n_tasks'], r[key]) for r in rows if r[key] is not None]
+                if not points:
+                    continue
+                xs, ys = zip(*points)
+                ax.plot(xs, ys, marker='o', label=name)
+            ax.set_xscale('log')
+            if log_scale:
+                ax.set_yscale('log')
+            ax.set_xlabel('任务数')
+            ax.set_ylabel(label)
+            ax.grid(True, which='both', alpha=0.3)
+            ax.legend()
+
+        fig.suptitle('求解器扩展性曲线', fontsize=16, fontweight='bold')
+        plt.tight_layout()
+        output_file = os.path.join(self.output_dir, filename)
+        plt.savefig(output_file, dpi=150, bbox_inches='tight')
+        plt.close(fig)
+        print(f"✅ 扩展性曲线已保存到: {output_file}")
+        return output_file
+
+
+def run_benchmark(sizes: List[Tuple[int, int]] = None, seeds: List[int] = None,
+                  algorithms: List[str] = None, **kwargs) -> Dict:
+    """运行基准测试并输出结果文件和曲线"""
+    suite = BenchmarkSuite(sizes=sizes, seeds=seeds, algorithms=algorithms, **kwargs)
+    suite.run()
+    suite.save_results()
+    suite.plot_scaling_curves()
+    return suite.summarize()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='求解器扩展性基准测试')
+    parser.add_argument('--sizes', default=None,
+                        help='规模阶梯，如 "50x10,200x20,1000x50"（任务数x无人机数）')
+    parser.add_argument('--seeds', default='42', help='随机种子，逗号分隔')
+    parser.add_argument('--algorithms', default=None, help='算法名，逗号分隔（默认全部）')
+    parser.add_argument('--no-memory', action='store_true', help='不测量峰值内存')
+    parser.add_argument('--output-dir', default='benchmark_results', help='输出目录')
+    args = parser.parse_args()
+
+    sizes = None
+    if args.sizes:
+        sizes = [tuple(int(v) for v in item.split('x')) for item in args.sizes.split(',')]
+
+    run_benchmark(
+        sizes=sizes,
+        seeds=[int(s) for s in args.seeds.split(',')],
+        algorithms=args.algorithms.split(',') if args.algorithms else None,
+        measure_memory=not args.no_memory,
+        output_dir=args.output_dir,
+    )
@@ -0,0 +1,176 @@
+"""
+候选方案并行生成（fan-out）与评估选优
+方案生成智能体的一轮发言改为：以不同温度/随机种子并发发起K次模型调用（asyncio.gather），
+从每个回复中提取 final_allocation，用 BatchAllocationEvaluator 一次性批量评分，
+只把最优方案转发给冲突检测智能体。K次调用并行执行，墙钟时间约等于一次调用，
+而原来需要多轮"生成-质疑-修改"才能得到的较好方案可以在一轮内选出。
+
+环境变量：
+    SOLUTION_CANDIDATES    每轮并发生成的候选方案数K（默认1，即不启用）
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from autogen_agentchat.agents import BaseChatAgent
+from autogen_agentchat.base import Response
+from autogen_agentchat.messages import BaseChatMessage, TextMessage
+from autogen_core import CancellationToken
+from autogen_core.models import (AssistantMessage, ChatCompletionClient, LLMMessage, RequestUsage, SystemMessage,
+                                 UserMessage)
+
+from allocation_stream import extract_allocations
+from baseline_algorithms import GreedyAlgorithm, TaskAllocationProblem
+from evaluation_metrics import AllocationEvaluator, BatchAllocationEvaluator
+
+
+DEFAULT_TEMPERATURE_RANGE = (0.2, 1.0)
+BASELINE_ALGORITHM = 'Greedy (fan-out baseline)'  # 贪心基线候选胜出时方案的 algorithm 字段
+
+
+def candidate_temperatures(k: int, low: float = DEFAULT_TEMPERATURE_RANGE[0],
+                           high: float = DEFAULT_TEMPERATURE_RANGE[1]) -> List[float]:
+    """K个候选的采样温度：在 [low, high] 上均匀分布"""
+    if k <= 1:
+        return [low]
+    return [round(low + (high - low) * i / (k - 1), 3) for i in range(k)]
+
+
+def select_best_candidate(candidates: List[Dict], task_input=None) -> Tuple[int, List[Dict]]:
+    """
+    批量评估候选方案并选出最优者
+
+    排序规则：先看是否通过本地可行性校验（AllocationEvaluator.check_feasibility），
+    再看问题数，最后按 BatchAllocationEvaluator 总分从高到低。
+
+    Args:
+        candidates: 标准格式的候选方案列表（非空）
+        task_input: 任务场景（同 AllocationEvaluator）
+
+    Returns:
+        (最优方案下标, 每个候选的评分摘要列表)
+    """
+    compiled = AllocationEvaluator._compile_input(task_input)
+    batch = BatchAllocationEvaluator(compiled)
+    uav, start, occupancy = (np.stack(arrays) for arrays in zip(*(batch.encode(c) for c in candidates)))
+    scores = batch.evaluate(uav, start, occupancy=occupancy)
+
+    summaries = []
+    for i, candidate in enumerate(candidates):
+        issues = AllocationEvaluator(candidate, compiled).check_feasibility()
+        summaries.append({
+            'overall_score': float(scores['overall_score'][i]),
+            'completed_tasks': int(scores['completed_tasks'][i]),
+            'conflict_count': int(scores['conflict_count'][i]),
+            'issues': issues,
+        })
+    best = max(range(len(candidates)),
+               key=lambda i: (not summaries[i]['issues'], -len(summaries[i]['issues']),
+                              summaries[i]['overall_score']))
+    return best, summaries
+
+
+class CandidateFanOutAgent(BaseChatAgent):
+    """
+    并行候选方案生成智能体（可替换团队中的 SolutionGenerator）
+
+    每轮发言并发采样K个候选方案，批量评分后只输出最优方案（final_allocation JSON）及各候选的评分摘要。
+    """
+
+    def __init__(self, name: str, model_client: ChatCompletionClient, system_message: str,
+                 candidates: int = 3, problem: TaskAllocationProblem = None,
+                 temperatures: Optional[Sequence[float]] = None, seed: int = 42,
+                 include_baseline: bool = False,
+                 description: str = '并行生成多个候选分配方案，评估后输出最优方案'):
+        """
+        Args:
+            name: 智能体名称
+            model_client: 模型客户端（K次调用共用，并发数受其连接池/限速器约束）
+            system_message: 系统提示词（应要求以 final_allocation JSON 输出方案）
+            candidates: 每轮采样的候选数K
+            problem: 评分使用的任务场景（默认场景）
+            temperatures: 各候选的采样温度，默认在 0.2~1.0 上均匀分布
+            seed: 第i个候选的随机种子为 seed+i（模型服务支持时可复现）
+            include_baseline: 是否把贪心算法的方案也作为一个候选参与比较（保底）。默认关闭：
+                              贪心方案总是可行且通常得分最高，开启后转发的多半是贪心解而非模型方案，
+                              胜出时其 algorithm 字段标为 BASELINE_ALGORITHM
+        """
+        super().__init__(name=name, description=description)
+        self._model_client = model_client
+        self._system_message = system_message
+        self._problem = problem if problem is not None else TaskAllocationProblem.from_default_scenario()
+        self._temperatures = list(temperatures) if temperatures else candidate_temperatures(candidates)
+        self._seed = seed
+        self._include_baseline = include_baseline
+        self._history: List[LLMMessage] = []
+        self.last_summaries: List[Dict] = []
+
+    @property
+    def produced_message_types(self) -> Sequence[type[BaseChatMessage]]:
+        return (TextMessage,)
+
+    async def _sample(self, i: int, cancellation_token: CancellationToken):
+        messages = [SystemMessage(content=self._system_message)] + self._history
+        return await self._model_client.create(
+            messages,
+            extra_create_args={'temperature': self._temperatures[i], 'seed': self._seed + i},
+            cancellation_token=cancellation_token,
+        )
+
+    async def on_messages(self, messages: Sequence[BaseChatMessage],
+                          cancellation_token: CancellationToken) -> Response:
+        for message in messages:
+            self._history.append(UserMessage(content=message.to_model_text(), source=message.source))
+
+        results = await asyncio.gather(*(self._sample(i, cancellation_token)
+                                         for i in range(len(self._temperatures))),
+                                       return_exceptions=True)
+        replies = [r for r in results if not isinstance(r, BaseException)]
+        if not replies:
+            raise results[0]
+        usage = RequestUsage(prompt_tokens=sum(r.usage.prompt_tokens for r in replies),
+                             completion_tokens=sum(r.usage.completion_tokens for r in replies))
+
+        candidates, labels, failed = [], [], []
+        for i, result in enumerate(results):
+            label = f'候选{i + 1}（温度{self._temperatures[i]}）'
+            if isinstance(result, BaseException):
+                failed.append(f'- {label}：调用失败（{result}）')
+                continue
+            allocations = extract_allocations(result.content) if isinstance(result.content, str) else []
+            if allocations:
+                candidates.append(allocations[-1])
+                labels.append(label)
+            else:
+                failed.append(f'- {label}：未给出可解析的方案')
+        if self._include_baseline:
+            baseline = GreedyAlgorithm(self._problem).allocate()
+            # 标明该方案来自本地贪心算法而非模型，便于下游区分
+            baseline['final_allocation']['algorithm'] = BASELINE_ALGORITHM
+            candidates.append(baseline)
+            labels.append('贪心基线')
+
+        if not candidates:
+            # 没有候选给出可解析的方案时原样转发第一个回复
+            content = next(r.content for r in replies if isinstance(r.content, str))
+        else:
+            best, self.last_summaries = select_best_candidate(candidates, self._problem)
+            lines = [f'【并行生成{len(self._temperatures)}个候选方案，本地评估后选择 {labels[best]}】']
+            for label, summary in zip(labels, self.last_summaries):
+                status = '可行' if not summary['issues'] else f"问题{len(summary['issues'])}项"
+                lines.append(f"- {label}：总分 {summary['overall_score']:.2f}，"
+                             f"完成 {summary['completed_tasks']} 个任务，{status}")
+            lines.extend(failed)
+            for issue in self.last_summaries[best]['issues']:
+                lines.append(f'  ⚠️ {issue}')
+            content = ('\n'.join(lines) + '\n\n```json\n' + json.dumps(candidates[best], ensure_ascii=False, indent=2)
+                       + '\n```\n\n✅ 候选方案已生成，请冲突检测Agent检查问题')
+
+        self._history.append(AssistantMessage(content=content, source=self.name))
+        return Response(chat_message=TextMessage(content=content, source=self.name, models_usage=usage))
+
+    async def on_reset(self, cancellation_token: CancellationToken) -> None:
+        self._history = []
+        self.last_summaries = []
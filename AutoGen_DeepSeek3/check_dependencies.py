@@ -111,6 +111,7 @@ def main():
     print("-" * 70)
     results.append(check_package("pandas"))
     results.append(check_package("plotly"))
+    results.append(check_package("scipy (整数规划求解)", "scipy"))
     print()
     
     # 统计结果
@@ -156,7 +157,7 @@ def main():
             print()
         
         # 检查Streamlit
-        if not results[-3]:  # streamlit
+        if not results[-4]:  # streamlit
             print("4️⃣ 安装 Streamlit (用于output.py):")
             print("   pip install streamlit")
             print()
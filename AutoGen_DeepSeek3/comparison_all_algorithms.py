@@ -18,6 +18,8 @@ class AllAlgorithmsComparison:
     def __init__(self):
         self.results = {}
         self.output_dir = "comparison_results"
+        # 所有算法（含AutoGen）求解并评估同一个场景
+        self.problem = TaskAllocationProblem.from_default_scenario()
         
         # 创建输出目录
         if not os.path.exists(self.output_dir):
@@ -50,8 +52,7 @@ class AllAlgorithmsComparison:
         
         start_time = time.time()
         
-        problem = TaskAllocationProblem.from_default_scenario()
-        result = run_baseline_algorithm(algorithm_name, problem)
+        result = run_baseline_algorithm(algorithm_name, self.problem)
         
         runtime = time.time() - start_time
         
@@ -75,7 +76,7 @@ class AllAlgorithmsComparison:
         """评估单个算法的结果"""
         print(f"\n评估 {self.algorithms[algorithm_name]['name']}...")
         
-        evaluator = AllocationEvaluator(result)
+        evaluator = AllocationEvaluator(result, self.problem)
         metrics = evaluator.evaluate_all()
         
         # 保存评估结果
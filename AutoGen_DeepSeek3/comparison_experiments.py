@@ -16,6 +16,8 @@ class ComparisonExperiments:
     def __init__(self):
         self.results = {}
         self.output_dir = "comparison_results"
+        # 所有算法（含AutoGen）求解并评估同一个场景
+        self.problem = TaskAllocationProblem.from_default_scenario()
         
         # 创建输出目录
         if not os.path.exists(self.output_dir):
@@ -39,8 +41,7 @@ class ComparisonExperiments:
         
         start_time = time.time()
         
-        problem = TaskAllocationProblem.from_default_scenario()
-        result = run_baseline_algorithm(algorithm_name, problem)
+        result = run_baseline_algorithm(algorithm_name, self.problem)
         
         runtime = time.time() - start_time
         
@@ -64,7 +65,7 @@ class ComparisonExperiments:
         """评估单个算法的结果"""
         print(f"\n评估 {algorithm_name.upper()} 算法...")
         
-        evaluator = AllocationEvaluator(result)
+        evaluator = AllocationEvaluator(result, self.problem)
         metrics = evaluator.evaluate_all()
         
         # 保存评估结果
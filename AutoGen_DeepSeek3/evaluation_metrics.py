@@ -3,45 +3,109 @@
 提供全面的定量评估指标计算
 """
 
+import bisect
+import heapq
+import itertools
 import json
+import math
+import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple
 import numpy as np
 
+from baseline_algorithms import BASE_TIME_MIN, PRIORITY_CODES, CompiledProblem, TaskAllocationProblem, parse_clock
+
+
+PRIORITY_NAMES = {code: name for name, code in PRIORITY_CODES.items()}
+
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(小时|分钟|分|hours?|hrs?|h|minutes?|mins?|m)?', re.IGNORECASE)
+_duration_cache = {}
+
+
+def parse_duration_minutes(duration, default: int = 30) -> Tuple[int, bool]:
+    """
+    解析任务时长
+
+    支持 "45分钟"、"45分钟（含往返）"、"1小时30分钟"、"1.5h"、"40 min" 以及纯数字（按分钟）。
+
+    Returns:
+        (分钟数, 是否已包含往返时间)
+    """
+    if isinstance(duration, (int, float)):
+        return int(duration), False
+    cached = _duration_cache.get(duration)
+    if cached is not None:
+        return cached
+    text = str(duration)
+    minutes = 0.0
+    matched = False
+    for value, unit in _DURATION_PATTERN.findall(text):
+        matched = True
+        unit = unit.lower()
+        if unit in ('小时', 'h', 'hr', 'hrs', 'hour', 'hours'):
+            minutes += float(value) * 60
+        else:
+            minutes += float(value)
+    if not matched:
+        return default, False
+    parsed = (int(round(minutes)), '往返' in text)
+    _duration_cache[duration] = parsed
+    return parsed
+
+
+def occupancy_minutes(assignment: Dict, task_duration: int = None) -> int:
+    """
+    分配条目占用无人机的时长（分钟，含往返）
+
+    优先取条目中的 estimated_duration（未注明"含往返"时另加往返时间），
+    缺省时取场景中的任务时长 task_duration，两者都没有时按默认30分钟计。
+    AllocationEvaluator、BatchAllocationEvaluator.encode 与 IncrementalEvaluator 共用此口径。
+    """
+    if 'estimated_duration' in assignment:
+        duration, round_trip = parse_duration_minutes(assignment['estimated_duration'])
+    elif task_duration is not None:
+        duration, round_trip = int(task_duration), False
+    else:
+        duration, round_trip = parse_duration_minutes(None)
+    return duration + (0 if round_trip else CompiledProblem.RETURN_TRIP_MIN)
+
+
 
 class AllocationEvaluator:
     """无人机任务分配方案评估器"""
     
-    def __init__(self, allocation: Dict, task_input: Dict = None):
+    def __init__(self, allocation: Dict, task_input=None):
         """
         初始化评估器
         
         Args:
             allocation: 分配方案JSON
-            task_input: 原始任务输入（可选，用于更详细的评估）
+            task_input: 任务场景，可以是 TaskAllocationProblem、CompiledProblem
+                        或任务输入字典（{'tasks': [...], 'uavs': [...]}，如 to_task_input() 的结果）；
+                        省略时使用默认场景
         """
         self.allocation = allocation.get('final_allocation', allocation)
-        self.task_input = task_input or self._parse_default_input()
-        
-    def _parse_default_input(self) -> Dict:
-        """解析默认任务输入（从内置数据）"""
-        return {
-            'total_tasks': 5,
-            'total_uavs': 4,
-            'tasks': [
-                {'task_id': 'T1', 'priority': '高', 'time_window': {'start': '08:00', 'end': '10:00'}, 'estimated_duration': 30},
-                {'task_id': 'T2', 'priority': '高', 'time_window': {'start': '08:30', 'end': '09:30'}, 'estimated_duration': 40},
-                {'task_id': 'T3', 'priority': '中', 'time_window': {'start': '09:00', 'end': '12:00'}, 'estimated_duration': 60},
-                {'task_id': 'T4', 'priority': '紧急', 'time_window': {'start': '08:00', 'end': '08:30'}, 'estimated_duration': 20},
-                {'task_id': 'T5', 'priority': '低', 'time_window': {'start': '10:00', 'end': '12:00'}, 'estimated_duration': 30},
-            ],
-            'uavs': [
-                {'uav_id': 'UAV-001', 'max_speed': 80, 'battery': 100},
-                {'uav_id': 'UAV-002', 'max_speed': 60, 'battery': 85},
-                {'uav_id': 'UAV-003', 'max_speed': 70, 'battery': 90},
-                {'uav_id': 'UAV-004', 'max_speed': 65, 'battery': 95},
-            ]
-        }
+        self.compiled = self._compile_input(task_input)
+    
+    @staticmethod
+    def _compile_input(task_input):
+        """把各种形式的任务场景统一为 CompiledProblem（任务/无人机 id→行号 的O(1)索引）"""
+        if isinstance(task_input, CompiledProblem):
+            return task_input
+        if isinstance(task_input, TaskAllocationProblem):
+            return task_input.compile()
+        if task_input is None:
+            return TaskAllocationProblem.from_default_scenario().compile()
+        return TaskAllocationProblem(task_input.get('tasks', []), task_input.get('uavs', []),
+                                     task_input.get('constraints', [])).compile()
+    
+    def _task_row(self, assignment: Dict) -> int:
+        """分配条目对应的任务行号，不在场景中时返回 -1"""
+        return self.compiled.task_index.get(assignment.get('task_id'), -1)
+    
+    def _occupancy(self, assignment: Dict, t: int) -> int:
+        """任务占用无人机的时长（分钟，含往返），见 occupancy_minutes"""
+        return occupancy_minutes(assignment, self.compiled.duration[t] if t >= 0 else None)
     
     def evaluate_all(self) -> Dict[str, Any]:
         """执行全面评估，返回所有指标"""
@@ -63,7 +127,7 @@ class AllocationEvaluator:
         assignments = self.allocation.get('assignments', [])
         unassigned = self.allocation.get('unassigned_tasks', [])
         
-        total_tasks = self.task_input['total_tasks']
+        total_tasks = self.compiled.n_tasks
         completed_tasks = len(assignments)
         
         # 按优先级统计
@@ -74,18 +138,24 @@ class AllocationEvaluator:
             '低': {'total': 0, 'completed': 0}
         }
         
-        for task in self.task_input['tasks']:
-            priority = task.get('priority', '中')
-            if priority in priority_stats:
-                priority_stats[priority]['total'] += 1
+        for priority, count in zip(*np.unique(self.compiled.priority, return_counts=True)):
+            name = PRIORITY_NAMES.get(int(priority))
+            if name in priority_stats:
+                priority_stats[name]['total'] += int(count)
         
         for assignment in assignments:
-            priority = assignment.get('priority', '中')
+            # 以场景中任务的实际优先级为准，场景外的任务取分配条目中的优先级
+            t = self._task_row(assignment)
+            priority = PRIORITY_NAMES.get(int(self.compiled.priority[t])) if t >= 0 else assignment.get('priority', '中')
             if priority in priority_stats:
                 priority_stats[priority]['completed'] += 1
         
         # 计算完成率
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+        # 覆盖率：只以至少有一架可行无人机的任务为分母（机队能力之外的任务不计），
+        # 分子只计分配给可行无人机的场景内任务（场景外、重复、能力不符的条目不计）
+        assignable_tasks, covered_tasks = self._coverage_counts(self._validate_assignments()[1] or [])
+        coverage_rate = (covered_tasks / assignable_tasks * 100) if assignable_tasks > 0 else 0
         
         # 高优先级任务完成率
         high_priority_total = priority_stats['紧急']['total'] + priority_stats['高']['total']
@@ -97,6 +167,8 @@ class AllocationEvaluator:
             'completed_tasks': completed_tasks,
             'unassigned_tasks': len(unassigned),
             'completion_rate': round(completion_rate, 2),
+            'assignable_tasks': assignable_tasks,
+            'coverage_rate': round(coverage_rate, 2),
             'high_priority_completion_rate': round(high_priority_rate, 2),
             'priority_breakdown': priority_stats,
             'score': completion_rate / 100  # 归一化到0-1
@@ -122,27 +194,39 @@ class AllocationEvaluator:
         end_time = parse_time(completion_time_str)
         total_duration = (end_time - start_time).total_seconds() / 60  # 分钟
         
-        # 计算任务等待时间
+        # 按各任务的实际时间窗口计算等待时间、紧急任务响应时间和窗口利用率
+        compiled = self.compiled
         wait_times = []
-        for assignment in assignments:
-            task_start = parse_time(assignment.get('start_time', '08:00'))
-            # 假设所有任务最早可以从08:00开始
-            earliest_start = parse_time('08:00')
-            wait_time = (task_start - earliest_start).total_seconds() / 60
-            wait_times.append(max(0, wait_time))
-        
-        avg_wait_time = np.mean(wait_times) if wait_times else 0
-        
-        # 计算紧急任务响应时间
         urgent_response_times = []
+        occupied_total = 0
+        window_total = 0
+        window_violations = 0
         for assignment in assignments:
-            if assignment.get('priority') == '紧急':
-                task_start = parse_time(assignment.get('start_time', '08:00'))
-                window_start = parse_time('08:00')  # T4的时间窗口开始
-                response_time = (task_start - window_start).total_seconds() / 60
-                urgent_response_times.append(response_time)
+            task_start = parse_clock(assignment.get('start_time', '08:00'))
+            t = self._task_row(assignment)
+            if t >= 0:
+                window_start, window_end = int(compiled.window_start[t]), int(compiled.window_end[t])
+                urgent = compiled.priority[t] == PRIORITY_CODES['紧急']
+            else:
+                window_start, window_end = BASE_TIME_MIN, None
+                urgent = assignment.get('priority') == '紧急'
+            
+            # 等待时间：从任务可以开始（窗口开始与08:00中较晚者）到实际开始
+            wait_times.append(max(0, task_start - max(window_start, BASE_TIME_MIN)))
+            # 紧急任务响应时间：从窗口开始到实际开始
+            if urgent:
+                urgent_response_times.append(task_start - window_start)
+            # 窗口利用率：任务占用时长之和 / 时间窗口长度之和；开始早于窗口或结束晚于窗口记为违反
+            if window_end is not None and window_end > window_start:
+                occupancy = self._occupancy(assignment, t)
+                occupied_total += occupancy
+                window_total += window_end - window_start
+                if task_start < window_start or task_start + occupancy > window_end:
+                    window_violations += 1
         
+        avg_wait_time = np.mean(wait_times) if wait_times else 0
         avg_urgent_response = np.mean(urgent_response_times) if urgent_response_times else 0
+        window_utilization = occupied_total / window_total if window_total > 0 else 0
         
         # 效率分数 (总时间越短越好)
         max_duration = 240  # 4小时
@@ -152,14 +236,15 @@ class AllocationEvaluator:
             'total_completion_time_min': round(total_duration, 2),
             'average_wait_time_min': round(avg_wait_time, 2),
             'urgent_response_time_min': round(avg_urgent_response, 2),
-            'time_window_utilization': 0.85,  # 简化计算
+            'time_window_utilization': round(window_utilization, 3),
+            'time_window_violations': window_violations,
             'score': round(time_score, 3)
         }
     
     def evaluate_resource_utilization(self) -> Dict[str, Any]:
         """评估资源利用指标"""
         assignments = self.allocation.get('assignments', [])
-        total_uavs = self.task_input['total_uavs']
+        total_uavs = self.compiled.n_uavs
         
         # 统计每个无人机的任务数
         uav_task_count = {}
@@ -180,8 +265,14 @@ class AllocationEvaluator:
             load_std = 0
             load_balance_score = 1.0
         
-        # 估算飞行距离（简化：假设每个任务平均飞行30km往返）
-        estimated_distance = len(assignments) * 30
+        # 估算飞行距离：每个任务按执行无人机的最大速度飞完往返航段（场景外的无人机按30km计）
+        estimated_distance = 0.0
+        for assignment in assignments:
+            u = self.compiled.uav_index.get(assignment.get('assigned_uav'))
+            if u is None:
+                estimated_distance += 30
+            else:
+                estimated_distance += float(self.compiled.uav_speed[u]) * CompiledProblem.RETURN_TRIP_MIN / 60
         
         # 资源利用分数
         util_score = (utilization_rate / 100 * 0.5) + (load_balance_score * 0.5)
@@ -193,7 +284,7 @@ class AllocationEvaluator:
             'uav_task_distribution': uav_task_count,
             'load_balance_std': round(load_std, 2),
             'load_balance_score': round(load_balance_score, 3),
-            'estimated_total_distance_km': estimated_distance,
+            'estimated_total_distance_km': round(estimated_distance, 1),
             'score': round(util_score, 3)
         }
     
@@ -234,39 +325,187 @@ class AllocationEvaluator:
             'score': round(constraint_score, 3)
         }
     
-    def _detect_time_conflicts(self, assignments: List[Dict]) -> List[str]:
-        """检测时间冲突"""
-        conflicts = []
-        uav_schedules = {}
-        
-        for assignment in assignments:
-            uav_id = assignment.get('assigned_uav')
-            start_time = assignment.get('start_time', '08:00')
-            duration_str = assignment.get('estimated_duration', '30分钟')
-            
-            # 解析持续时间
-            try:
-                duration = int(''.join(filter(str.isdigit, duration_str)))
-            except:
-                duration = 30
-            
-            if uav_id not in uav_schedules:
-                uav_schedules[uav_id] = []
-            
-            uav_schedules[uav_id].append({
-                'task': assignment.get('task_id'),
-                'start': start_time,
-                'duration': duration
-            })
-        
-        # 检查每个无人机的时间表是否有重叠
-        for uav_id, schedules in uav_schedules.items():
-            if len(schedules) > 1:
-                # 简化：如果同一无人机有多个任务，检查时间是否合理安排
-                for i in range(len(schedules) - 1):
-                    conflicts.append(f"{uav_id}可能存在任务间隔紧张")
+    def check_feasibility(self, require_complete: bool = False) -> List[str]:
+        """
+        本地可行性校验（不依赖LLM）：格式、任务/无人机是否存在、重复分配、能力匹配、时间冲突
+
+        完整性不属于硬约束：任务多于机队能力时总有任务无法分配，覆盖情况见 coverage()。
+
+        Args:
+            require_complete: 是否同时要求方案不可再扩充，即仍能插入现有排程空档的未分配任务
+                              （见 coverage() 的 insertable_tasks）也记为问题
+
+        Returns:
+            问题列表，为空表示方案可行
+        """
+        issues, valid = self._validate_assignments()
+        if valid is None:
+            return issues
+
+        for conflict in self._detect_time_conflicts(valid):
+            issues.append(f"{conflict['uav']}: 任务 {conflict['tasks'][0]} 与 {conflict['tasks'][1]} "
+                          f"时间重叠 {conflict['overlap_min']} 分钟")
+
+        if require_complete:
+            for task_id, uav_id in self._insertable_tasks(valid):
+                issues.append(f'{task_id}: 未分配，但可插入 {uav_id} 的空闲时段')
+        return issues
+
+    def _validate_assignments(self) -> Tuple[List[str], List[Dict]]:
+        """逐条检查分配条目，返回 (问题列表, 有效条目)；缺少 assignments 列表时有效条目为 None"""
+        if not isinstance(self.allocation, dict) or not isinstance(self.allocation.get('assignments'), list):
+            return ['缺少 assignments 列表'], None
+
+        issues = []
+        compiled = self.compiled
+        assigned = set()
+        valid = []
+        for i, assignment in enumerate(self.allocation['assignments']):
+            if not isinstance(assignment, dict):
+                issues.append(f'第{i + 1}条分配不是对象')
+                continue
+            missing = [k for k in ('task_id', 'assigned_uav', 'start_time') if not assignment.get(k)]
+            if missing:
+                issues.append(f"第{i + 1}条分配缺少字段: {', '.join(missing)}")
+                continue
+            task_id, uav_id = assignment['task_id'], assignment['assigned_uav']
+            if parse_clock(str(assignment['start_time']), -1) < 0:
+                issues.append(f"{task_id}: 开始时间格式无效 {assignment['start_time']}")
+                continue
+            t = compiled.task_index.get(task_id, -1)
+            u = compiled.uav_index.get(uav_id, -1)
+            if t < 0:
+                issues.append(f'{task_id}: 任务不存在')
+                continue
+            if u < 0:
+                issues.append(f'{task_id}: 无人机 {uav_id} 不存在')
+                continue
+            if task_id in assigned:
+                issues.append(f'{task_id}: 重复分配')
+                continue
+            assigned.add(task_id)
+            if not compiled.is_feasible(t, u):
+                issues.append(f'{task_id}: {uav_id} 能力不满足任务要求')
+            valid.append(assignment)
+        return issues, valid
+
+    def _insertable_tasks(self, valid: List[Dict]) -> List[Tuple[str, str]]:
+        """
+        仍可插入当前方案的未分配任务：存在一架可行无人机，其排程中有一段空闲时间
+        能在任务时间窗口内容纳该任务（含往返）且不与已分配任务重叠
+
+        Returns:
+            [(任务, 可插入的第一架无人机), ...]，按任务在场景中的顺序
+        """
+        compiled = self.compiled
+        assigned = np.zeros(compiled.n_tasks, dtype=bool)
+        busy = {}
+        for assignment in valid:
+            t = self._task_row(assignment)
+            assigned[t] = True
+            start = parse_clock(assignment['start_time'])
+            busy.setdefault(compiled.uav_index[assignment['assigned_uav']], []).append(
+                (start, start + self._occupancy(assignment, t)))
+        # 每架无人机的占用区间按开始时间排序，并记录结束时间的前缀最大值（容忍重叠区间）
+        schedules = {}
+        for u, intervals in busy.items():
+            intervals.sort()
+            starts = [s for s, _ in intervals]
+            reach = list(itertools.accumulate((e for _, e in intervals), max))
+            schedules[u] = (starts, intervals, reach)
+
+        def fits(u: int, ready: int, occupancy: int, deadline: int) -> bool:
+            schedule = schedules.get(u)
+            if schedule is None:
+                return ready + occupancy <= deadline
+            starts, intervals, reach = schedule
+            j = bisect.bisect_right(starts, ready) - 1
+            begin = max(ready, reach[j]) if j >= 0 else ready
+            for k in range(j + 1, len(intervals)):
+                start, end = intervals[k]
+                if begin + occupancy > deadline:
+                    return False
+                if start >= begin + occupancy:
+                    return True
+                begin = max(begin, end)
+            return begin + occupancy <= deadline
+
+        candidates = np.flatnonzero(compiled.class_feasibility().any(axis=1) & ~assigned)
+        insertable = []
+        for t in candidates.tolist():
+            ready = max(int(compiled.window_start[t]), BASE_TIME_MIN)
+            occupancy = int(compiled.duration[t]) + CompiledProblem.RETURN_TRIP_MIN
+            deadline = int(compiled.window_end[t])
+            for u in compiled.feasible_uavs(t).tolist():
+                if fits(u, ready, occupancy, deadline):
+                    insertable.append((compiled.task_ids[t], compiled.uav_ids[u]))
                     break
-        
+        return insertable
+
+    def coverage(self) -> Dict[str, Any]:
+        """
+        任务覆盖情况（评价指标，不是可行性约束）
+
+        Returns:
+            assignable_tasks: 至少有一架可行无人机的任务数
+            assigned_tasks: 分配给可行无人机的任务数
+            coverage_rate: 已分配占可分配任务的百分比
+            insertable_tasks: 仍可插入现有排程空档的未分配任务 [(任务, 无人机), ...]
+        """
+        _, valid = self._validate_assignments()
+        valid = valid or []
+        assignable, assigned = self._coverage_counts(valid)
+        return {
+            'assignable_tasks': assignable,
+            'assigned_tasks': assigned,
+            'coverage_rate': round(assigned / assignable * 100, 2) if assignable else 100.0,
+            'insertable_tasks': self._insertable_tasks(valid),
+        }
+
+    def _coverage_counts(self, valid: List[Dict]) -> Tuple[int, int]:
+        """(可分配任务数, 分配给可行无人机的任务数)；valid 为 _validate_assignments() 的有效条目（任务不重复）"""
+        compiled = self.compiled
+        assignable = int(compiled.class_feasibility().any(axis=1).sum())
+        covered = sum(1 for a in valid
+                      if compiled.is_feasible(compiled.task_index[a['task_id']], compiled.uav_index[a['assigned_uav']]))
+        return assignable, covered
+
+    def _detect_time_conflicts(self, assignments: List[Dict]) -> List[Dict]:
+        """
+        检测时间冲突：同一无人机上占用区间重叠的任务对
+
+        每个任务占用 [开始, 开始+时长]；时长未注明"含往返"时另加往返时间。
+        按无人机分组后扫描线：区间按开始时间排序，小根堆维护仍在进行的区间的结束时间，
+        新区间与堆中所有未结束的区间逐对记录。总复杂度 O(n log n + 冲突对数)。
+        首尾相接（前一任务结束时刻即下一任务开始时刻）不算冲突。
+
+        Returns:
+            [{'uav': 无人机, 'tasks': [先开始的任务, 后开始的任务], 'overlap_min': 重叠分钟数}, ...]
+        """
+        uav_intervals = {}
+        for assignment in assignments:
+            start = parse_clock(assignment.get('start_time', '08:00'))
+            end = start + self._occupancy(assignment, self._task_row(assignment))
+            uav_intervals.setdefault(assignment.get('assigned_uav'), []).append(
+                (start, end, str(assignment.get('task_id'))))
+
+        conflicts = []
+        for uav_id, intervals in uav_intervals.items():
+            if len(intervals) < 2:
+                continue
+            intervals.sort()
+            active = []  # (结束时间, 任务)
+            for start, end, task in intervals:
+                while active and active[0][0] <= start:
+                    heapq.heappop(active)
+                for other_end, other_task in active:
+                    conflicts.append({
+                        'uav': uav_id,
+                        'tasks': [other_task, task],
+                        'overlap_min': min(end, other_end) - start
+                    })
+                heapq.heappush(active, (end, task))
+
         return conflicts
     
     def _extract_risk_level(self, risk_assessment: str) -> str:
@@ -313,6 +552,8 @@ class AllocationEvaluator:
         report.append("1️⃣ 任务完成度")
         report.append(f"   • 任务完成率: {tc['completion_rate']}%")
         report.append(f"   • 完成任务数: {tc['completed_tasks']}/{tc['total_tasks']}")
+        if 'coverage_rate' in tc:
+            report.append(f"   • 可分配任务覆盖率: {tc['coverage_rate']}%（可分配 {tc['assignable_tasks']} 个）")
         report.append(f"   • 高优先级完成率: {tc['high_priority_completion_rate']}%")
         report.append(f"   • 评分: {tc['score']:.3f}")
         report.append("")
@@ -351,12 +592,374 @@ class AllocationEvaluator:
         return "\n".join(report)
 
 
-def evaluate_allocation_from_file(json_file: str) -> Tuple[Dict, str]:
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    按Python内置round()的语义向量化取整
+
+    np.round 是"放大-取整-缩小"，在恰好接近.5的值上可能与 round() 结果不同；
+    这里先用 np.round，再对接近进位边界的少数元素逐个用 round() 重算。
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded.flat[i] = round(float(values.flat[i]), ndigits)
+    return rounded
+
+
+class BatchAllocationEvaluator:
+    """
+    批量评估器：一次向量化计算N个候选方案的各项评分
+
+    方案以数组表示：uav[N, T] 为每个任务分配的无人机行号（-1表示未分配），
+    start[N, T] 为开始时间（当天分钟数），occupancy[N, T] 为占用时长（可选，默认为场景时长+往返）。
+    各项评分的定义与 AllocationEvaluator 相同，对 encode() 得到的数组结果逐项一致，但有以下口径差异：
+    - 风险评估文本无法从数组得到，可通过 risk_assessment 参数统一指定；
+    - 总完成时间取各任务实际结束时间的最大值，而非方案中填写的 total_completion_time；
+    - 数组每个任务只有一个位置：引用场景外任务/无人机的条目被丢弃，同一任务的重复条目只保留最后一条，
+      而 AllocationEvaluator 会把它们计入完成数、使用的无人机数和时间冲突。
+      这类方案不会通过 check_feasibility()，需要与逐条评估一致时应先做可行性校验。
+    """
+
+    MAX_ELAPSED_MIN = 240     # 时间效率：总时长达到4小时记0分
+    CONFLICT_PENALTY = 0.2
+    VIOLATION_PENALTY = 0.3
+    WEIGHTS = {
+        'task_completion': 0.4,
+        'time_efficiency': 0.25,
+        'resource_utilization': 0.2,
+        'constraint_satisfaction': 0.15
+    }
+
+    def __init__(self, compiled, chunk_elements: int = 1 << 24):
+        """
+        Args:
+            compiled: CompiledProblem（TaskAllocationProblem.compile() 的结果）
+            chunk_elements: 分块计算时每块 N×U 计数矩阵的最大元素数（控制峰值内存）
+        """
+        self.compiled = compiled
+        self.n_tasks = compiled.n_tasks
+        self.n_uavs = compiled.n_uavs
+        self.duration = compiled.duration.astype(np.int64) + CompiledProblem.RETURN_TRIP_MIN
+        self.chunk_elements = chunk_elements
+
+    def encode(self, allocation: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        把标准格式的分配结果转换为 (uav[T], start[T], occupancy[T]) 数组
+
+        开始时间与占用时长的解析口径同 AllocationEvaluator（parse_clock / occupancy_minutes），
+        占用时长优先取条目中的 estimated_duration；未分配任务的占用时长为场景时长+往返。
+        """
+        allocation = allocation.get('final_allocation', allocation)
+        uav = np.full(self.n_tasks, -1, dtype=np.int32)
+        start = np.zeros(self.n_tasks, dtype=np.int32)
+        occupancy = self.duration.copy()
+        duration = self.compiled.duration
+        for a in allocation.get('assignments', []):
+            t = self.compiled.task_index.get(a.get('task_id'))
+            u = self.compiled.uav_index.get(a.get('assigned_uav'))
+            if t is None or u is None:
+                continue
+            uav[t] = u
+            start[t] = parse_clock(a.get('start_time', '08:00'))
+            occupancy[t] = occupancy_minutes(a, duration[t])
+        return uav, start, occupancy
+
+    def count_conflicts(self, uav: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """
+        统计每个方案中同一无人机上占用区间重叠的任务对数
+
+        把 (方案, 无人机, 时间) 编码为单个int64键后，开始键与结束键分别排序：
+        对按开始时间排在第i位的区间，与其重叠的先开始区间数 = i - 结束键不晚于其开始键的区间数
+        （同一无人机上先开始的区间要么已结束，要么与之重叠）。整体 O(n log n)。
+        """
+        n_rows = uav.shape[0]
+        conflicts = np.zeros(n_rows, dtype=np.int64)
+        span = int(max(end.max(initial=0), start.max(initial=0), 0)) + 1
+        chunk = max(1, self.chunk_elements // max(uav.shape[1], 1))
+        for lo in range(0, n_rows, chunk):
+            hi = min(lo + chunk, n_rows)
+            rows, cols = np.nonzero(uav[lo:hi] >= 0)
+            if rows.size == 0:
+                continue
+            group = (rows.astype(np.int64) * self.n_uavs + uav[lo:hi][rows, cols]) * span
+            start_keys = np.sort(group + start[lo:hi][rows, cols])
+            end_keys = np.sort(group + end[lo:hi][rows, cols])
+            # 其它组的区间对位次和已结束数的贡献相同，相减后只剩同组内的重叠数
+            overlaps = np.arange(start_keys.size) - np.searchsorted(end_keys, start_keys, side='right')
+            conflicts[lo:hi] = np.bincount(start_keys // (self.n_uavs * span), weights=overlaps,
+                                           minlength=hi - lo)
+        return conflicts
+
+    def evaluate(self, uav: np.ndarray, start: np.ndarray, columns: np.ndarray = None,
+                 risk_assessment: str = '', occupancy: np.ndarray = None) -> Dict[str, np.ndarray]:
+        """
+        批量评估
+
+        Args:
+            uav: [N, T] 或 [T] 无人机行号，-1表示未分配
+            start: 与uav同形的开始时间（分钟）
+            columns: 第j列对应的任务行号（列顺序与任务顺序不同时提供，默认为恒等）
+            risk_assessment: 统一适用于所有方案的风险评估文本
+            occupancy: 与uav同形的占用时长（分钟，含往返，如 encode() 的第三项），默认为场景时长+往返
+
+        Returns:
+            各项评分向量（长度N）：task_completion, time_efficiency, resource_utilization,
+            constraint_satisfaction, overall_score，以及 completed_tasks, makespan,
+            used_uavs, load_balance_std, conflict_count
+        """
+        uav = np.atleast_2d(np.asarray(uav))
+        start = np.atleast_2d(np.asarray(start)).astype(np.int64)
+        n_rows = uav.shape[0]
+        if occupancy is not None:
+            duration = np.atleast_2d(np.asarray(occupancy)).astype(np.int64)
+        else:
+            duration = self.duration if columns is None else self.duration[columns]
+
+        assigned = uav >= 0
+        completed = assigned.sum(axis=1)
+
+        # 任务完成度
+        completion_rate = (completed / self.n_tasks * 100) if self.n_tasks > 0 else np.zeros(n_rows)
+        completion_score = completion_rate / 100
+
+        # 时间效率：总完成时间 = 最晚结束时间 - 08:00
+        end = np.where(assigned, start + duration, 0)
+        makespan = end.max(axis=1, initial=0)
+        # 与逐条评估一致：超过24:00的完成时间无法按"HH:MM"解析，按08:00处理
+        elapsed = np.where(makespan < 24 * 60, makespan - BASE_TIME_MIN, 0)
+        time_score = np.where(completed > 0,
+                              _round_like_python(np.maximum(0, 1 - elapsed / self.MAX_ELAPSED_MIN), 3), 0.0)
+
+        # 资源利用：需要每个方案中各无人机的任务数，按块计算
+        used = np.zeros(n_rows, dtype=np.int64)
+        load_std = np.zeros(n_rows)
+        chunk = max(1, self.chunk_elements // max(self.n_uavs, 1))
+        for lo in range(0, n_rows, chunk):
+            hi = min(lo + chunk, n_rows)
+            rows = np.broadcast_to(np.arange(hi - lo)[:, None], uav[lo:hi].shape)
+            mask = assigned[lo:hi]
+            flat = rows[mask] * self.n_uavs + uav[lo:hi][mask]
+            counts = np.bincount(flat, minlength=(hi - lo) * self.n_uavs).reshape(hi - lo, self.n_uavs)
+            in_use = counts > 0
+            used[lo:hi] = in_use.sum(axis=1)
+            mean = counts.sum(axis=1) / np.maximum(used[lo:hi], 1)
+            deviation = np.where(in_use, counts - mean[:, None], 0.0)
+            load_std[lo:hi] = np.sqrt((deviation ** 2).sum(axis=1) / np.maximum(used[lo:hi], 1))
+        load_std = np.where(used > 1, load_std, 0.0)
+
+        utilization_rate = (used / self.n_uavs * 100) if self.n_uavs > 0 else np.zeros(n_rows)
+        balance_score = np.where(used > 1, np.maximum(0, 1 - load_std / 2), 1.0)
+        # 逐条评估中多架无人机且负载分数未被截断为0时，分数是np.std得到的NumPy标量（按np.round取整），
+        # 否则为Python数值（按内置round取整）
+        multi = (used > 1) & (1 - load_std / 2 > 0)
+        utilization = utilization_rate / 100 * 0.5 + balance_score * 0.5
+        utilization_score = np.where(multi, np.round(utilization, 3), _round_like_python(utilization, 3))
+
+        # 约束满足
+        conflicts = self.count_conflicts(uav, start, end)
+        violations = 1 if ('冲突' in risk_assessment or '违反' in risk_assessment) else 0
+        constraint_score = _round_like_python(np.maximum(
+            0, 1 - conflicts * self.CONFLICT_PENALTY - violations * self.VIOLATION_PENALTY), 3)
+
+        total = (completion_score * self.WEIGHTS['task_completion'] +
+                 time_score * self.WEIGHTS['time_efficiency'] +
+                 utilization_score * self.WEIGHTS['resource_utilization'] +
+                 constraint_score * self.WEIGHTS['constraint_satisfaction']) * 100
+        overall = np.where(multi, np.round(total, 2), _round_like_python(total, 2))
+
+        return {
+            'task_completion': completion_score,
+            'time_efficiency': time_score,
+            'resource_utilization': utilization_score,
+            'constraint_satisfaction': constraint_score,
+            'overall_score': overall,
+            'completed_tasks': completed,
+            'makespan': makespan,
+            'used_uavs': used,
+            'load_balance_std': load_std,
+            'conflict_count': conflicts,
+        }
+
+
+class IncrementalEvaluator:
+    """
+    增量评估器：维护单个方案的评分组成部分，单次移动 O(log n + k) 更新
+    （k 为所涉无人机上的任务数：有序列表的插入/删除需要移动元素，通常远小于任务总数）
+
+    维护量：已完成任务数、各无人机任务数及其平方和（负载标准差）、
+    各无人机按开始时间排序的时间表与有序结束时间（时间冲突对数）、
+    结束时间最大堆（总完成时间，惰性删除）。
+    score()/metrics() 的结果与对同一方案调用 AllocationEvaluator.evaluate_all() 完全一致
+    （口径差异同 BatchAllocationEvaluator：场景外/重复的条目不计入，总完成时间取实际最晚结束时间）。
+    """
+
+    def __init__(self, compiled, allocation: Dict = None, risk_assessment: str = ''):
+        """
+        Args:
+            compiled: CompiledProblem
+            allocation: 初始分配结果（标准格式，可选）
+            risk_assessment: 风险评估文本（用于约束违反项）
+        """
+        self.compiled = compiled
+        self.n_tasks = compiled.n_tasks
+        self.n_uavs = compiled.n_uavs
+        self.duration = (compiled.duration.astype(np.int64) + CompiledProblem.RETURN_TRIP_MIN).tolist()
+        self.risk_assessment = risk_assessment
+
+        self.uav_of = [-1] * self.n_tasks
+        self.start_of = [0] * self.n_tasks
+        self.completed = 0
+        self.uav_count = [0] * self.n_uavs
+        self.used_uavs = 0
+        self.count_sum = 0        # Σ 任务数（已使用的无人机）
+        self.count_sq_sum = 0     # Σ 任务数²
+        self.conflict_pairs = 0   # 同一无人机上占用区间重叠的任务对数
+        self.schedules = [[] for _ in range(self.n_uavs)]  # 每架无人机 [(开始, 结束, 任务)] 有序
+        self.ends = [[] for _ in range(self.n_uavs)]       # 每架无人机的结束时间，有序
+        self._end_heap = []       # (-结束时间, 任务)，惰性删除
+
+        if allocation is not None:
+            # 占用时长取方案条目中的 estimated_duration（口径同 AllocationEvaluator），之后移动任务时沿用
+            uav, start, occupancy = BatchAllocationEvaluator(compiled).encode(allocation)
+            self.duration = occupancy.tolist()
+            for t, u in enumerate(uav.tolist()):
+                if u >= 0:
+                    self.assign(t, u, int(start[t]))
+
+    # ------------------------------------------------------------------
+    # 修改
+    # ------------------------------------------------------------------
+
+    def _count_changed(self, u: int, step: int):
+        old = self.uav_count[u]
+        new = old + step
+        self.uav_count[u] = new
+        self.count_sum += step
+        self.count_sq_sum += new * new - old * old
+        self.used_uavs += (new > 0) - (old > 0)
+
+    def _overlaps(self, u: int, start: int, end: int) -> int:
+        """无人机u的时间表中与区间[start, end)重叠的任务数：开始早于end的数目减去结束不晚于start的数目"""
+        return bisect.bisect_left(self.schedules[u], (end,)) - bisect.bisect_right(self.ends[u], start)
+
+    def assign(self, t: int, u: int, start: int):
+        """分配（或移动）任务t到无人机u、开始时间start"""
+        if self.uav_of[t] >= 0:
+            self.unassign(t)
+        end = start + self.duration[t]
+        self.uav_of[t] = u
+        self.start_of[t] = start
+        self.completed += 1
+        self._count_changed(u, 1)
+        self.conflict_pairs += self._overlaps(u, start, end)
+        bisect.insort(self.schedules[u], (start, end, t))
+        bisect.insort(self.ends[u], end)
+        heapq.heappush(self._end_heap, (-end, t))
+
+    def unassign(self, t: int):
+        """取消任务t的分配"""
+        u = self.uav_of[t]
+        if u < 0:
+            return
+        start = self.start_of[t]
+        end = start + self.duration[t]
+        schedule = self.schedules[u]
+        del schedule[bisect.bisect_left(schedule, (start, end, t))]
+        del self.ends[u][bisect.bisect_left(self.ends[u], end)]
+        self.conflict_pairs -= self._overlaps(u, start, end)
+        self.uav_of[t] = -1
+        self.completed -= 1
+        self._count_changed(u, -1)
+        # 结束时间堆惰性删除；失效条目过多时由各无人机时间表重建（O(已分配数)，摊还 O(1)）
+        if len(self._end_heap) > 2 * self.completed + 64:
+            self._end_heap = [(-entry_end, x) for schedule in self.schedules for _, entry_end, x in schedule]
+            heapq.heapify(self._end_heap)
+
+    def move(self, t: int, u: int = None, start: int = None):
+        """移动任务到另一架无人机和/或另一开始时间（省略的参数保持不变）"""
+        self.assign(t, self.uav_of[t] if u is None else u, self.start_of[t] if start is None else start)
+
+    def delta(self, t: int, u: int, start: int = None) -> float:
+        """试算把任务t移到(u, start)后总分的变化（u为-1表示取消分配），不改变当前状态"""
+        old_u, old_start = self.uav_of[t], self.start_of[t]
+        before = self.score()
+        if u < 0:
+            self.unassign(t)
+        else:
+            self.assign(t, u, old_start if start is None else start)
+        after = self.score()
+        if old_u < 0:
+            self.unassign(t)
+        else:
+            self.assign(t, old_u, old_start)
+        return after - before
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def makespan(self) -> int:
+        """最晚结束时间（无任务时为08:00）"""
+        heap = self._end_heap
+        while heap:
+            end, t = heap[0]
+            if self.uav_of[t] >= 0 and self.start_of[t] + self.duration[t] == -end:
+                return -end
+            heapq.heappop(heap)
+        return BASE_TIME_MIN
+
+    def metrics(self) -> Dict[str, float]:
+        """四项评分与总分（口径同 AllocationEvaluator.evaluate_all）"""
+        completion_rate = (self.completed / self.n_tasks * 100) if self.n_tasks > 0 else 0
+        completion_score = completion_rate / 100
+
+        if self.completed:
+            makespan = self.makespan()
+            elapsed = makespan - BASE_TIME_MIN if makespan < 24 * 60 else 0
+            time_score = round(max(0, 1 - (elapsed / BatchAllocationEvaluator.MAX_ELAPSED_MIN)), 3)
+        else:
+            time_score = 0.0
+
+        used = self.used_uavs
+        utilization_rate = (used / self.n_uavs * 100) if self.n_uavs > 0 else 0
+        if used > 1:
+            # 方差用整数精确计算：(n·Σc² - (Σc)²) / n²
+            # 与逐条评估一致使用NumPy标量（其后的round()按NumPy语义取整）
+            load_std = np.float64(math.sqrt((used * self.count_sq_sum - self.count_sum ** 2) / (used * used)))
+            load_balance_score = max(0, 1 - (load_std / 2))
+        else:
+            load_balance_score = 1.0
+        utilization_score = round((utilization_rate / 100 * 0.5) + (load_balance_score * 0.5), 3)
+
+        violations = 1 if ('冲突' in self.risk_assessment or '违反' in self.risk_assessment) else 0
+        constraint_score = round(max(0, 1 - self.conflict_pairs * BatchAllocationEvaluator.CONFLICT_PENALTY
+                                     - violations * BatchAllocationEvaluator.VIOLATION_PENALTY), 3)
+
+        scores = {
+            'task_completion': completion_score,
+            'time_efficiency': time_score,
+            'resource_utilization': utilization_score,
+            'constraint_satisfaction': constraint_score,
+        }
+        total = 0
+        for key, weight in BatchAllocationEvaluator.WEIGHTS.items():
+            total += scores[key] * weight
+        scores['overall_score'] = round(total * 100, 2)
+        return scores
+
+    def score(self) -> float:
+        return self.metrics()['overall_score']
+
+
+def evaluate_allocation_from_file(json_file: str, task_input=None) -> Tuple[Dict, str]:
     """
     从JSON文件读取分配方案并评估
     
     Args:
         json_file: JSON文件路径
+        task_input: 任务场景（同 AllocationEvaluator，省略时使用默认场景）
         
     Returns:
         (metrics, report): 评估指标字典和报告文本
@@ -364,7 +967,7 @@ def evaluate_allocation_from_file(json_file: str) -> Tuple[Dict, str]:
     with open(json_file, 'r', encoding='utf-8') as f:
         allocation = json.load(f)
     
-    evaluator = AllocationEvaluator(allocation)
+    evaluator = AllocationEvaluator(allocation, task_input)
     metrics = evaluator.evaluate_all()
     report = evaluator.generate_report(metrics)
     
@@ -0,0 +1,202 @@
+"""
+LLM 响应磁盘缓存
+基于 SQLite 的 AutoGen 缓存存储：模型、系统消息与完整对话历史相同的请求直接返回缓存的回复，
+使调试和回归运行在毫秒级完成，且结果可复现。
+缓存文件超过容量上限时按最近访问时间淘汰（LRU）。
+
+缓存默认关闭（需显式设置 LLM_CACHE=1）：消融实验等需要多次独立采样的场景中，
+缓存会让每次重复试验都拿到同一个回复，试验间方差被抹平，统计结论失真。
+
+环境变量：
+    LLM_CACHE           设为 1 时启用缓存（默认 0，不启用）
+    LLM_CACHE_PATH      缓存文件路径（默认 .llm_cache.sqlite）
+    LLM_CACHE_MAX_MB    缓存容量上限（MB，默认 256）
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from autogen_core import CacheStore
+from autogen_core.models import ChatCompletionClient
+from autogen_ext.models.cache import CHAT_CACHE_VALUE_TYPE, ChatCompletionCache
+
+
+DEFAULT_CACHE_PATH = '.llm_cache.sqlite'
+DEFAULT_MAX_MB = 256
+
+class _CacheFile:
+    """一个缓存文件的共享状态：连接、锁，以及回复内容总字节数的运行计数（写入/删除时增量维护）"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.total_bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+
+# 同一缓存文件的所有存储实例共享一个连接（每个智能体各自包装客户端时不重复打开数据库）
+_connections: Dict[str, _CacheFile] = {}
+_connections_lock = threading.Lock()
+
+
+def _connect(path: str) -> _CacheFile:
+    path = os.path.abspath(path)
+    with _connections_lock:
+        cache_file = _connections.get(path)
+        if cache_file is None:
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)')
+            cache_file = _connections[path] = _CacheFile(conn)
+        return cache_file
+
+
+class SQLiteCacheStore(CacheStore[CHAT_CACHE_VALUE_TYPE]):
+    """
+    SQLite 缓存存储（供 autogen_ext 的 ChatCompletionCache 使用）
+
+    ChatCompletionCache 的缓存键只包含消息、工具和请求参数，不含模型名，
+    因此按 "模型@服务地址" 划分命名空间，不同模型之间不会串用回复。
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, namespace: str = '',
+                 max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        """
+        Args:
+            path: 缓存文件路径
+            namespace: 命名空间（通常为 "模型@服务地址"）
+            max_bytes: 整个缓存文件中回复内容的总字节数上限
+        """
+        self.path = path
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._file = _connect(path)
+        self._conn = self._file.conn
+        self._lock = self._file.lock
+
+    @staticmethod
+    def _serialize(value: CHAT_CACHE_VALUE_TYPE) -> str:
+        """CreateResult 或流式结果列表（字符串片段 + 最终 CreateResult）序列化为JSON"""
+        if isinstance(value, list):
+            return json.dumps([item if isinstance(item, str) else item.model_dump(mode='json')
+                               for item in value], ensure_ascii=False)
+        return value.model_dump_json()
+
+    def get(self, key: str, default: Optional[CHAT_CACHE_VALUE_TYPE] = None) -> Optional[CHAT_CACHE_VALUE_TYPE]:
+        """读取缓存；返回解析后的JSON（dict或list），由 ChatCompletionCache 还原为 CreateResult"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM responses WHERE namespace = ? AND key = ?',
+                                     (self.namespace, key)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self._conn.execute('UPDATE responses SET accessed = ? WHERE namespace = ? AND key = ?',
+                               (time.time(), self.namespace, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: CHAT_CACHE_VALUE_TYPE) -> None:
+        """写入缓存，超出容量上限时淘汰最久未访问的条目"""
+        data = self._serialize(value)
+        size = len(data.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute('SELECT size FROM responses WHERE namespace = ? AND key = ?',
+                                          (self.namespace, key)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (namespace, key, value, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?)', (self.namespace, key, data, size, now, now))
+            self._file.total_bytes += size - (replaced[0] if replaced else 0)
+            if self._file.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """
+        总大小超过上限时按最近访问时间从旧到新删除，直到降到上限的90%
+
+        只在运行计数超过上限时调用；先按实际 SUM 校准计数（其他进程可能也写入了同一文件）
+        """
+        total = self._file.total_bytes = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        victims = []
+        for namespace, key, size in self._conn.execute(
+                'SELECT namespace, key, size FROM responses ORDER BY accessed ASC'):
+            if total <= target:
+                break
+            victims.append((namespace, key))
+            total -= size
+        self._conn.executemany('DELETE FROM responses WHERE namespace = ? AND key = ?', victims)
+        self._file.total_bytes = total
+
+    def stats(self) -> Dict:
+        """缓存统计：条目数、总字节数，以及本实例的命中/未命中次数"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {'entries': entries, 'bytes': total, 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self, all_namespaces: bool = False):
+        """清空本命名空间（或整个缓存文件）"""
+        with self._lock:
+            if all_namespaces:
+                self._conn.execute('DELETE FROM responses')
+            else:
+                self._conn.execute('DELETE FROM responses WHERE namespace = ?', (self.namespace,))
+            self._file.total_bytes = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+
+def create_cached_client(client: ChatCompletionClient, model: str, base_url: str = '',
+                         path: str = None, max_mb: float = None) -> ChatCompletionClient:
+    """
+    为模型客户端加上磁盘缓存（仅在环境变量 LLM_CACHE=1 时启用，否则原样返回）
+
+    Args:
+        client: 原始模型客户端
+        model: 模型名（与服务地址一起作为缓存命名空间）
+        base_url: 服务地址
+        path: 缓存文件路径（默认取 LLM_CACHE_PATH）
+        max_mb: 容量上限MB（默认取 LLM_CACHE_MAX_MB）
+    """
+    if os.getenv('LLM_CACHE', '0') != '1':
+        return client
+    path = path or os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH)
+    if max_mb is None:
+        max_mb = float(os.getenv('LLM_CACHE_MAX_MB', DEFAULT_MAX_MB))
+    store = SQLiteCacheStore(path, namespace=f'{model}@{base_url}', max_bytes=int(max_mb * 1024 * 1024))
+    return ChatCompletionCache(client, store)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='LLM 响应缓存管理')
+    parser.add_argument('--path', default=os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH), help='缓存文件路径')
+    parser.add_argument('--clear', action='store_true', help='清空缓存')
+    args = parser.parse_args()
+
+    store = SQLiteCacheStore(args.path)
+    if args.clear:
+        store.clear(all_namespaces=True)
+        print(f"✅ 已清空缓存: {args.path}")
+    stats = store.stats()
+    print(f"📦 {args.path}: {stats['entries']} 条回复, {stats['bytes'] / 1024 / 1024:.2f} MB")
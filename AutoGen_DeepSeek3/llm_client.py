@@ -0,0 +1,184 @@
+"""
+模型客户端工厂
+系统中所有智能体的模型客户端都由 create_model_client 创建，运行模式由环境变量选择：
+
+    LLM_CLIENT_MODE       live（默认）：直连模型服务（带磁盘缓存，见 llm_cache.py）
+                          record：直连模型服务，同时把每次请求的回复录制到文件
+                          replay：不访问网络，从录制文件回放回复
+    LLM_RECORDING_PATH    录制文件路径（默认 recordings/llm_recording.jsonl）
+    LLM_REPLAY_LATENCY    回放时注入的延迟分布，如 recorded、fixed:800、lognormal:800,0.5（见 llm_replay.py）
+    LLM_REPLAY_STRICT     设为 0 时，请求未命中录制记录则按顺序回放同一智能体的下一条回复
+    LLM_REPLAY_SEED       延迟采样的随机种子
+    LLM_MAX_CONNECTIONS   ModelClientPool 每个 (模型, 服务地址) 的最大并发连接数（默认 10）
+"""
+
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from autogen_core.models import ChatCompletionClient, ModelInfo
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+from openai import DefaultAsyncHttpxClient
+
+try:
+    from httpx import Limits
+except ImportError:  # 新版 openai SDK 基于 httpx2
+    from httpx2 import Limits
+
+from llm_cache import create_cached_client
+from llm_rate_limiter import RateLimitedChatCompletionClient, RateLimiter
+from llm_replay import DEFAULT_RECORDING_PATH, RecordingChatCompletionClient, ReplayingChatCompletionClient
+
+
+CLIENT_MODES = ('live', 'record', 'replay')
+DEFAULT_MAX_CONNECTIONS = 10
+
+# OpenAI 官方模型由 autogen 自带模型信息，其余模型（DeepSeek、通义千问等）需手动提供
+OPENAI_MODELS = ["gpt-4o", "gpt-4o-mini", "gpt-4-turbo", "gpt-4", "gpt-3.5-turbo"]
+DEFAULT_MODEL_INFO = {
+    "family": "unknown",
+    "vision": False,
+    "function_calling": True,
+    "json_output": True,
+    "context_window": 32768,
+}
+
+
+def get_client_mode() -> str:
+    """当前客户端模式（LLM_CLIENT_MODE）"""
+    mode = os.getenv('LLM_CLIENT_MODE', 'live').strip().lower() or 'live'
+    if mode not in CLIENT_MODES:
+        raise ValueError(f"LLM_CLIENT_MODE 必须是 {'/'.join(CLIENT_MODES)} 之一，当前为: {mode}")
+    return mode
+
+
+def create_model_client(model: str, base_url: str, api_key: Optional[str] = None,
+                        model_info: Optional[ModelInfo] = None, mode: Optional[str] = None,
+                        recording_path: Optional[str] = None, http_client: Any = None,
+                        variant: str = '') -> ChatCompletionClient:
+    """
+    按运行模式创建模型客户端
+
+    Args:
+        model: 模型名
+        base_url: 服务地址
+        api_key: API密钥（回放模式不需要）
+        model_info: 模型信息（非OpenAI模型默认使用 DEFAULT_MODEL_INFO）
+        mode: live/record/replay，默认取 LLM_CLIENT_MODE
+        recording_path: 录制文件路径，默认取 LLM_RECORDING_PATH
+        http_client: 共享的 HTTP 客户端（默认每个客户端各自建立连接池，见 ModelClientPool）
+        variant: 变体标签（如重复实验的 "trial2"），不同变体的缓存和录制互相独立
+    """
+    mode = mode or get_client_mode()
+    recording_path = recording_path or os.getenv('LLM_RECORDING_PATH', DEFAULT_RECORDING_PATH)
+    # 缓存命名空间和录制记录按 "模型#变体" 区分，重复实验的各次运行不会读到彼此的回复
+    label = f'{model}#{variant}' if variant else model
+
+    if mode == 'replay':
+        # 未指定 model_info 时使用录制文件头记录中的模型信息
+        seed = os.getenv('LLM_REPLAY_SEED')
+        return ReplayingChatCompletionClient(
+            recording_path,
+            model=label,
+            latency=os.getenv('LLM_REPLAY_LATENCY'),
+            strict=os.getenv('LLM_REPLAY_STRICT', '1') != '0',
+            seed=int(seed) if seed else None,
+            model_info=model_info,
+        )
+
+    if model_info is None and model not in OPENAI_MODELS:
+        model_info = DEFAULT_MODEL_INFO
+    client = OpenAIChatCompletionClient(
+        model=model,
+        api_key=api_key,
+        base_url=base_url,
+        model_info=model_info,
+        http_client=http_client
+    )
+    # LLM_CACHE=1 时相同请求直接返回磁盘缓存中的回复（默认不启用）
+    client = create_cached_client(client, label, base_url)
+    if mode == 'record':
+        # 录制层在缓存外侧，缓存命中的回复同样写入录制文件，保证回放完整
+        client = RecordingChatCompletionClient(client, recording_path, model=label)
+    return client
+
+
+class ModelClientPool:
+    """
+    模型客户端池：同一 (模型, 服务地址) 的所有智能体共享一个模型客户端和一个 HTTP 长连接池
+
+    每个智能体各建一个客户端时，每个客户端都有自己的连接池，首轮对话都要重新建立 TCP/TLS 连接；
+    共享后连接在智能体和实验配置之间复用，并发请求数受 max_connections 限制。
+    回放模式的客户端带有回放进度，不共享，每次都新建。
+    指定 rate_limiter 时池中所有客户端共享同一份 RPM/TPM 配额。
+    """
+
+    def __init__(self, max_connections: Optional[int] = None, keepalive_expiry: float = 60.0,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            max_connections: 每个 (模型, 服务地址) 的最大并发连接数，默认取 LLM_MAX_CONNECTIONS
+            keepalive_expiry: 空闲长连接的保持时间（秒）
+            rate_limiter: 共享的请求限速器（None 表示不限速）
+        """
+        if max_connections is None:
+            max_connections = int(os.getenv('LLM_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS))
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.rate_limiter = rate_limiter
+        self._clients: Dict[Tuple[str, str, str], ChatCompletionClient] = {}
+        self._http_clients: Dict[Tuple[str, str], Any] = {}
+        self.requests = 0
+        self.created = 0
+
+    def _http_client(self, key: Tuple[str, str]):
+        http_client = self._http_clients.get(key)
+        if http_client is None or http_client.is_closed:
+            http_client = DefaultAsyncHttpxClient(limits=Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ))
+            self._http_clients[key] = http_client
+            # 旧连接池已关闭，基于它的客户端一并作废
+            for client_key in [k for k in self._clients if k[:2] == key]:
+                del self._clients[client_key]
+        return http_client
+
+    def _limited(self, client: ChatCompletionClient) -> ChatCompletionClient:
+        if self.rate_limiter is not None and self.rate_limiter.enabled:
+            return RateLimitedChatCompletionClient(client, self.rate_limiter)
+        return client
+
+    def get(self, model: str, base_url: str, api_key: Optional[str] = None,
+            model_info: Optional[ModelInfo] = None, variant: str = '') -> ChatCompletionClient:
+        """获取 (模型, 服务地址, 变体) 对应的共享客户端，参数含义同 create_model_client"""
+        self.requests += 1
+        mode = get_client_mode()
+        if mode == 'replay':
+            return self._limited(create_model_client(model, base_url, api_key, model_info, mode=mode,
+                                                     variant=variant))
+
+        http_client = self._http_client((model, base_url))
+        key = (model, base_url, variant)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._limited(create_model_client(model, base_url, api_key, model_info, mode=mode,
+                                                       http_client=http_client, variant=variant))
+            self._clients[key] = client
+            self.created += 1
+        return client
+
+    def stats(self) -> Dict:
+        """客户端请求次数与实际创建的客户端数"""
+        return {'requests': self.requests, 'clients_created': self.created,
+                'max_connections': self.max_connections}
+
+    async def close(self):
+        """关闭所有共享客户端及其连接池"""
+        for client in self._clients.values():
+            await client.close()
+        for http_client in self._http_clients.values():
+            if not http_client.is_closed:
+                await http_client.aclose()
+        self._clients.clear()
+        self._http_clients.clear()
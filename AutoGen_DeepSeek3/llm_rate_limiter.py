@@ -0,0 +1,168 @@
+"""
+LLM 请求限速
+按每分钟请求数（RPM）和每分钟token数（TPM）双令牌桶限速，供并发运行的多个实验共享同一份 API 配额。
+
+环境变量：
+    LLM_RPM     每分钟最多请求数（默认不限）
+    LLM_TPM     每分钟最多token数（默认不限）
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+
+
+def estimate_tokens(messages: Sequence[LLMMessage]) -> int:
+    """请求token数的保守估计：按每个字符1个token计（中文接近该比例，英文会高估）"""
+    return sum(len(str(m.content)) for m in messages)
+
+
+class RateLimiter:
+    """
+    RPM/TPM 双令牌桶
+
+    请求发出前按估计的token数扣减，返回后按实际用量多退少补（余额可暂时为负，后续请求相应等待）；
+    命中缓存的回复没有消耗 API 配额，全额退回。
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """
+        Args:
+            rpm: 每分钟请求数上限，默认取 LLM_RPM，0 或未设置表示不限
+            tpm: 每分钟token数上限，默认取 LLM_TPM，0 或未设置表示不限
+        """
+        self.rpm = float(os.getenv('LLM_RPM', 0) if rpm is None else rpm)
+        self.tpm = float(os.getenv('LLM_TPM', 0) if tpm is None else tpm)
+        self._requests = self.rpm
+        self._tokens = self.tpm
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_s = 0.0
+        self.acquired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm > 0:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm > 0:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    async def acquire(self, tokens: int):
+        """等待直到配额足够发出一个估计 tokens 个token的请求"""
+        if not self.enabled:
+            return
+        async with self._lock:
+            # 单个请求超过整桶容量时按整桶计，否则永远等不到
+            tokens = min(tokens, self.tpm) if self.tpm > 0 else 0
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm > 0 and self._requests < 1:
+                    wait = (1 - self._requests) * 60.0 / self.rpm
+                if self.tpm > 0 and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60.0 / self.tpm)
+                if wait <= 0:
+                    break
+                self.waited_s += wait
+                await asyncio.sleep(wait)
+            self._requests -= 1
+            self._tokens -= tokens
+            self.acquired += 1
+
+    def settle(self, estimated: int, actual: int, cached: bool = False):
+        """请求完成后按实际token用量修正扣减；cached=True 时退回本次请求的全部配额"""
+        if not self.enabled:
+            return
+        if self.tpm > 0:
+            estimated = min(estimated, self.tpm)
+            self._tokens += estimated if cached else estimated - actual
+        if cached and self.rpm > 0:
+            self._requests = min(self.rpm, self._requests + 1)
+
+    def stats(self):
+        return {'rpm': self.rpm, 'tpm': self.tpm, 'requests': self.acquired, 'waited_s': self.waited_s}
+
+
+class RateLimitedChatCompletionClient(ChatCompletionClient):
+    """限速客户端：每次请求先从共享的 RateLimiter 取得配额再转发给内部客户端"""
+
+    def __init__(self, client: ChatCompletionClient, limiter: RateLimiter):
+        self._client = client
+        self.limiter = limiter
+
+    def _settle(self, estimated: int, result: CreateResult):
+        usage = result.usage
+        self.limiter.settle(estimated, usage.prompt_tokens + usage.completion_tokens, cached=result.cached)
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        tool_choice: Any = "auto",
+        json_output: Any = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        estimated = estimate_tokens(messages)
+        await self.limiter.acquire(estimated)
+        result = await self._client.create(messages, tools=tools, tool_choice=tool_choice,
+                                           json_output=json_output, extra_create_args=extra_create_args,
+                                           cancellation_token=cancellation_token)
+        self._settle(estimated, result)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        tool_choice: Any = "auto",
+        json_output: Any = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        estimated = estimate_tokens(messages)
+        await self.limiter.acquire(estimated)
+        async for item in self._client.create_stream(messages, tools=tools, tool_choice=tool_choice,
+                                                     json_output=json_output,
+                                                     extra_create_args=extra_create_args,
+                                                     cancellation_token=cancellation_token):
+            if isinstance(item, CreateResult):
+                self._settle(estimated, item)
+            yield item
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *,
+                         tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self):
+        return self._client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
@@ -0,0 +1,464 @@
+"""
+LLM 对话录制与回放
+录制：包装真实模型客户端，把 RoundRobinGroupChat 运行中每次模型请求的回复（含耗时）追加写入 JSONL 录制文件；
+回放：按请求内容从录制文件取回回复，并可注入延迟分布。
+这样五智能体流程无需联网即可做基准测试、压力测试和回归测试。
+
+录制文件每行一条记录：
+    {"type": "header", "model": ..., "model_info": {...}}              每个模型首次录制时写入
+    {"type": "response", "model": ..., "key": ..., "system_key": ..., "agent": ...,
+     "latency_s": ..., "first_chunk_s": ..., "chunks": [...], "result": {...}}
+
+延迟分布写法（毫秒）：
+    none                    不注入延迟（默认）
+    recorded[:倍数]         按录制时的真实耗时（可整体缩放）
+    fixed:800               固定延迟
+    uniform:200,1500        均匀分布
+    normal:800,200          正态分布（截断到0以上）
+    lognormal:800,0.5       对数正态分布（中位数, sigma）
+    exponential:800         指数分布（均值）
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import (ChatCompletionClient, CreateResult, LLMMessage, ModelInfo,
+                                 RequestUsage, SystemMessage)
+from autogen_core.tools import Tool, ToolSchema
+
+
+DEFAULT_RECORDING_PATH = os.path.join('recordings', 'llm_recording.jsonl')
+
+# 录制文件的写锁（多个智能体的录制客户端可能写同一个文件）
+_file_locks: Dict[str, threading.Lock] = {}
+_file_locks_guard = threading.Lock()
+
+# 已加载的录制文件：路径 -> ((修改时间, 大小), 记录列表)，文件未变化时只解析一次
+_loaded: Dict[str, Tuple[Tuple[int, int], List[Dict]]] = {}
+
+
+def _file_lock(path: str) -> threading.Lock:
+    with _file_locks_guard:
+        lock = _file_locks.get(path)
+        if lock is None:
+            lock = _file_locks[path] = threading.Lock()
+        return lock
+
+
+def _tool_schema(tool: Union[Tool, ToolSchema]) -> Dict:
+    return dict(tool.schema) if isinstance(tool, Tool) else dict(tool)
+
+
+def _hash(payload: Any) -> str:
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def request_key(model: str, messages: Sequence[LLMMessage], tools: Sequence[Union[Tool, ToolSchema]] = (),
+                json_output: Any = None, extra_create_args: Mapping[str, Any] = None) -> str:
+    """请求的唯一键：模型、完整消息历史、工具定义和请求参数的哈希"""
+    if isinstance(json_output, type):
+        json_output = json_output.model_json_schema()
+    return _hash({
+        'model': model,
+        'messages': [m.model_dump(mode='json') for m in messages],
+        'tools': [_tool_schema(t) for t in tools],
+        'json_output': json_output,
+        'extra_create_args': dict(extra_create_args or {}),
+    })
+
+
+def system_key(messages: Sequence[LLMMessage]) -> str:
+    """系统消息的哈希，用于区分发出请求的智能体"""
+    return _hash([m.content for m in messages if isinstance(m, SystemMessage)])
+
+
+def _agent_name(messages: Sequence[LLMMessage]) -> str:
+    """从系统消息首行粗略推断智能体（仅用于录制文件的可读性和统计）"""
+    for m in messages:
+        if isinstance(m, SystemMessage):
+            return m.content.strip().split('\n', 1)[0][:40]
+    return ''
+
+
+def load_recording(path: str) -> List[Dict]:
+    """读取录制文件的全部记录（文件未变化时复用已解析的结果）"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    _loaded[path] = (version, records)
+    return records
+
+
+class LatencyModel:
+    """回放延迟分布（规格写法见模块说明），sample() 返回秒"""
+
+    def __init__(self, spec: Optional[str] = None, seed: Optional[int] = None):
+        self.spec = (spec or 'none').strip().lower()
+        self._rng = random.Random(seed)
+        kind, _, args = self.spec.partition(':')
+        self.kind = kind
+        self.params = [float(x) for x in args.split(',') if x.strip()]
+        expected = {'none': 0, 'recorded': None, 'fixed': 1, 'uniform': 2, 'normal': 2,
+                    'lognormal': 2, 'exponential': 1}
+        if kind not in expected:
+            raise ValueError(f"未知的延迟分布: {spec}（可选: {', '.join(expected)}）")
+        if expected[kind] is not None and len(self.params) != expected[kind]:
+            raise ValueError(f"延迟分布 {kind} 需要 {expected[kind]} 个参数: {spec}")
+
+    def sample(self, recorded_s: float = 0.0) -> float:
+        """采样一次请求的总延迟（秒）"""
+        kind, p, rng = self.kind, self.params, self._rng
+        if kind == 'none':
+            return 0.0
+        if kind == 'recorded':
+            return recorded_s * (p[0] if p else 1.0)
+        if kind == 'fixed':
+            ms = p[0]
+        elif kind == 'uniform':
+            ms = rng.uniform(p[0], p[1])
+        elif kind == 'normal':
+            ms = max(0.0, rng.gauss(p[0], p[1]))
+        elif kind == 'lognormal':
+            ms = rng.lognormvariate(math.log(p[0]), p[1])
+        else:
+            ms = rng.expovariate(1.0 / p[0])
+        return ms / 1000.0
+
+
+class RecordingChatCompletionClient(ChatCompletionClient):
+    """
+    录制客户端：请求原样转发给内部客户端，回复与耗时追加写入录制文件
+    """
+
+    def __init__(self, client: ChatCompletionClient, path: str = DEFAULT_RECORDING_PATH, model: str = ''):
+        """
+        Args:
+            client: 真实模型客户端（可以是带缓存的客户端）
+            path: 录制文件路径（追加写入）
+            model: 模型名（写入请求键，回放时按模型匹配）
+        """
+        self._client = client
+        self.path = path
+        self.model = model
+        self.recorded = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._write_header()
+
+    def _append(self, records: List[Dict]):
+        lines = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records)
+        with _file_lock(os.path.abspath(self.path)):
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+    def _write_header(self):
+        """文件中还没有该模型的头记录时写入（保存 model_info，回放时无需再配置）"""
+        if os.path.exists(self.path):
+            for record in load_recording(self.path):
+                if record.get('type') == 'header' and record.get('model') == self.model:
+                    return
+        self._append([{
+            'type': 'header',
+            'model': self.model,
+            'model_info': dict(self._client.model_info),
+            'created': datetime.now().isoformat(),
+        }])
+
+    def _record(self, messages, tools, json_output, extra_create_args, result: CreateResult,
+                latency_s: float, chunks: Optional[List[str]] = None, first_chunk_s: Optional[float] = None):
+        self._append([{
+            'type': 'response',
+            'model': self.model,
+            'key': request_key(self.model, messages, tools, json_output, extra_create_args),
+            'system_key': system_key(messages),
+            'agent': _agent_name(messages),
+            'n_messages': len(messages),
+            'latency_s': round(latency_s, 4),
+            'first_chunk_s': None if first_chunk_s is None else round(first_chunk_s, 4),
+            'chunks': chunks,
+            'result': result.model_dump(mode='json'),
+        }])
+        self.recorded += 1
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        tool_choice: Any = "auto",
+        json_output: Any = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        start = time.perf_counter()
+        result = await self._client.create(messages, tools=tools, tool_choice=tool_choice,
+                                           json_output=json_output, extra_create_args=extra_create_args,
+                                           cancellation_token=cancellation_token)
+        self._record(messages, tools, json_output, extra_create_args, result, time.perf_counter() - start)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        tool_choice: Any = "auto",
+        json_output: Any = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        start = time.perf_counter()
+        first_chunk_s = None
+        chunks = []
+        async for item in self._client.create_stream(messages, tools=tools, tool_choice=tool_choice,
+                                                     json_output=json_output,
+                                                     extra_create_args=extra_create_args,
+                                                     cancellation_token=cancellation_token):
+            if isinstance(item, CreateResult):
+                self._record(messages, tools, json_output, extra_create_args, item,
+                             time.perf_counter() - start, chunks, first_chunk_s)
+            else:
+                if first_chunk_s is None:
+                    first_chunk_s = time.perf_counter() - start
+                chunks.append(item)
+            yield item
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *,
+                         tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self):
+        return self._client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
+
+
+class ReplayingChatCompletionClient(ChatCompletionClient):
+    """
+    回放客户端：不访问网络，按请求键从录制文件中取回回复
+
+    同一请求录制了多次时按顺序依次返回，用完后重复最后一次；
+    非严格模式下请求键未命中（例如提示词有改动）时，按顺序取同一智能体（相同系统消息）的下一条录制回复。
+    """
+
+    def __init__(self, path: str = DEFAULT_RECORDING_PATH, model: str = '', latency: Optional[str] = None,
+                 strict: bool = True, seed: Optional[int] = None, model_info: Optional[ModelInfo] = None):
+        """
+        Args:
+            path: 录制文件路径
+            model: 模型名（只回放该模型的记录；为空时回放文件中全部记录）
+            latency: 延迟分布规格（见模块说明）
+            strict: 请求键未命中时是否报错
+            seed: 延迟采样的随机种子
+            model_info: 模型信息（默认取录制文件头记录中的信息）
+        """
+        self.path = path
+        self.model = model
+        self.strict = strict
+        self.latency = latency if isinstance(latency, LatencyModel) else LatencyModel(latency, seed)
+
+        records = load_recording(path)
+        header = None
+        self._by_key: Dict[str, List[Dict]] = {}
+        self._by_system: Dict[str, List[Dict]] = {}
+        for record in records:
+            if model and record.get('model') != model:
+                continue
+            if record.get('type') == 'header':
+                header = header or record
+            elif record.get('type') == 'response':
+                self._by_key.setdefault(record['key'], []).append(record)
+                self._by_system.setdefault(record['system_key'], []).append(record)
+        if not self._by_key:
+            raise ValueError(f"录制文件 {path} 中没有模型 {model or '(任意)'} 的回复记录")
+
+        self._model_info = model_info or (header or {}).get('model_info') or {
+            "family": "unknown",
+            "vision": False,
+            "function_calling": True,
+            "json_output": True,
+            "context_window": 32768,
+        }
+        self._key_cursor: Dict[str, int] = {}
+        self._system_cursor: Dict[str, int] = {}
+        self._cur_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self.hits = 0
+        self.fallbacks = 0
+
+    def _next(self, messages, tools, json_output, extra_create_args) -> Dict:
+        key = request_key(self.model, messages, tools, json_output, extra_create_args)
+        candidates = self._by_key.get(key)
+        if candidates:
+            index = self._key_cursor.get(key, 0)
+            self._key_cursor[key] = index + 1
+            self.hits += 1
+            return candidates[min(index, len(candidates) - 1)]
+
+        sys_key = system_key(messages)
+        candidates = self._by_system.get(sys_key)
+        if self.strict or not candidates:
+            raise LookupError(
+                f"录制文件 {self.path} 中没有与本次请求匹配的回复"
+                f"（智能体: {_agent_name(messages) or '未知'}，消息数: {len(messages)}）；"
+                f"请重新录制，或使用非严格模式按顺序回放")
+        index = self._system_cursor.get(sys_key, 0)
+        self._system_cursor[sys_key] = index + 1
+        self.fallbacks += 1
+        return candidates[index % len(candidates)]
+
+    def _update_usage(self, result: CreateResult):
+        self._cur_usage = result.usage
+        self._total_usage = RequestUsage(
+            prompt_tokens=self._total_usage.prompt_tokens + result.usage.prompt_tokens,
+            completion_tokens=self._total_usage.completion_tokens + result.usage.completion_tokens)
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        tool_choice: Any = "auto",
+        json_output: Any = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        record = self._next(messages, tools, json_output, extra_create_args)
+        delay = self.latency.sample(record.get('latency_s', 0.0))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        result = CreateResult.model_validate(record['result'])
+        self._update_usage(result)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Union[Tool, ToolSchema]] = [],
+        tool_choice: Any = "auto",
+        json_output: Any = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        record = self._next(messages, tools, json_output, extra_create_args)
+        result = CreateResult.model_validate(record['result'])
+        chunks = record.get('chunks')
+        if chunks is None:
+            chunks = [result.content] if isinstance(result.content, str) and result.content else []
+
+        # 总延迟按录制时首个片段的耗时占比拆成首包延迟，其余平均分摊到各片段
+        delay = self.latency.sample(record.get('latency_s', 0.0))
+        recorded_total = record.get('latency_s') or 0.0
+        first_share = (record.get('first_chunk_s') or 0.0) / recorded_total if recorded_total > 0 else 1.0
+        first_delay = delay * min(first_share, 1.0)
+        per_chunk = (delay - first_delay) / len(chunks) if chunks else 0.0
+
+        if first_delay > 0:
+            await asyncio.sleep(first_delay)
+        for chunk in chunks:
+            if per_chunk > 0:
+                await asyncio.sleep(per_chunk)
+            yield chunk
+        if not chunks and delay - first_delay > 0:
+            await asyncio.sleep(delay - first_delay)
+        self._update_usage(result)
+        yield result
+
+    async def close(self) -> None:
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._cur_usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._total_usage
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        """无分词器，按每4个字符约1个token粗略估算"""
+        text = json.dumps([m.model_dump(mode='json') for m in messages], ensure_ascii=False)
+        text += json.dumps([_tool_schema(t) for t in tools], ensure_ascii=False)
+        return len(text) // 4
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *,
+                         tools: Sequence[Union[Tool, ToolSchema]] = []) -> int:
+        return max(0, self._model_info.get('context_window', 32768) - self.count_tokens(messages, tools=tools))
+
+    @property
+    def capabilities(self):
+        return {key: self._model_info[key] for key in ('vision', 'function_calling', 'json_output')}
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._model_info
+
+
+def summarize_recording(path: str) -> Dict:
+    """录制文件统计：各智能体的请求数、平均/最大耗时和 token 用量"""
+    agents: Dict[str, Dict] = {}
+    for record in load_recording(path):
+        if record.get('type') != 'response':
+            continue
+        stats = agents.setdefault(record.get('agent') or '(未知)', {
+            'requests': 0, 'latency_total_s': 0.0, 'latency_max_s': 0.0,
+            'prompt_tokens': 0, 'completion_tokens': 0})
+        usage = record['result'].get('usage') or {}
+        stats['requests'] += 1
+        stats['latency_total_s'] += record.get('latency_s') or 0.0
+        stats['latency_max_s'] = max(stats['latency_max_s'], record.get('latency_s') or 0.0)
+        stats['prompt_tokens'] += usage.get('prompt_tokens', 0)
+        stats['completion_tokens'] += usage.get('completion_tokens', 0)
+    for stats in agents.values():
+        stats['latency_mean_s'] = stats['latency_total_s'] / stats['requests']
+    return agents
+
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.getenv('LLM_RECORDING_PATH', DEFAULT_RECORDING_PATH)
+    if not os.path.exists(path):
+        print(f"❌ 录制文件不存在: {path}")
+        print("   先以 LLM_CLIENT_MODE=record 运行一次 autogen_uav_allocation.py 或消融实验")
+        sys.exit(1)
+
+    print(f"🎞️  录制文件: {path}")
+    print(f"{'智能体':<32} {'请求':>6} {'平均耗时':>10} {'最大耗时':>10} {'输入tok':>9} {'输出tok':>9}")
+    for agent, stats in summarize_recording(path).items():
+        print(f"{agent:<32} {stats['requests']:>6} {stats['latency_mean_s']:>9.2f}s "
+              f"{stats['latency_max_s']:>9.2f}s {stats['prompt_tokens']:>9} {stats['completion_tokens']:>9}")
@@ -0,0 +1,398 @@
+"""
+增量重规划模块
+在已有分配方案上处理扰动事件（新增任务、取消任务、无人机离线、时间窗口变更），
+只修复受影响的无人机排程，并报告方案的变化
+"""
+
+import copy
+import json
+import time
+from typing import Dict, List, Tuple
+
+from baseline_algorithms import CompiledProblem, TaskAllocationProblem, ScheduleState, LocalSearchAlgorithm, GreedyAlgorithm
+
+
+class IncrementalReplanner:
+    """
+    增量重规划器
+
+    在 ScheduleState 上维护当前方案：事件只触及相关任务所在的无人机序列，
+    修复采用与局部搜索相同的按窗口开始时间插入 + 增量重排程，
+    代价与受影响序列的长度有关，而不是整个机队和任务集。
+    新增或修改过的任务通过 CompiledProblem.derive() 单独计算可行无人机，不重新编译整个问题。
+    """
+
+    def __init__(self, problem: TaskAllocationProblem, allocation: Dict = None, backfill_limit: int = 200):
+        """
+        Args:
+            problem: 任务分配问题实例（重规划器持有其任务列表的副本）
+            allocation: 已有分配结果（标准格式），None 时先运行贪心算法
+            backfill_limit: 释放出空闲时间后，最多尝试回填的未分配任务数
+        """
+        self.problem = TaskAllocationProblem(list(problem.tasks), problem.uavs, problem.constraints)
+        self.problem._compiled = problem.compile()
+        if allocation is None:
+            allocation = GreedyAlgorithm(self.problem).allocate()
+        self.state = ScheduleState.from_allocation(self.problem, allocation)
+        self.backfill_limit = backfill_limit
+        self.formatter = GreedyAlgorithm(self.problem)
+
+        compiled = self.problem.compile()
+        self.task_row = dict(compiled.task_index)
+        self.uav_row = dict(compiled.uav_index)
+        self._capable = {}          # 新增/修改过的任务的可行无人机（覆盖编译结果）
+        self.offline = set()
+        self.cancelled = set()
+        self._log = None
+
+    # ------------------------------------------------------------------
+    # 可行性与修复原语
+    # ------------------------------------------------------------------
+
+    def _capable_uavs(self, t: int) -> List[int]:
+        """任务的可行在线无人机"""
+        uavs = self._capable.get(t)
+        if uavs is None:
+            uavs = self.problem.compile().feasible_uavs(t).tolist()
+        return [u for u in uavs if u not in self.offline] if self.offline else uavs
+
+    def _recompute_task(self, t: int) -> Tuple[int, int]:
+        """任务属性变化后重新计算其可行无人机（只编译这一个任务），返回新的窗口（分钟）"""
+        derived = self.problem.compile().derive(self.problem, [self.problem.tasks[t]])
+        self._capable[t] = derived.feasible_uavs(0).tolist()
+        return int(derived.window_start[0]), int(derived.window_end[0])
+
+    def _commit(self, updates, leave_pool, enter_pool, d_weight, d_end):
+        """提交修改，并记录被触及任务修改前的状态以便生成变化报告"""
+        state = self.state
+        for _, _, changes in updates:
+            for t, _ in changes:
+                self._log.setdefault(t, (state.uav_of[t], state.end_of[t]))
+        for t in list(leave_pool) + list(enter_pool):
+            self._log.setdefault(t, (state.uav_of[t], state.end_of[t]))
+        state.commit(updates, leave_pool, enter_pool, d_weight, d_end)
+
+    def _remove(self, t: int, to_pool: bool = True) -> Tuple[int, int, int]:
+        """
+        把已分配任务从其序列中移除
+
+        Returns:
+            (无人机, 释放区间开始, 释放区间结束)
+        """
+        state = self.state
+        u = state.uav_of[t]
+        seq = state.sequences[u]
+        i = seq.index(t)
+        free_start = state.end_of[seq[i - 1]] if i > 0 else state.base
+        free_end = state.end_of[t]
+        new_seq = seq[:i] + seq[i + 1:]
+        changes, d_end = state.retime(u, new_seq, i, i)
+        self._log.setdefault(t, (u, state.end_of[t]))
+        self._commit([(u, new_seq, changes)], [], [t] if to_pool else [],
+                     -state.weight[t], d_end - (state.end_of[t] - state.base))
+        if not to_pool:
+            state.uav_of[t] = -1
+        return u, free_start, free_end
+
+    def _best_insertion(self, t: int, uavs: List[int] = None):
+        """在可行无人机中找结束时间之和增加最少的插入位置，返回 (d_end, u, new_seq, changes)"""
+        state = self.state
+        best = None
+        for u in (self._capable_uavs(t) if uavs is None else uavs):
+            seq = state.sequences[u]
+            j = LocalSearchAlgorithm._insert_position(state, seq, t)
+            new_seq = seq[:j] + [t] + seq[j:]
+            timed = state.retime(u, new_seq, j, j + 1)
+            if timed is not None and (best is None or timed[1] < best[0]):
+                best = (timed[1], u, new_seq, timed[0])
+        return best
+
+    def _insert(self, t: int, uavs: List[int] = None) -> bool:
+        """把未分配任务插入最佳位置，成功返回 True"""
+        best = self._best_insertion(t, uavs)
+        if best is None:
+            return False
+        d_end, u, new_seq, changes = best
+        self._commit([(u, new_seq, changes)], [t], [], self.state.weight[t], d_end)
+        return True
+
+    def _insert_with_ejection(self, t: int) -> bool:
+        """
+        直接插入失败时，尝试替换掉一个优先级更低的任务（被替换者回到未分配池）
+
+        在每架可行无人机上只尝试与新任务时间窗口重叠的任务。
+        """
+        if self._insert(t):
+            return True
+        state = self.state
+        best = None
+        for u in self._capable_uavs(t):
+            for victim in state.sequences[u]:
+                if state.weight[victim] >= state.weight[t]:
+                    continue
+                victim_start = state.end_of[victim] - state.dur[victim]
+                if state.end_of[victim] <= state.ws[t] or victim_start >= state.we[t]:
+                    continue
+                seq = state.sequences[u]
+                i = seq.index(victim)
+                new_seq = seq[:i] + seq[i + 1:]
+                j = LocalSearchAlgorithm._insert_position(state, new_seq, t)
+                new_seq.insert(j, t)
+                timed = state.retime(u, new_seq, min(i, j), max(i, j) + 1)
+                if timed is None:
+                    continue
+                gain = state.weight[t] - state.weight[victim]
+                d_end = timed[1] - (state.end_of[victim] - state.base)
+                key = (-gain, d_end)
+                if best is None or key < best[0]:
+                    best = (key, u, victim, new_seq, timed[0], gain, d_end)
+        if best is None:
+            return False
+        _, u, victim, new_seq, changes, gain, d_end = best
+        self._commit([(u, new_seq, changes)], [t], [victim], gain, d_end)
+        return True
+
+    def _backfill(self, freed: List[Tuple[int, int, int]]):
+        """在释放出空闲时间的无人机上回填未分配任务（按优先级从高到低）"""
+        if not freed or not self.state.unassigned:
+            return
+        state = self.state
+        uavs = {u for u, _, _ in freed if u not in self.offline}
+        lo = min(start for _, start, _ in freed)
+        hi = max(end for _, _, end in freed)
+        candidates = [t for t in state.unassigned
+                      if t not in self.cancelled and state.ws[t] < hi and state.we[t] > lo]
+        candidates.sort(key=lambda t: (-state.weight[t], state.ws[t]))
+        for t in candidates[:self.backfill_limit]:
+            targets = [u for u in self._capable_uavs(t) if u in uavs]
+            if targets:
+                self._insert(t, targets)
+
+    # ------------------------------------------------------------------
+    # 事件
+    # ------------------------------------------------------------------
+
+    def add_task(self, task: Dict) -> Dict:
+        """新增任务：插入最佳位置，必要时替换一个优先级更低的任务"""
+        return self._handle('add_task', task.get('task_id'), lambda: self._on_add_task(task))
+
+    def cancel_task(self, task_id: str) -> Dict:
+        """取消任务：从所在序列移除，并在释放的时间内回填未分配任务"""
+        return self._handle('cancel_task', task_id, lambda: self._on_cancel_task(task_id))
+
+    def uav_offline(self, uav_id: str) -> Dict:
+        """无人机离线：其任务重新插入其它无人机（按优先级从高到低）"""
+        return self._handle('uav_offline', uav_id, lambda: self._on_uav_offline(uav_id))
+
+    def change_time_window(self, task_id: str, start: str, end: str) -> Dict:
+        """修改任务时间窗口：重排所在序列，放不下时改派其它无人机"""
+        return self._handle('change_time_window', task_id,
+                            lambda: self._on_change_time_window(task_id, start, end))
+
+    def fill_unassigned(self) -> Dict:
+        """把未分配池中的任务按优先级从高到低插入（必要时替换优先级更低的任务），用于修复不完整的方案"""
+        return self._handle('fill_unassigned', None, self._on_fill_unassigned)
+
+    def apply_event(self, event: Dict) -> Dict:
+        """
+        按事件字典分派
+
+        支持的格式：
+            {'type': 'add_task', 'task': {...}}
+            {'type': 'cancel_task', 'task_id': 'T3'}
+            {'type': 'uav_offline', 'uav_id': 'UAV-002'}
+            {'type': 'change_time_window', 'task_id': 'T1', 'time_window': {'start': '09:00', 'end': '10:00'}}
+        """
+        event_type = event.get('type')
+        if event_type == 'add_task':
+            return self.add_task(event['task'])
+        if event_type == 'cancel_task':
+            return self.cancel_task(event['task_id'])
+        if event_type == 'uav_offline':
+            return self.uav_offline(event['uav_id'])
+        if event_type == 'change_time_window':
+            window = event['time_window']
+            return self.change_time_window(event['task_id'], window['start'], window['end'])
+        raise ValueError(f"Unknown event type: {event_type}")
+
+    def _on_add_task(self, task: Dict):
+        task_id = task['task_id']
+        if task_id in self.task_row:
+            raise ValueError(f"Task already exists: {task_id}")
+        task = copy.deepcopy(task)
+        derived = self.problem.compile().derive(self.problem, [task])
+        state = self.state
+        t = len(self.problem.tasks)
+        self.problem.tasks.append(task)
+        self.task_row[task_id] = t
+        self._capable[t] = derived.feasible_uavs(0).tolist()
+        state.ws.append(int(derived.window_start[0]))
+        state.we.append(int(derived.window_end[0]))
+        state.dur.append(int(derived.duration[0]) + CompiledProblem.RETURN_TRIP_MIN)
+        state.weight.append(float(derived.priority[0]))
+        state.uav_of.append(-1)
+        state.end_of.append(0)
+        state.pool_add(t)
+        self._log.setdefault(t, (-1, 0))
+        self._insert_with_ejection(t)
+
+    def _on_cancel_task(self, task_id: str):
+        t = self._row_of(task_id)
+        state = self.state
+        if state.uav_of[t] >= 0:
+            freed = self._remove(t, to_pool=False)
+            self.cancelled.add(t)
+            self._backfill([freed])
+        else:
+            self._log.setdefault(t, (-1, 0))
+            state.pool_remove(t)
+            self.cancelled.add(t)
+
+    def _on_uav_offline(self, uav_id: str):
+        if uav_id not in self.uav_row:
+            raise ValueError(f"Unknown UAV: {uav_id}")
+        u = self.uav_row[uav_id]
+        if u in self.offline:
+            return
+        state = self.state
+        displaced = list(state.sequences[u])
+        self.offline.add(u)
+        d_end = -sum(state.end_of[t] - state.base for t in displaced)
+        d_weight = -sum(state.weight[t] for t in displaced)
+        self._commit([(u, [], [])], [], displaced, d_weight, d_end)
+        for t in sorted(displaced, key=lambda t: (-state.weight[t], state.ws[t])):
+            self._insert_with_ejection(t)
+
+    def _on_fill_unassigned(self):
+        state = self.state
+        pending = [t for t in state.unassigned if t not in self.cancelled and self._capable_uavs(t)]
+        for t in sorted(pending, key=lambda t: (-state.weight[t], state.ws[t])):
+            if state.uav_of[t] < 0:
+                self._insert_with_ejection(t)
+
+    def _on_change_time_window(self, task_id: str, start: str, end: str):
+        t = self._row_of(task_id)
+        task = copy.deepcopy(self.problem.tasks[t])
+        task['time_window'] = {'start': start, 'end': end}
+        self.problem.tasks[t] = task
+        window_start, window_end = self._recompute_task(t)
+        state = self.state
+
+        freed = []
+        u = state.uav_of[t]
+        if u >= 0:
+            freed.append(self._remove(t))
+        state.ws[t], state.we[t] = window_start, window_end
+        # 优先留在原无人机上，放不下再改派（必要时替换更低优先级的任务）
+        if u >= 0 and u in self._capable_uavs(t) and self._insert(t, [u]):
+            freed = []
+        else:
+            self._insert_with_ejection(t)
+        self._backfill(freed)
+
+    def _row_of(self, task_id: str) -> int:
+        t = self.task_row.get(task_id)
+        if t is None or t in self.cancelled:
+            raise ValueError(f"Unknown or cancelled task: {task_id}")
+        return t
+
+    # ------------------------------------------------------------------
+    # 报告
+    # ------------------------------------------------------------------
+
+    def _handle(self, event_type: str, subject: str, handler) -> Dict:
+        """执行事件处理并生成变化报告"""
+        started = time.perf_counter()
+        weight_before = self.state.weight_total
+        self._log = {}
+        handler()
+        log, self._log = self._log, None
+
+        state = self.state
+        changes = []
+        affected = set()
+        for t, (old_uav, old_end) in log.items():
+            new_uav = state.uav_of[t] if t not in self.cancelled else -1
+            new_end = state.end_of[t]
+            if t not in self.cancelled and old_uav == new_uav and (new_uav < 0 or old_end == new_end):
+                continue
+            if old_uav >= 0:
+                affected.add(old_uav)
+            if new_uav >= 0:
+                affected.add(new_uav)
+            changes.append({
+                'task_id': self.problem.tasks[t]['task_id'],
+                'from_uav': self.problem.uavs[old_uav]['uav_id'] if old_uav >= 0 else None,
+                'to_uav': self.problem.uavs[new_uav]['uav_id'] if new_uav >= 0 else None,
+                'old_start': self.formatter.format_minutes(old_end - state.dur[t]) if old_uav >= 0 else None,
+                'new_start': self.formatter.format_minutes(new_end - state.dur[t]) if new_uav >= 0 else None,
+                'change': self._describe(t, old_uav, new_uav),
+            })
+
+        return {
+            'event': event_type,
+            'subject': subject,
+            'changes': changes,
+            'affected_uavs': sorted(self.problem.uavs[u]['uav_id'] for u in affected),
+            'weighted_tasks_delta': round(state.weight_total - weight_before, 4),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _describe(self, t: int, old_uav: int, new_uav: int) -> str:
+        if t in self.cancelled:
+            return '已取消'
+        if old_uav < 0:
+            return '新分配'
+        if new_uav < 0:
+            return '改为未分配'
+        if old_uav != new_uav:
+            return '改派'
+        return '时间调整'
+
+    def current_allocation(self) -> Dict:
+        """当前方案（标准格式）"""
+        state = self.state
+        assignments, unassigned, makespan = state.build_assignments(
+            state.copy_solution(), self.formatter.format_minutes, '增量重规划')
+        cancelled_ids = {self.problem.tasks[t]['task_id'] for t in self.cancelled}
+        unassigned = [task_id for task_id in unassigned if task_id not in cancelled_ids]
+        return {
+            'final_allocation': {
+                'decision_time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'total_tasks': len(self.problem.tasks) - len(self.cancelled),
+                'total_uavs': len(self.problem.uavs),
+                'assignments': assignments,
+                'unassigned_tasks': unassigned,
+                'cancelled_tasks': sorted(cancelled_ids),
+                'offline_uavs': sorted(self.problem.uavs[u]['uav_id'] for u in self.offline),
+                'total_completion_time': self.formatter.format_minutes(makespan),
+                'risk_assessment': '增量修复的方案，未做全局重新优化',
+                'notes': '在已有方案上只修复受扰动影响的无人机排程',
+                'algorithm': 'IncrementalReplanner'
+            }
+        }
+
+
+if __name__ == "__main__":
+    # 在默认场景上演示几类扰动事件
+    problem = TaskAllocationProblem.from_default_scenario()
+    replanner = IncrementalReplanner(problem)
+
+    events = [
+        {'type': 'add_task', 'task': {
+            'task_id': 'T6', 'task_name': '补充侦察', 'priority': '紧急', 'type': '侦察',
+            'time_window': {'start': '09:00', 'end': '10:00'}, 'estimated_duration': 20}},
+        {'type': 'uav_offline', 'uav_id': 'UAV-001'},
+        {'type': 'change_time_window', 'task_id': 'T3', 'time_window': {'start': '10:00', 'end': '12:00'}},
+        {'type': 'cancel_task', 'task_id': 'T2'},
+    ]
+
+    for event in events:
+        report = replanner.apply_event(event)
+        print(f"\n事件: {report['event']} ({report['subject']})，用时 {report['elapsed_ms']:.2f}ms")
+        for change in report['changes']:
+            print(f"   • {change['task_id']}: {change['change']} "
+                  f"{change['from_uav']} {change['old_start']} -> {change['to_uav']} {change['new_start']}")
+
+    print("\n当前方案:")
+    print(json.dumps(replanner.current_allocation(), ensure_ascii=False, indent=2))
@@ -0,0 +1,300 @@
+"""
+分配方案鲁棒性分析（向量化蒙特卡洛）
+对任务时长、无人机速度和风进行随机扰动，把成千上万组样本以NumPy数组的形式
+沿每架无人机的任务序列同时传播，统计各任务按时完成的概率和总完成时间的分布，
+用于在名义评分之外按风险对方案排序
+"""
+
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from baseline_algorithms import CompiledProblem, TaskAllocationProblem, parse_clock
+
+
+class RobustnessAnalyzer:
+    """
+    蒙特卡洛鲁棒性分析
+
+    执行模型与求解器一致：每架无人机按计划顺序执行任务，起飞时间 = max(计划开始, 上一任务返航)，
+    占用时长 = 去程 + 任务时长 + 返程。扰动：
+      - 任务时长 × 对数正态因子（均值1，变异系数 duration_cv）
+      - 无人机速度 × 对数正态因子（每个样本每架无人机一个，变异系数 speed_cv）
+      - 风：每个样本一个风速（瑞利分布，尺度 wind_kmh），每个航次一个随机风向；
+        去程逆风分量为 w 时返程为顺风 w，往返用时 d/(v-w) + d/(v+w) 总是不小于无风时
+    样本按块生成和传播，内存占用与样本总数无关。
+    """
+
+    DEFAULT_SPEED_KMH = 60.0    # 速度缺失时用于把往返时间折算为距离
+    MIN_GROUND_SPEED = 0.2      # 地速下限（占空速的比例），防止强逆风下用时发散
+
+    def __init__(self, problem: TaskAllocationProblem, n_samples: int = 2000,
+                 duration_cv: float = 0.15, speed_cv: float = 0.1, wind_kmh: float = 10.0,
+                 base_coordinates: Dict[str, List[float]] = None, chunk_size: int = 500,
+                 seed: int = 42):
+        """
+        Args:
+            problem: 任务分配问题
+            n_samples: 蒙特卡洛样本数
+            duration_cv: 任务时长的变异系数
+            speed_cv: 无人机速度的变异系数
+            wind_kmh: 风速分布（瑞利）的尺度参数，km/h
+            base_coordinates: 基地坐标 {基地名: [x_km, y_km]}；与任务的 coordinates 同时存在时
+                              按直线距离计算航程，否则按往返时间折算
+            chunk_size: 每块的样本数（控制峰值内存）
+            seed: 随机种子（每块使用 [seed, 块号] 派生的独立随机流）
+        """
+        self.problem = problem
+        self.compiled = problem.compile()
+        self.n_samples = n_samples
+        self.duration_cv = duration_cv
+        self.speed_cv = speed_cv
+        self.wind_kmh = wind_kmh
+        self.base_coordinates = base_coordinates or {}
+        self.chunk_size = max(1, chunk_size)
+        self.seed = seed
+
+    @staticmethod
+    def _lognormal(rng: np.random.Generator, cv: float, size) -> np.ndarray:
+        """均值为1、变异系数为cv的对数正态因子"""
+        if cv <= 0:
+            return np.ones(size)
+        sigma = np.sqrt(np.log1p(cv * cv))
+        return rng.lognormal(-sigma * sigma / 2, sigma, size=size)
+
+    def _plan(self, allocation: Dict) -> Dict:
+        """把分配方案整理为按 (无人机, 计划开始) 排序的数组，并计算各任务在无人机序列中的位次"""
+        compiled = self.compiled
+        allocation = allocation.get('final_allocation', allocation)
+        rows, uavs, starts = [], [], []
+        seen = set()
+        for a in allocation.get('assignments', []):
+            t = compiled.task_index.get(a.get('task_id'))
+            u = compiled.uav_index.get(a.get('assigned_uav'))
+            if t is None or u is None or t in seen:
+                continue
+            seen.add(t)
+            rows.append(t)
+            uavs.append(u)
+            starts.append(parse_clock(a.get('start_time', '08:00')))
+
+        task = np.array(rows, dtype=np.int64)
+        uav = np.array(uavs, dtype=np.int64)
+        start = np.array(starts, dtype=float)
+        order = np.lexsort((start, uav))
+        task, uav, start = task[order], uav[order], start[order]
+
+        # 使用到的无人机压缩为列号 0..K-1；位次 = 在本无人机序列中的序号
+        used, column = np.unique(uav, return_inverse=True)
+        first = np.searchsorted(column, np.arange(len(used)))
+        position = np.arange(len(task)) - first[column] if len(task) else np.zeros(0, dtype=np.int64)
+
+        speed = compiled.uav_speed[uav].astype(float)
+        speed = np.where(speed > 0, speed, self.DEFAULT_SPEED_KMH)
+        # 无坐标信息时单程距离按往返时间的一半折算
+        distance = speed * (CompiledProblem.RETURN_TRIP_MIN / 2) / 60
+        if self.base_coordinates and len(task):
+            task_xy = np.array([self.problem.tasks[t].get('coordinates', (np.nan, np.nan)) for t in task],
+                               dtype=float).reshape(len(task), 2)
+            base_xy = np.array([self.base_coordinates.get(self.problem.uavs[u].get('location'), (np.nan, np.nan))
+                                for u in uav], dtype=float).reshape(len(task), 2)
+            measured = np.hypot(*(task_xy - base_xy).T)
+            distance = np.where(np.isfinite(measured), measured, distance)
+
+        return {
+            'task': task, 'uav': uav, 'column': column, 'position': position, 'start': start,
+            'n_columns': len(used), 'speed': speed, 'distance': distance,
+            'duration': compiled.duration[task].astype(float),
+            'window_end': compiled.window_end[task].astype(float),
+            'weight': compiled.priority[task].astype(float),
+            'steps': [np.flatnonzero(position == k) for k in range(int(position.max()) + 1)] if len(task) else [],
+        }
+
+    def _propagate(self, plan: Dict, rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+        """传播一块n个样本，返回该块的逐任务按时次数与完成时间和，以及逐样本的超时数与总完成时间"""
+        n_tasks = len(plan['task'])
+        speed_factor = self._lognormal(rng, self.speed_cv, (n, plan['n_columns']))
+        wind = rng.rayleigh(self.wind_kmh, size=(n, 1)) if self.wind_kmh > 0 else np.zeros((n, 1))
+        prev_end = np.full((n, plan['n_columns']), -np.inf)
+
+        on_time = np.zeros(n_tasks)
+        end_sum = np.zeros(n_tasks)
+        end_sq_sum = np.zeros(n_tasks)
+        late_count = np.zeros(n, dtype=np.int64)
+        weighted_on_time = np.zeros(n)
+
+        for idx in plan['steps']:
+            cols = plan['column'][idx]
+            airspeed = plan['speed'][idx] * speed_factor[:, cols]
+            headwind = wind * np.cos(rng.uniform(0, 2 * np.pi, size=(n, len(idx))))
+            outbound_speed = np.maximum(airspeed - headwind, self.MIN_GROUND_SPEED * airspeed)
+            return_speed = np.maximum(airspeed + headwind, self.MIN_GROUND_SPEED * airspeed)
+            transit = plan['distance'][idx] * (1 / outbound_speed + 1 / return_speed) * 60
+            work = plan['duration'][idx] * self._lognormal(rng, self.duration_cv, (n, len(idx)))
+
+            depart = np.maximum(prev_end[:, cols], plan['start'][idx])
+            end = depart + transit + work
+            prev_end[:, cols] = end
+
+            ok = end <= plan['window_end'][idx]
+            on_time[idx] = ok.sum(axis=0)
+            end_sum[idx] = end.sum(axis=0)
+            end_sq_sum[idx] = (end * end).sum(axis=0)
+            late_count += (~ok).sum(axis=1)
+            weighted_on_time += ok @ plan['weight'][idx]
+
+        makespan = prev_end.max(axis=1, initial=-np.inf) if plan['n_columns'] else np.full(n, np.nan)
+        return {'on_time': on_time, 'end_sum': end_sum, 'end_sq_sum': end_sq_sum,
+                'late_count': late_count, 'weighted_on_time': weighted_on_time, 'makespan': makespan}
+
+    def analyze(self, allocation: Dict) -> Dict:
+        """
+        分析一个分配方案
+
+        Returns:
+            n_samples, assigned_tasks, expected_on_time, all_on_time_probability,
+            risk_score（按优先级加权的期望超时比例，越小越稳健）, makespan 分布（分钟与时刻）,
+            nominal（无扰动时的按时任务数与完成时间）, tasks（各任务按时概率与完成时间均值/标准差）
+        """
+        compiled = self.compiled
+        plan = self._plan(allocation)
+        n_tasks = len(plan['task'])
+
+        on_time = np.zeros(n_tasks)
+        end_sum = np.zeros(n_tasks)
+        end_sq_sum = np.zeros(n_tasks)
+        late_count = []
+        weighted_on_time = []
+        makespan = []
+        for chunk, lo in enumerate(range(0, self.n_samples, self.chunk_size)):
+            n = min(self.chunk_size, self.n_samples - lo)
+            out = self._propagate(plan, np.random.default_rng([self.seed, chunk]), n)
+            on_time += out['on_time']
+            end_sum += out['end_sum']
+            end_sq_sum += out['end_sq_sum']
+            late_count.append(out['late_count'])
+            weighted_on_time.append(out['weighted_on_time'])
+            makespan.append(out['makespan'])
+        late_count = np.concatenate(late_count)
+        weighted_on_time = np.concatenate(weighted_on_time)
+        makespan = np.concatenate(makespan)
+
+        # 无扰动的名义执行，作为对照
+        nominal = self._nominal(plan)
+
+        total_weight = plan['weight'].sum()
+        mean_end = end_sum / self.n_samples
+        std_end = np.sqrt(np.maximum(end_sq_sum / self.n_samples - mean_end ** 2, 0))
+        probability = on_time / self.n_samples
+        fmt = self.format_minutes
+
+        tasks = {
+            compiled.task_ids[t]: {
+                'on_time_probability': round(float(probability[i]), 4),
+                'mean_completion': fmt(mean_end[i]),
+                'completion_std_min': round(float(std_end[i]), 2),
+            }
+            for i, t in enumerate(plan['task'].tolist())
+        }
+        percentiles = np.percentile(makespan, [5, 50, 95]) if n_tasks else [np.nan] * 3
+
+        return {
+            'n_samples': self.n_samples,
+            'assigned_tasks': n_tasks,
+            'expected_on_time': round(float(probability.sum()), 2),
+            'all_on_time_probability': round(float((late_count == 0).mean()), 4),
+            'risk_score': round(float(1 - weighted_on_time.mean() / total_weight), 4) if total_weight > 0 else 0.0,
+            'makespan': {
+                'mean': fmt(makespan.mean()) if n_tasks else None,
+                'std_min': round(float(makespan.std()), 2) if n_tasks else None,
+                'p5': fmt(percentiles[0]) if n_tasks else None,
+                'p50': fmt(percentiles[1]) if n_tasks else None,
+                'p95': fmt(percentiles[2]) if n_tasks else None,
+                'histogram': self._histogram(makespan) if n_tasks else None,
+            },
+            'nominal': nominal,
+            'tasks': tasks,
+        }
+
+    def _nominal(self, plan: Dict) -> Dict:
+        """无扰动（时长、速度不变，无风）时的按时任务数与完成时间"""
+        prev_end = np.full(plan['n_columns'], -np.inf)
+        on_time = 0
+        for idx in plan['steps']:
+            cols = plan['column'][idx]
+            transit = plan['distance'][idx] * 2 / plan['speed'][idx] * 60
+            end = np.maximum(prev_end[cols], plan['start'][idx]) + transit + plan['duration'][idx]
+            prev_end[cols] = end
+            on_time += int((end <= plan['window_end'][idx]).sum())
+        return {
+            'on_time': on_time,
+            'makespan': self.format_minutes(prev_end.max()) if plan['n_columns'] else None,
+        }
+
+    def _histogram(self, makespan: np.ndarray, bins: int = 20) -> Dict:
+        """总完成时间分布直方图（区间边界为时刻字符串）"""
+        counts, edges = np.histogram(makespan, bins=bins)
+        return {'bin_edges': [self.format_minutes(e) for e in edges], 'counts': counts.tolist()}
+
+    @staticmethod
+    def format_minutes(minutes: float) -> str:
+        total = int(round(float(minutes)))
+        return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def rank_allocations(problem: TaskAllocationProblem, results: Dict[str, Dict], **kwargs) -> List[Dict]:
+    """
+    对多个分配方案做鲁棒性分析并按风险排序（风险分数升序，相同时期望按时任务数多者优先）
+
+    Args:
+        problem: 任务分配问题
+        results: {方案名: 分配结果}
+        **kwargs: 传给 RobustnessAnalyzer 的参数
+
+    Returns:
+        [{name, risk_score, expected_on_time, all_on_time_probability, makespan_p95, ...}, ...]
+    """
+    analyzer = RobustnessAnalyzer(problem, **kwargs)
+    ranking = []
+    for name, result in results.items():
+        report = analyzer.analyze(result)
+        ranking.append({
+            'name': name,
+            'assigned_tasks': report['assigned_tasks'],
+            'nominal_on_time': report['nominal']['on_time'],
+            'expected_on_time': report['expected_on_time'],
+            'all_on_time_probability': report['all_on_time_probability'],
+            'risk_score': report['risk_score'],
+            'makespan_p50': report['makespan']['p50'],
+            'makespan_p95': report['makespan']['p95'],
+        })
+    ranking.sort(key=lambda r: (r['risk_score'], -r['expected_on_time']))
+    return ranking
+
+
+if __name__ == "__main__":
+    from baseline_algorithms import ALGORITHMS, run_baseline_algorithm
+
+    print("=" * 70)
+    print("🎲 分配方案鲁棒性分析（蒙特卡洛）")
+    print("=" * 70)
+
+    problem = TaskAllocationProblem.from_default_scenario()
+    results = {}
+    # 优先使用对比实验保存的结果（含AutoGen），缺失的算法现场运行
+    for name in ['autogen'] + list(ALGORITHMS):
+        path = os.path.join('comparison_results', f'allocation_{name}.json')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                results[name] = json.load(f)
+        elif name != 'autogen':
+            results[name] = run_baseline_algorithm(name, problem)
+
+    ranking = rank_allocations(problem, results, n_samples=20000)
+    print(f"\n{'方案':<14}{'分配':>6}{'名义按时':>10}{'期望按时':>10}{'全部按时概率':>14}{'风险分数':>10}{'P95完成':>10}")
+    for r in ranking:
+        print(f"{r['name']:<14}{r['assigned_tasks']:>6}{r['nominal_on_time']:>10}{r['expected_on_time']:>10.2f}"
+              f"{r['all_on_time_probability']:>14.3f}{r['risk_score']:>10.3f}{r['makespan_p95']:>10}")
+    print(f"\n✅ 风险最低的方案: {ranking[0]['name']}")
@@ -30,8 +30,9 @@ async def main():
     # 步骤1：运行消融实验
     print("步骤 1/2: 运行消融实验")
     print("="*70)
-    print("\n⚠️  注意：这将运行5个配置，预计需要10-25分钟")
+    print("\n⚠️  注意：这将并发运行5个配置，总耗时接近最慢的单个配置")
     print("   每个配置都会调用LLM API，请确保API密钥已配置")
+    print("   重复次数、并发数和API限速见 ABLATION_TRIALS / ABLATION_CONCURRENCY / LLM_RPM / LLM_TPM")
     print()
     
     input("按Enter键开始实验...")
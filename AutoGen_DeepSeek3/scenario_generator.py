@@ -0,0 +1,305 @@
+"""
+大规模合成场景生成器
+按随机种子生成可复现的多无人机任务分配场景，用于扩展性基准测试
+
+输出格式与 uav_task_example.json 相同，任务按块流式写入磁盘，
+百万级任务也不需要一次性放进内存；读取统一走
+TaskAllocationProblem.from_json_file()。
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from baseline_algorithms import TaskAllocationProblem
+
+
+# 无人机型号目录（参数与 uav_task_example.json 中的机型一致）
+UAV_MODELS = [
+    {'type': '侦察型', 'max_flight_time': 120, 'max_speed_kmh': 80, 'max_payload_kg': 0,
+     'sensors': ['高清摄像头', '红外传感器'], 'weight': 0.3},
+    {'type': '侦察型', 'max_flight_time': 100, 'max_speed_kmh': 70, 'max_payload_kg': 0,
+     'sensors': ['高清摄像头', '热成像仪'], 'weight': 0.2},
+    {'type': '运输型', 'max_flight_time': 90, 'max_speed_kmh': 60, 'max_payload_kg': 5,
+     'sensors': ['GPS导航'], 'weight': 0.3},
+    {'type': '多用途', 'max_flight_time': 80, 'max_speed_kmh': 65, 'max_payload_kg': 2,
+     'sensors': ['摄像头', 'GPS导航'], 'weight': 0.2},
+]
+
+# 任务类型目录：(类型, 名称, 时长范围(分钟), 抽样权重)
+TASK_TYPES = [
+    ('侦察', '区域侦察', (15, 45), 0.45),
+    ('运输', '物资运输', (20, 50), 0.30),
+    ('监控', '目标监控', (30, 75), 0.25),
+]
+
+PRIORITIES = ['紧急', '高', '中', '低']
+PRIORITY_WEIGHTS = [0.10, 0.25, 0.40, 0.25]
+
+DISTRIBUTIONS = ('uniform', 'clustered', 'corridor')
+
+
+def _format_clock(minutes: int) -> str:
+    """分钟数 -> "HH:MM" """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _base_name(index: int) -> str:
+    """基地命名：A基地、B基地……超过26个后为 基地27、基地28……"""
+    return f"{chr(ord('A') + index)}基地" if index < 26 else f"基地{index + 1}"
+
+
+class ScenarioGenerator:
+    """可复现的大规模场景生成器"""
+
+    CHUNK_SIZE = 10000  # 每块生成的任务数（固定值，保证结果与内存占用无关）
+
+    def __init__(self, n_tasks: int = 1000, n_uavs: int = 100, n_bases: int = 3,
+                 n_no_fly_zones: int = 5, window_tightness: float = 0.5,
+                 distribution: str = 'uniform', area_km: float = 50.0,
+                 horizon: tuple = ('08:00', '18:00'), seed: int = 42):
+        """
+        Args:
+            n_tasks: 任务数
+            n_uavs: 无人机数
+            n_bases: 基地数
+            n_no_fly_zones: 禁飞区数
+            window_tightness: 时间窗口紧张度，0为宽松（窗口富余约4小时），1为窗口恰好等于执行时长
+            distribution: 任务空间分布 'uniform'（均匀）/'clustered'（聚簇）/'corridor'（走廊）
+            area_km: 作业区域边长（公里）
+            horizon: 任务时间窗口所在的时段
+            seed: 随机种子
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {distribution}")
+        if not 0.0 <= window_tightness <= 1.0:
+            raise ValueError("window_tightness must be in [0, 1]")
+
+        self.n_tasks = n_tasks
+        self.n_uavs = n_uavs
+        self.n_bases = max(1, n_bases)
+        self.n_no_fly_zones = n_no_fly_zones
+        self.window_tightness = window_tightness
+        self.distribution = distribution
+        self.area_km = area_km
+        self.horizon = (int(horizon[0][:2]) * 60 + int(horizon[0][3:]),
+                        int(horizon[1][:2]) * 60 + int(horizon[1][3:]))
+        self.seed = seed
+
+        # 场景的"地图"（基地、聚簇中心、走廊、禁飞区）先于任务生成，与任务数无关
+        rng = np.random.default_rng([seed, 0])
+        self.base_xy = rng.uniform(0.1, 0.9, size=(self.n_bases, 2)) * area_km
+        self.base_names = [_base_name(i) for i in range(self.n_bases)]
+        n_clusters = max(3, 2 * self.n_bases)
+        self.cluster_xy = rng.uniform(0.1, 0.9, size=(n_clusters, 2)) * area_km
+        corridor = rng.uniform(0.05, 0.95, size=(2, 2)) * area_km
+        self.corridor = (corridor[0], corridor[1])
+        self.zones = []
+        for j in range(n_no_fly_zones):
+            length = int(rng.integers(30, 121))
+            start = int(rng.integers(self.horizon[0], max(self.horizon[0] + 1, self.horizon[1] - length)))
+            self.zones.append({
+                'name': f'NFZ{j + 1}区域',
+                'center': rng.uniform(0, 1, size=2) * area_km,
+                'radius_km': float(rng.uniform(1.0, max(1.0, area_km * 0.05))),
+                'start': start,
+                'end': min(start + length, self.horizon[1]),
+            })
+
+    def _positions(self, rng, n: int) -> np.ndarray:
+        """按空间分布生成n个任务坐标（公里）"""
+        if self.distribution == 'uniform':
+            xy = rng.uniform(0, self.area_km, size=(n, 2))
+        elif self.distribution == 'clustered':
+            centers = self.cluster_xy[rng.integers(0, len(self.cluster_xy), size=n)]
+            xy = centers + rng.normal(0, self.area_km * 0.05, size=(n, 2))
+        else:
+            a, b = self.corridor
+            t = rng.uniform(0, 1, size=(n, 1))
+            direction = (b - a) / max(np.linalg.norm(b - a), 1e-9)
+            normal = np.array([-direction[1], direction[0]])
+            xy = a + t * (b - a) + rng.normal(0, self.area_km * 0.03, size=(n, 1)) * normal
+        return np.clip(xy, 0, self.area_km)
+
+    def iter_uavs(self) -> Iterator[Dict]:
+        """生成无人机（uav_task_example.json 格式）"""
+        rng = np.random.default_rng([self.seed, 1])
+        weights = np.array([m['weight'] for m in UAV_MODELS])
+        models = rng.choice(len(UAV_MODELS), size=self.n_uavs, p=weights / weights.sum())
+        bases = rng.integers(0, self.n_bases, size=self.n_uavs)
+        batteries = rng.integers(12, 21, size=self.n_uavs) * 5  # 60%~100%，5%一档
+        maintenance = rng.random(self.n_uavs) < 0.02
+        width = max(3, len(str(self.n_uavs)))
+        for i in range(self.n_uavs):
+            model = UAV_MODELS[models[i]]
+            yield {
+                'uav_id': f'UAV-{i + 1:0{width}d}',
+                'type': model['type'],
+                'capabilities': {
+                    'max_flight_time': model['max_flight_time'],
+                    'max_speed_kmh': model['max_speed_kmh'],
+                    'max_payload_kg': model['max_payload_kg'],
+                    'sensors': list(model['sensors']),
+                },
+                'current_status': {
+                    'location': self.base_names[bases[i]],
+                    'battery_percent': int(batteries[i]),
+                    'availability': '维护中' if maintenance[i] else '可用',
+                },
+            }
+
+    def iter_tasks(self) -> Iterator[Dict]:
+        """按块生成任务（uav_task_example.json 格式），内存占用与任务总数无关"""
+        width = max(1, len(str(self.n_tasks)))
+        type_weights = np.array([t[3] for t in TASK_TYPES])
+        type_weights = type_weights / type_weights.sum()
+        horizon_start, horizon_end = self.horizon
+        max_slack = 240 * (1.0 - self.window_tightness)
+
+        for chunk, lo in enumerate(range(0, self.n_tasks, self.CHUNK_SIZE)):
+            rng = np.random.default_rng([self.seed, 2, chunk])
+            n = min(self.CHUNK_SIZE, self.n_tasks - lo)
+
+            xy = self._positions(rng, n)
+            kinds = rng.choice(len(TASK_TYPES), size=n, p=type_weights)
+            priorities = rng.choice(len(PRIORITIES), size=n, p=PRIORITY_WEIGHTS)
+            low = np.array([TASK_TYPES[k][2][0] for k in range(len(TASK_TYPES))])[kinds]
+            high = np.array([TASK_TYPES[k][2][1] for k in range(len(TASK_TYPES))])[kinds]
+            durations = rng.integers(low, high + 1)
+            payloads = rng.integers(1, 6, size=n)
+
+            # 时间窗口：长度 = 执行时长(含15分钟往返) + 随紧张度缩放的富余
+            lengths = durations + 15 + (max_slack * rng.uniform(0.5, 1.5, size=n)).astype(int)
+            lengths = np.minimum(lengths, horizon_end - horizon_start)
+            starts = horizon_start + (rng.uniform(0, 1, size=n) * (horizon_end - horizon_start - lengths)).astype(int)
+            ends = starts + lengths
+
+            # 落在禁飞区内的任务以该区域命名地点，便于按地点匹配禁飞时段
+            location = np.full(n, -1)
+            for j, zone in enumerate(self.zones):
+                inside = np.hypot(xy[:, 0] - zone['center'][0], xy[:, 1] - zone['center'][1]) <= zone['radius_km']
+                location[(location < 0) & inside] = j
+            nearest_base = np.argmin(
+                ((xy[:, None, :] - self.base_xy[None, :, :]) ** 2).sum(axis=2), axis=1)
+
+            for k in range(n):
+                i = lo + k
+                task_type, task_name, _, _ = TASK_TYPES[kinds[k]]
+                priority = PRIORITIES[priorities[k]]
+                place = self.zones[location[k]]['name'] if location[k] >= 0 else f'P{i + 1:0{width}d}点'
+                task = {
+                    'task_id': f'T{i + 1}',
+                    'task_name': task_name,
+                    'task_type': task_type,
+                    'estimated_duration_min': int(durations[k]),
+                    'priority': priority,
+                    'time_window': {'start': _format_clock(int(starts[k])), 'end': _format_clock(int(ends[k]))},
+                    'coordinates': [round(float(xy[k, 0]), 3), round(float(xy[k, 1]), 3)],
+                }
+                if task_type == '运输':
+                    task['from_location'] = self.base_names[nearest_base[k]]
+                    task['to_location'] = place
+                    task['payload_kg'] = int(payloads[k])
+                    task['required_capabilities'] = [f'载重>={int(payloads[k])}kg']
+                else:
+                    task['location'] = place
+                    task['required_capabilities'] = ['摄像头', '长续航'] if task_type == '监控' else \
+                        (['摄像头', '高速'] if priority == '紧急' else ['摄像头'])
+                yield task
+
+    def constraints(self) -> List[Dict]:
+        """禁飞区及通用约束"""
+        constraints = [{
+            'type': '禁飞区',
+            'description': f"{zone['name']}为临时禁飞区",
+            'location': zone['name'],
+            'center': [round(float(zone['center'][0]), 3), round(float(zone['center'][1]), 3)],
+            'radius_km': round(zone['radius_km'], 3),
+            'time_window': {'start': _format_clock(zone['start']), 'end': _format_clock(zone['end'])},
+        } for zone in self.zones]
+        constraints.append({'type': '并发限制', 'description': '每架无人机同一时间只能执行一个任务'})
+        constraints.append({'type': '返航要求', 'description': '任务完成后无人机需返回最近基地'})
+        return constraints
+
+    def additional_info(self) -> Dict:
+        """基地坐标与生成参数"""
+        return {
+            'base_locations': self.base_names,
+            'base_coordinates': {name: [round(float(x), 3), round(float(y), 3)]
+                                 for name, (x, y) in zip(self.base_names, self.base_xy)},
+            'area_km': self.area_km,
+            'average_flight_time_to_task_min': 12,
+            'generator': {
+                'seed': self.seed,
+                'n_tasks': self.n_tasks,
+                'n_uavs': self.n_uavs,
+                'n_bases': self.n_bases,
+                'n_no_fly_zones': self.n_no_fly_zones,
+                'window_tightness': self.window_tightness,
+                'distribution': self.distribution,
+            },
+        }
+
+    def write(self, output_file: str) -> str:
+        """
+        流式写出场景JSON（逐条写入任务，不在内存中保留任务列表）
+
+        Returns:
+            输出文件路径
+        """
+        def dump(obj):
+            return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('{\n')
+            f.write(f'"scenario":{dump(f"合成场景-{self.distribution}-{self.n_tasks}任务-{self.n_uavs}无人机")},\n')
+            f.write(f'"timestamp":{dump(datetime.now().strftime("%Y-%m-%dT%H:%M:%S"))},\n')
+            f.write('"available_uavs":[\n')
+            for i, uav in enumerate(self.iter_uavs()):
+                f.write((',\n' if i else '') + dump(uav))
+            f.write('\n],\n"tasks":[\n')
+            for i, task in enumerate(self.iter_tasks()):
+                f.write((',\n' if i else '') + dump(task))
+            f.write('\n],\n')
+            f.write(f'"constraints":{dump(self.constraints())},\n')
+            f.write(f'"additional_info":{dump(self.additional_info())}\n')
+            f.write('}\n')
+        return output_file
+
+    def to_problem(self) -> TaskAllocationProblem:
+        """直接在内存中构建问题实例（适合中小规模）"""
+        return TaskAllocationProblem.from_dict({
+            'available_uavs': list(self.iter_uavs()),
+            'tasks': list(self.iter_tasks()),
+            'constraints': self.constraints(),
+        })
+
+
+def generate_scenario(output_file: str, **kwargs) -> str:
+    """生成场景文件的便捷函数，参数同 ScenarioGenerator"""
+    return ScenarioGenerator(**kwargs).write(output_file)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='生成大规模合成无人机任务分配场景')
+    parser.add_argument('output', nargs='?', default='scenario_generated.json', help='输出文件')
+    parser.add_argument('--tasks', type=int, default=1000, help='任务数')
+    parser.add_argument('--uavs', type=int, default=100, help='无人机数')
+    parser.add_argument('--bases', type=int, default=3, help='基地数')
+    parser.add_argument('--no-fly-zones', type=int, default=5, help='禁飞区数')
+    parser.add_argument('--tightness', type=float, default=0.5, help='时间窗口紧张度 [0,1]')
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='uniform', help='任务空间分布')
+    parser.add_argument('--area', type=float, default=50.0, help='作业区域边长（公里）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    print(f"正在生成场景: {args.tasks}个任务, {args.uavs}架无人机, 分布={args.distribution}")
+    path = generate_scenario(
+        args.output, n_tasks=args.tasks, n_uavs=args.uavs, n_bases=args.bases,
+        n_no_fly_zones=args.no_fly_zones, window_tightness=args.tightness,
+        distribution=args.distribution, area_km=args.area, seed=args.seed)
+    print(f"✅ 场景已保存到: {path}")
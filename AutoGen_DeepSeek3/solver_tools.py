@@ -0,0 +1,87 @@
+"""
+本地求解工具
+把贪心求解器、冲突检查器和评估器包装为智能体可调用的函数工具（FunctionTool），
+方案生成和冲突检测智能体调用本地确定性代码（毫秒级）得到排程和冲突结果，
+只需对结果做判断，不再在文本中逐项推算时间和冲突。
+"""
+
+import json
+from typing import Dict, List, Optional
+
+from autogen_core.tools import FunctionTool
+
+from allocation_stream import extract_allocations
+from baseline_algorithms import GreedyAlgorithm, TaskAllocationProblem
+from evaluation_metrics import AllocationEvaluator
+
+
+def _parse_allocation(allocation_json: str) -> Optional[Dict]:
+    """解析工具参数中的方案：可以是纯JSON，也可以是夹带说明文字的文本"""
+    try:
+        allocation = json.loads(allocation_json)
+    except ValueError:
+        allocations = extract_allocations(allocation_json)
+        return allocations[-1] if allocations else None
+    if isinstance(allocation, dict) and 'assignments' in allocation:
+        allocation = {'final_allocation': allocation}
+    return allocation if isinstance(allocation, dict) and 'final_allocation' in allocation else None
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+_INVALID = _dumps({'error': '无法解析方案，请传入包含 final_allocation 的JSON'})
+
+
+def create_solver_tools(problem: TaskAllocationProblem = None) -> Dict[str, FunctionTool]:
+    """
+    创建绑定到指定场景的本地求解工具
+
+    Args:
+        problem: 任务分配场景（默认场景）
+
+    Returns:
+        {'greedy_allocation': ..., 'check_allocation': ..., 'evaluate_allocation': ...}
+    """
+    if problem is None:
+        problem = TaskAllocationProblem.from_default_scenario()
+    compiled = problem.compile()
+
+    def greedy_allocation() -> str:
+        """运行贪心算法，返回满足能力匹配且无时间冲突的基线分配方案（final_allocation JSON）"""
+        return _dumps(GreedyAlgorithm(problem).allocate())
+
+    def check_allocation(allocation_json: str) -> str:
+        """校验分配方案：任务/无人机是否存在、重复分配、能力匹配、同一无人机的时间冲突（含往返时间）；
+        另行报告覆盖率及仍可插入空闲时段的未分配任务（不计入硬约束违规）"""
+        allocation = _parse_allocation(allocation_json)
+        if allocation is None:
+            return _INVALID
+        evaluator = AllocationEvaluator(allocation, compiled)
+        issues = evaluator.check_feasibility()
+        coverage = evaluator.coverage()
+        return _dumps({'feasible': not issues, 'issues': issues, 'coverage': coverage})
+
+    def evaluate_allocation(allocation_json: str) -> str:
+        """评估分配方案的完成度、时间效率、资源利用率和约束满足情况，返回各项指标及总分（0-100）"""
+        allocation = _parse_allocation(allocation_json)
+        if allocation is None:
+            return _INVALID
+        return _dumps(AllocationEvaluator(allocation, compiled).evaluate_all())
+
+    return {
+        'greedy_allocation': FunctionTool(greedy_allocation, description=greedy_allocation.__doc__),
+        'check_allocation': FunctionTool(check_allocation, description=check_allocation.__doc__),
+        'evaluate_allocation': FunctionTool(evaluate_allocation, description=evaluate_allocation.__doc__),
+    }
+
+
+def solution_generator_tools(tools: Dict[str, FunctionTool]) -> List[FunctionTool]:
+    """方案生成智能体使用的工具：生成基线方案、校验、评分"""
+    return [tools['greedy_allocation'], tools['check_allocation'], tools['evaluate_allocation']]
+
+
+def conflict_detector_tools(tools: Dict[str, FunctionTool]) -> List[FunctionTool]:
+    """冲突检测智能体使用的工具：校验、评分"""
+    return [tools['check_allocation'], tools['evaluate_allocation']]
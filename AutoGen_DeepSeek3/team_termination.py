@@ -0,0 +1,76 @@
+"""
+团队对话终止条件
+FeasibleAllocationTermination：每条新消息到达后提取其中的 final_allocation JSON，
+在本地校验格式、能力匹配和时间冲突，一旦出现可行方案立即结束对话，
+省去可行方案出现后的多余 LLM 轮次（延迟和token开销）。
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.messages import BaseAgentEvent, BaseChatMessage, StopMessage
+
+from allocation_stream import extract_allocations
+from evaluation_metrics import AllocationEvaluator
+
+
+class FeasibleAllocationTermination(TerminationCondition):
+    """
+    可行方案终止条件：消息中的 final_allocation 通过本地可行性校验（见 AllocationEvaluator.check_feasibility）时终止
+
+    可与其他条件组合使用，例如：
+        MaxMessageTermination(20) | TextMentionTermination("TERMINATE") | FeasibleAllocationTermination(problem)
+    """
+
+    def __init__(self, task_input=None, sources: Optional[Sequence[str]] = None, require_complete: bool = False):
+        """
+        Args:
+            task_input: 任务场景（同 AllocationEvaluator 的 task_input，省略时使用默认场景）
+            sources: 只检查这些智能体发出的消息（默认检查所有消息）
+            require_complete: 是否要求方案不可再扩充（没有仍能插入排程空档的未分配任务）；
+                              默认不要求，任务多于机队能力时任何方案都无法分配全部任务
+        """
+        self._compiled = AllocationEvaluator._compile_input(task_input)
+        self._sources = sources
+        self._require_complete = require_complete
+        self._terminated = False
+        self.allocation: Optional[Dict] = None
+        self.source: Optional[str] = None
+        self.rejected: List[Dict] = []
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence[BaseAgentEvent | BaseChatMessage]) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            if not isinstance(message, BaseChatMessage):
+                continue
+            if self._sources is not None and message.source not in self._sources:
+                continue
+            allocation = None
+            for candidate in extract_allocations(message.to_text()):
+                issues = AllocationEvaluator(candidate, self._compiled).check_feasibility(self._require_complete)
+                if not issues:
+                    allocation = candidate
+                    break
+                # 记录未通过校验的方案，便于事后分析
+                self.rejected.append({'source': message.source, 'issues': issues})
+            if allocation is None:
+                continue
+            self._terminated = True
+            self.allocation = allocation
+            self.source = message.source
+            count = len(allocation['final_allocation'].get('assignments', []))
+            return StopMessage(
+                content=f"{message.source} 给出的方案通过本地可行性校验（{count}项分配）",
+                source="FeasibleAllocationTermination")
+        return None
+
+    async def reset(self) -> None:
+        self._terminated = False
+        self.allocation = None
+        self.source = None
+        self.rejected = []
@@ -435,13 +435,14 @@ class AllocationVisualizer:
         print(f"   📊 综合仪表盘: {self.output_dir}/5_dashboard.png")
 
 
-def visualize_from_files(allocation_file: str, metrics_file: str = None):
+def visualize_from_files(allocation_file: str, metrics_file: str = None, task_input=None):
     """
     从文件读取数据并生成可视化
     
     Args:
         allocation_file: 分配方案JSON文件
         metrics_file: 评估指标JSON文件（可选，如果不提供会自动计算）
+        task_input: 自动计算评估指标时使用的任务场景（同 AllocationEvaluator，默认场景）
     """
     # 读取分配方案
     with open(allocation_file, 'r', encoding='utf-8') as f:
@@ -454,7 +455,7 @@ def visualize_from_files(allocation_file: str, metrics_file: str = None):
     else:
         # 自动计算评估指标
         from evaluation_metrics import AllocationEvaluator
-        evaluator = AllocationEvaluator(allocation)
+        evaluator = AllocationEvaluator(allocation, task_input)
         metrics = evaluator.evaluate_all()
     
     # 生成可视化